@@ -37,6 +37,9 @@ TS_JOB_TYPES = ('synctransplatform', 'syncrelschedule', 'syncupstream', 'syncdow
 # Branch Mapping Keys
 BRANCH_MAPPING_KEYS = ('platform_version', 'buildsys', 'buildsys_tag', 'upstream_release')
 
+# Sync Priorities, highest first (as per release milestones)
+SYNC_PRIORITIES = ('crunch', 'normal', 'low')
+
 # Supported Build Systems
 BUILD_SYSTEMS = ('brew', 'koji')
 
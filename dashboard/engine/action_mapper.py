@@ -18,7 +18,9 @@
 #   with most appropriate method therein
 
 import os
+import time
 import difflib
+import hashlib
 import requests
 import polib
 import tarfile
@@ -31,6 +33,9 @@ from pyrpm.spec import Spec
 from subprocess import Popen, PIPE, call
 from inspect import getmembers, isfunction
 
+# django
+from django.conf import settings
+
 # dashboard
 from dashboard.constants import (
     TRANSPLATFORM_ENGINES,
@@ -38,16 +43,19 @@ from dashboard.constants import (
 )
 from dashboard.converters.specfile import RpmSpecFile
 from dashboard.managers import BaseManager
+from dashboard.services.consume.ratelimit import rate_limiters
+from dashboard.services.consume.restclient import RestHandle
+from dashboard.services.consume.sessions import http_sessions
 
 __all__ = ['ActionMapper']
 
 
 class JobCommandBase(BaseManager):
 
-    def __init__(self):
+    def __init__(self, sandbox_path=None):
 
         kwargs = {
-            'sandbox_path': 'dashboard/sandbox/',
+            'sandbox_path': sandbox_path or 'dashboard/sandbox/',
         }
         super(JobCommandBase, self).__init__(**kwargs)
 
@@ -115,18 +123,122 @@ class Download(JobCommandBase):
     Handles all operations for DOWNLOAD Command
     """
 
-    def _download_file(self, file_link, file_path=None, headers=None):
-        req = requests.get(file_link, headers=headers)
-        if req.status_code == 404:
-            return '404'
+    RPM_LEAD_SIZE = 96
+    RPM_HEADER_MAGIC = b'\x8e\xad\xe8\x01'
+
+    @staticmethod
+    def _rpm_payload_hash(file_path):
+        """
+        MD5 of header and payload of an RPM, as in koji payloadhash (sigmd5)
+        :param file_path: str
+        :return: hex digest or None, if it is not an RPM
+        """
+        with open(file_path, 'rb') as rpm_file:
+            rpm_file.seek(Download.RPM_LEAD_SIZE)
+            signature_intro = rpm_file.read(16)
+            if len(signature_intro) < 16 or signature_intro[:4] != Download.RPM_HEADER_MAGIC:
+                return None
+            index_count = int.from_bytes(signature_intro[8:12], 'big')
+            data_size = int.from_bytes(signature_intro[12:16], 'big')
+            signature_size = 16 + 16 * index_count + data_size
+            # signature header is padded to 8 bytes boundary
+            rpm_file.seek(Download.RPM_LEAD_SIZE + signature_size + (-signature_size % 8))
+            md5 = hashlib.md5()
+            for chunk in iter(lambda: rpm_file.read(1024 * 1024), b''):
+                md5.update(chunk)
+            return md5.hexdigest()
+
+    def _download_file(self, file_link, file_path=None, headers=None,
+                       checksum=None, expected_size=None):
+        """
+        Stream a file to disk in chunks
+            the transfer goes to a .part file, which is resumed with a
+            range request if the connection breaks, and is moved in place
+            once complete (and verified against koji payloadhash and size)
+        :return: tuple (file path, or '404' / '' on failure, transfer details: dict)
+        """
         if not file_path:
             file_path = self.sandbox_path + file_link.split('/')[-1]
-        try:
-            with open(file_path, 'wb') as f:
-                f.write(req.content)
-                return file_path
-        except:
-            return ''
+        part_path = file_path + '.part'
+        chunk_size = getattr(settings, 'DOWNLOAD_CHUNK_SIZE', 1024 * 1024)
+        attempts = getattr(settings, 'API_REQUEST_RETRIES', 3) + 1
+        transfer = OrderedDict([('bytes', 0), ('seconds', 0.0), ('resumes', 0)])
+        start_time = time.time()
+
+        attempt, retry_response = 0, None
+        while attempt < attempts:
+            if attempt:
+                # back off as API requests do, Retry-After of the host wins
+                time.sleep(RestHandle._retry_delay(attempt - 1, retry_response))
+            attempt += 1
+            retry_response = None
+            request_headers = dict(headers or {})
+            offset = os.path.getsize(part_path) if os.path.isfile(part_path) else 0
+            if offset:
+                request_headers['Range'] = 'bytes=%s-' % offset
+            try:
+                req = rate_limiters.limiter(file_link).call(
+                    http_sessions.get, file_link, headers=request_headers, stream=True,
+                    timeout=getattr(settings, 'API_REQUEST_TIMEOUT', (5, 60))
+                )
+                with req:
+                    if req.status_code == 404:
+                        return '404', transfer
+                    if req.status_code in (200, 206):
+                        # server may ignore range, and send it all again
+                        if req.status_code == 206:
+                            transfer['resumes'] += 1
+                        with open(part_path, 'ab' if req.status_code == 206 else 'wb') as f:
+                            for chunk in req.iter_content(chunk_size=chunk_size):
+                                f.write(chunk)
+                                transfer['bytes'] += len(chunk)
+                    elif not (req.status_code == 416 and offset):
+                        # 416 for a range past the end, .part file is complete
+                        transfer['error'] = 'HTTP %s' % req.status_code
+                        if 400 <= req.status_code < 500 and \
+                                req.status_code not in (408, 416, 429):
+                            # client errors do not go away on retry
+                            return '', transfer
+                        retry_response = req
+                        continue
+            except (requests.ConnectionError, requests.Timeout,
+                    requests.exceptions.ChunkedEncodingError) as e:
+                transfer['error'] = str(e)
+                continue
+            except Exception as e:
+                transfer['error'] = str(e)
+                return '', transfer
+
+            size = os.path.getsize(part_path) if os.path.isfile(part_path) else 0
+            if expected_size and size < expected_size:
+                continue
+            if (expected_size and size != expected_size) or \
+                    (checksum and self._rpm_payload_hash(part_path) != checksum):
+                # corrupt, start over
+                transfer['error'] = 'checksum verification failed'
+                os.remove(part_path)
+                continue
+            os.replace(part_path, file_path)
+            transfer.pop('error', None)
+            transfer['verified'] = bool(checksum or expected_size)
+            transfer['seconds'] = round(time.time() - start_time, 2)
+            return file_path, transfer
+        transfer['seconds'] = round(time.time() - start_time, 2)
+        return '', transfer
+
+    @staticmethod
+    def _transfer_summary(transfer):
+        megabytes = transfer.get('bytes', 0) / (1024.0 * 1024)
+        summary = '%.2f MiB in %s s (%.2f MiB/s)' % (
+            megabytes, transfer.get('seconds', 0),
+            megabytes / transfer['seconds'] if transfer.get('seconds') else 0.0)
+        if transfer.get('resumes'):
+            summary += ', resumed %s times' % transfer['resumes']
+        if transfer.get('verified'):
+            summary += ', checksum verified'
+        if transfer.get('error'):
+            summary += ', last error: %s' % transfer['error']
+        return summary
 
     def srpm(self, input, kwargs):
 
@@ -151,18 +263,23 @@ class Download(JobCommandBase):
                 self.api_resources.get_path_info(build=build_info),
                 self.api_resources.get_path_info(srpm=src_rpm)
             ).replace('/mnt/koji', pkgs_download_server_url)
-            srpm_downloaded_path = self._download_file(srpm_download_url)
+            srpm_downloaded_path, transfer = self._download_file(
+                srpm_download_url, checksum=src_rpm.get('payloadhash'),
+                expected_size=src_rpm.get('size')
+            )
             if srpm_downloaded_path == '404':
                 raise Exception('SRPM download failed. URL returns 404.')
             if srpm_downloaded_path:
                 task_log.update(self._log_task(
                     input['log_f'], task_subject,
-                    'Successfully downloaded from %s' % srpm_download_url
+                    'Successfully downloaded from %s, %s' % (
+                        srpm_download_url, self._transfer_summary(transfer))
                 ))
             else:
                 task_log.update(self._log_task(
                     input['log_f'], task_subject,
-                    'SRPM could not be downloaded from %s' % srpm_download_url
+                    'SRPM could not be downloaded from %s, %s' % (
+                        srpm_download_url, self._transfer_summary(transfer))
                 ))
             return {'srpm_path': srpm_downloaded_path}, {task_subject: task_log}
 
@@ -212,7 +329,7 @@ class Download(JobCommandBase):
                 headers['X-Auth-User'] = input['pkg_tp_auth_usr']
                 headers['X-Auth-Token'] = input['pkg_tp_auth_token']
             try:
-                platform_pot_path = self._download_file(
+                platform_pot_path, transfer = self._download_file(
                     platform_pot_url,
                     self.sandbox_path + 'platform.' + input.get('i18n_domain') + '.pot',
                     headers=headers
@@ -222,7 +339,7 @@ class Download(JobCommandBase):
                         input['package'] == input.get('i18n_domain'):
                     url_kwargs['domain'] = doc_prefix + input['pkg_upstream_name']
                     platform_pot_url = platform_pot_urls.get(input['pkg_tp_engine']).format(**url_kwargs)
-                    platform_pot_path = self._download_file(
+                    platform_pot_path, transfer = self._download_file(
                         platform_pot_url,
                         self.sandbox_path + 'platform.' + input.get('i18n_domain') + '.pot',
                         headers=headers
@@ -232,7 +349,7 @@ class Download(JobCommandBase):
                 while platform_pot_path == '404' and while_loop_counter < len(probable_versions):
                     url_kwargs['version'] = probable_versions[while_loop_counter]
                     platform_pot_url = platform_pot_urls.get(input['pkg_tp_engine']).format(**url_kwargs)
-                    platform_pot_path = self._download_file(
+                    platform_pot_path, transfer = self._download_file(
                         platform_pot_url,
                         self.sandbox_path + 'platform.' + input.get('i18n_domain') + '.pot',
                         headers=headers
@@ -251,7 +368,8 @@ class Download(JobCommandBase):
             else:
                 task_log.update(self._log_task(
                     input['log_f'], task_subject,
-                    'POT downloaded successfully. URL: %s' % platform_pot_url
+                    'POT downloaded successfully. URL: %s, %s' % (
+                        platform_pot_url, self._transfer_summary(transfer))
                 ))
         return {'platform_pot_path': platform_pot_path}, {task_subject: task_log}
 
@@ -791,7 +909,8 @@ class ActionMapper(BaseManager):
                  pkg_tp_auth_usr,
                  pkg_tp_auth_token,
                  pkg_tp_url,
-                 job_log_file):
+                 job_log_file,
+                 sandbox_path=None):
         super(ActionMapper, self).__init__()
         self.tasks = tasks_structure
         self.tag = build_tag
@@ -809,6 +928,7 @@ class ActionMapper(BaseManager):
         self.pkg_tp_auth_token = pkg_tp_auth_token
         self.pkg_tp_url = pkg_tp_url
         self.log_f = job_log_file
+        self.sandbox_path = sandbox_path
         self.cleanup_resources = {}
         self.__build = None
         self.__result = None
@@ -871,7 +991,8 @@ class ActionMapper(BaseManager):
             current_node.output, current_node.log = getattr(
                 eval(current_node.get_namespace()),
                 current_node.get_method(), self.skip
-            )(eval(current_node.get_namespace())(), current_node.input, current_node.kwargs)
+            )(eval(current_node.get_namespace())(self.sandbox_path),
+              current_node.input, current_node.kwargs)
 
             if current_node.log:
                 self.__log.update(current_node.log)
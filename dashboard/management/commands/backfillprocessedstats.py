@@ -0,0 +1,83 @@
+# Copyright 2019 Red Hat, Inc.
+# All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import json
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from dashboard.managers.packages import PackagesManager
+from dashboard.models import SyncStats
+
+
+class Command(BaseCommand):
+
+    help = 'Process raw stats of synced versions, which lack processed or locale stats.'
+
+    package_manager = PackagesManager()
+
+    def add_arguments(self, parser):
+
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Number of versions to process and save at a time.',
+        )
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Process all versions again, as after languages changed.',
+        )
+        parser.add_argument(
+            '--source', action='append',
+            help='Process versions of this stats source only, can be repeated.',
+        )
+
+    def handle(self, *args, **options):
+
+        sync_stats = SyncStats.objects.all()
+        if not options['all']:
+            sync_stats = sync_stats.filter(
+                Q(stats_processed_json_str__isnull=True) |
+                Q(stats_processed_json_str__in=['', '{}']) |
+                Q(locale_stats__isnull=True)
+            ).distinct()
+        if options.get('source'):
+            sync_stats = sync_stats.filter(source__in=options['source'])
+
+        lang_id_name = self.package_manager.get_lang_id_name_dict()
+        processed_count, last_sync_id = 0, 0
+        while True:
+            batch = list(sync_stats.filter(sync_id__gt=last_sync_id).order_by('sync_id').only(
+                'sync_id', 'package_name', 'project_version', 'source', 'stats_raw_json_str'
+            )[:options['batch_size']])
+            if not batch:
+                break
+            with transaction.atomic():
+                for version_stats in batch:
+                    stats_json = version_stats.stats_raw_json
+                    processed_stats = self.package_manager.process_stats_json(
+                        stats_json, version_stats.source, lang_id_name=lang_id_name
+                    )
+                    SyncStats.objects.filter(sync_id=version_stats.sync_id).update(
+                        stats_processed_json_str=json.dumps(processed_stats)
+                    )
+                    self.package_manager.syncstats_manager.save_locale_stats(
+                        version_stats, processed_stats, stats_json
+                    )
+            processed_count += len(batch)
+            last_sync_id = batch[-1].sync_id
+            self.stdout.write("%s versions processed" % processed_count)
+
+        self.stdout.write("Processed stats of %s versions saved" % processed_count)
@@ -0,0 +1,257 @@
+# Copyright 2019 Red Hat, Inc.
+# All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import time
+import threading
+
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.backends.signals import connection_created
+
+from dashboard.constants import TRANSPLATFORM_ENGINES, RELSTREAM_SLUGS
+from dashboard.managers.packages import PackagesManager
+from dashboard.models import (
+    CacheAPI, Language, Package, Platform, SyncStats
+)
+from dashboard.services.consume.cache import response_cache
+from dashboard.services.consume.ratelimit import rate_limiters
+from dashboard.services.consume.sessions import http_sessions
+from dashboard.services.standin import PlatformStandIn
+
+
+class QueryCounter(object):
+    """
+    Execute wrapper counting queries and writes, on all threads
+    """
+
+    WRITE_STATEMENTS = ('INSERT', 'UPDATE', 'DELETE')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.queries = 0
+        self.writes = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        with self._lock:
+            self.queries += 1
+            if sql.lstrip().upper().startswith(self.WRITE_STATEMENTS):
+                self.writes += 1
+        return execute(sql, params, many, context)
+
+    def install(self, sender, connection, **kwargs):
+        # connections of worker threads are created (again) while syncing
+        if self not in connection.execute_wrappers:
+            connection.execute_wrappers.append(self)
+
+
+class Command(BaseCommand):
+
+    help = 'Benchmark sync of translation statistics against a local platform stand-in.'
+
+    package_manager = PackagesManager()
+    PACKAGE_PREFIX = 'standin-'
+
+    platform_created = False
+    platform_limits = None
+    packages_created = ()
+
+    def add_arguments(self, parser):
+
+        parser.add_argument(
+            '--engine', default=TRANSPLATFORM_ENGINES[3], choices=TRANSPLATFORM_ENGINES,
+            help='Translation platform engine to stand in for.',
+        )
+        parser.add_argument(
+            '--packages', type=int, default=20,
+            help='Number of synthetic packages to sync.',
+        )
+        parser.add_argument(
+            '--passes', type=int, default=2,
+            help='Number of sync passes, first one runs with cold cache.',
+        )
+        parser.add_argument(
+            '--url',
+            help='Base URL of a running stand-in (runstandin), otherwise one is started.',
+        )
+        parser.add_argument(
+            '--latency', type=float, default=0.05,
+            help='Mean response delay of the stand-in in seconds.',
+        )
+        parser.add_argument(
+            '--error-rate', type=float, default=0.0,
+            help='Fraction of stand-in responses to be 429/503.',
+        )
+        parser.add_argument(
+            '--versions', type=int, default=2,
+            help='Number of versions per package.',
+        )
+        parser.add_argument(
+            '--rate-limit', type=float, default=0.0,
+            help='Requests per second allowed to the stand-in, 0 for no limit.',
+        )
+        parser.add_argument(
+            '--max-concurrency', type=int, default=8,
+            help='Max concurrent requests to the stand-in.',
+        )
+        parser.add_argument(
+            '--concurrency', type=int,
+            help='Number of packages to sync at a time, 1 for a serial sync.',
+        )
+        parser.add_argument(
+            '--processes', action='store_true',
+            help='Sync in worker processes, rather than threads '
+                 '(db writes of worker processes are not counted).',
+        )
+        parser.add_argument(
+            '--keep', action='store_true',
+            help='Keep synthetic platform, packages and stats in db.',
+        )
+        parser.add_argument(
+            '--use-registered', action='store_true',
+            help='Allow --url of a registered platform, its API cache is kept '
+                 'and its rate limits are restored afterwards.',
+        )
+
+    def _setup(self, engine, api_url, options):
+        platform, created = Platform.objects.get_or_create(
+            api_url=api_url, defaults=dict(
+                engine_name=engine, subject='stand-in', server_status=True,
+                platform_slug='STANDIN-%s-%s' % (engine.upper(), int(time.time()))
+            )
+        )
+        if not created and not options.get('use_registered'):
+            raise CommandError("%s is a registered platform, pass --use-registered "
+                               "to benchmark it." % api_url)
+        if not created and platform.engine_name != engine:
+            raise CommandError("%s is registered for %s" % (api_url, platform.engine_name))
+        self.platform_created = created
+        self.platform_limits = dict(api_rate_limit=platform.api_rate_limit,
+                                    api_max_concurrency=platform.api_max_concurrency)
+        Platform.objects.filter(pk=platform.pk).update(
+            api_rate_limit=options['rate_limit'], api_max_concurrency=options['max_concurrency']
+        )
+        rate_limiters.reset()
+
+        package_names = ['%s%s' % (self.PACKAGE_PREFIX, i) for i in range(options['packages'])]
+        existing_packages = set(Package.objects.filter(
+            package_name__in=package_names).values_list('package_name', flat=True))
+        self.packages_created = []
+        for package_name in package_names:
+            if package_name in existing_packages:
+                continue
+            if not self.package_manager.add_package(
+                    package_name=package_name, transplatform_slug=platform.platform_slug,
+                    upstream_url='https://standin.transtats.local/' + package_name,
+                    release_streams=[RELSTREAM_SLUGS[1]]):
+                self._cleanup(platform, package_names)
+                raise CommandError("Package %s could not be added." % package_name)
+            self.packages_created.append(package_name)
+        return platform, package_names
+
+    def _restore_limits(self, platform):
+        Platform.objects.filter(pk=platform.pk).update(**self.platform_limits)
+        rate_limiters.reset()
+
+    def _cleanup(self, platform, package_names):
+        # only what the benchmark created is deleted
+        created_packages = [package_name for package_name in package_names
+                            if package_name in self.packages_created]
+        SyncStats.objects.filter(package_name__in=created_packages).delete()
+        Package.objects.filter(package_name__in=created_packages).delete()
+        if self.platform_created:
+            CacheAPI.objects.filter(base_url=platform.api_url).delete()
+            platform.delete()
+        else:
+            self._restore_limits(platform)
+        response_cache.invalidate()
+
+    def _sync(self, package_names, options):
+        sync_counts = Counter()
+        self.package_manager.sync_packages_with_platform(
+            Package.objects.filter(package_name__in=package_names),
+            concurrency=options['concurrency'], use_processes=options['processes'],
+            sync_counts=sync_counts
+        )
+        return sync_counts
+
+    @staticmethod
+    def _requests_sent(standin, host):
+        # stand-in counts requests of worker processes too
+        if standin:
+            return standin.stats()['requests']
+        return http_sessions.stats().get(host, {}).get('requests', 0)
+
+    def handle(self, *args, **options):
+
+        engine = options['engine']
+        standin = None
+        api_url = options.get('url')
+        if not api_url:
+            locales = list(Language.objects.filter(
+                lang_status=True).values_list('locale_id', flat=True)) or 10
+            standin = PlatformStandIn(
+                latency=options['latency'], error_rate=options['error_rate'],
+                locales=locales, versions=options['versions'], modules=options['packages'],
+                package_prefix=self.PACKAGE_PREFIX
+            )
+            api_url = standin.start()
+        api_url = api_url.rstrip('/')
+        host = http_sessions.host_key(api_url)
+
+        try:
+            platform, package_names = self._setup(engine, api_url, options)
+        except CommandError:
+            if standin:
+                standin.stop()
+            raise
+        self.stdout.write("Syncing %s %s packages against %s" % (len(package_names), engine, api_url))
+        if self.platform_created:
+            # first pass goes to the stand-in for every stats request
+            CacheAPI.objects.filter(base_url=api_url).delete()
+        else:
+            self.stdout.write("API cache of the registered platform is kept, first pass may hit it.")
+        response_cache.invalidate()
+
+        counter = QueryCounter()
+        connection_created.connect(counter.install)
+        try:
+            with connection.execute_wrapper(counter):
+                for sync_pass in range(1, options['passes'] + 1):
+                    requests_before = self._requests_sent(standin, host)
+                    queries_before, writes_before = counter.queries, counter.writes
+                    start_time = time.time()
+                    sync_counts = self._sync(package_names, options)
+                    wall_time = time.time() - start_time
+                    sent_requests = self._requests_sent(standin, host) - requests_before
+                    self.stdout.write(
+                        "pass %s: %.2f s wall, %s requests (%.1f req/s), "
+                        "%s db writes of %s queries, versions %s changed %s unchanged" % (
+                            sync_pass, wall_time, sent_requests,
+                            sent_requests / wall_time if wall_time else 0.0,
+                            counter.writes - writes_before, counter.queries - queries_before,
+                            sync_counts['changed'], sync_counts['unchanged']))
+        finally:
+            connection_created.disconnect(counter.install)
+            if standin:
+                self.stdout.write("Stand-in served: %s" % ", ".join(
+                    "%s %s" % (served, count) for served, count in standin.stats().items()))
+            if not options['keep']:
+                self._cleanup(platform, package_names)
+            elif not self.platform_created:
+                self._restore_limits(platform)
+            if standin:
+                standin.stop()
@@ -0,0 +1,103 @@
+# Copyright 2019 Red Hat, Inc.
+# All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand, CommandError
+
+from dashboard.converters.xml2dict import parse
+from dashboard.services.consume.streaming import stream_xml_items
+
+
+class Command(BaseCommand):
+
+    help = 'Benchmark full vs streaming parse of a DamnedLies release stats document.'
+
+    @staticmethod
+    def _synthetic_document(modules, categories):
+        domain = '<domain id="{0}"><translated>{1}</translated>' \
+                 '<fuzzy>{2}</fuzzy><untranslated>{3}</untranslated></domain>'
+        xml_parts = ['<stats>']
+        for category in range(categories):
+            xml_parts.append('<category id="category-%s">' % category)
+            for module in range(category, modules, categories):
+                xml_parts.append('<module id="module-%s">' % module)
+                xml_parts.append(domain.format('po', module % 500, module % 7, module % 90))
+                xml_parts.append(domain.format('help', module % 900, module % 11, module % 120))
+                xml_parts.append('</module>')
+            xml_parts.append('</category>')
+        xml_parts.append('</stats>')
+        return ''.join(xml_parts)
+
+    @staticmethod
+    def _measure(func):
+        tracemalloc.start()
+        start_time = time.time()
+        result = func()
+        wall_time = time.time() - start_time
+        peak_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return result, wall_time, peak_memory
+
+    def add_arguments(self, parser):
+
+        parser.add_argument(
+            '--file',
+            help='Release stats XML document, synthetic one is used otherwise.',
+        )
+
+        parser.add_argument(
+            '--modules', type=int, default=5000,
+            help='Number of modules in synthetic document.',
+        )
+
+        parser.add_argument(
+            '--tracked', type=int, default=50,
+            help='Number of modules to keep.',
+        )
+
+    def handle(self, *args, **options):
+
+        if options.get('file'):
+            try:
+                with open(options['file']) as xml_file:
+                    xml_content = xml_file.read()
+            except IOError as e:
+                raise CommandError(str(e))
+        else:
+            xml_content = self._synthetic_document(options['modules'], 20)
+
+        all_modules = [module['@id'] for module in stream_xml_items(xml_content, 3)]
+        tracked_modules = set(all_modules[::max(len(all_modules) // max(options['tracked'], 1), 1)])
+
+        def _full_parse():
+            json_content = parse(xml_content)
+            categories = json_content['stats']['category'] or []
+            return [module for category in categories
+                    for module in (category.get('module') or [])
+                    if isinstance(module, dict) and module.get('@id') in tracked_modules]
+
+        def _streaming_parse():
+            return stream_xml_items(
+                xml_content, 3, item_filter=lambda attrs, item: attrs.get('id') in tracked_modules
+            )
+
+        self.stdout.write("Document: %s KiB, %s modules, %s tracked" % (
+            len(xml_content) // 1024, len(all_modules), len(tracked_modules)))
+        for label, func in (('full parse', _full_parse), ('streaming', _streaming_parse)):
+            modules, wall_time, peak_memory = self._measure(func)
+            self.stdout.write("%-12s %6s modules kept  %8.3f s  peak %8.1f KiB" % (
+                label, len(modules), wall_time, peak_memory / 1024.0))
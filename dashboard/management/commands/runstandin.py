@@ -0,0 +1,89 @@
+# Copyright 2019 Red Hat, Inc.
+# All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+from django.core.management.base import BaseCommand, CommandError
+
+from dashboard.services.standin import PlatformStandIn
+
+
+class Command(BaseCommand):
+
+    help = 'Serve a local stand-in of translation platforms and koji hub, ' \
+           'or record responses of real ones into fixtures.'
+
+    def add_arguments(self, parser):
+
+        parser.add_argument('--host', default='127.0.0.1', help='Interface to listen on.')
+        parser.add_argument('--port', type=int, default=8808, help='Port to listen on.')
+        parser.add_argument(
+            '--latency', type=float, default=0.0,
+            help='Mean response delay in seconds.',
+        )
+        parser.add_argument(
+            '--jitter', type=float, default=0.2,
+            help='Deviation of response delay, fraction of latency.',
+        )
+        parser.add_argument(
+            '--error-rate', type=float, default=0.0,
+            help='Fraction of requests to answer with 429/503.',
+        )
+        parser.add_argument(
+            '--locales', type=int, default=10,
+            help='Number of locales in synthetic stats.',
+        )
+        parser.add_argument(
+            '--versions', type=int, default=2,
+            help='Number of versions per synthetic project.',
+        )
+        parser.add_argument(
+            '--modules', type=int, default=100,
+            help='Number of synthetic projects (modules).',
+        )
+        parser.add_argument(
+            '--fixtures',
+            help='Directory of recorded responses, to replay or record into.',
+        )
+        parser.add_argument(
+            '--record',
+            help='Platform server URL to proxy requests to and record responses of.',
+        )
+        parser.add_argument(
+            '--record-koji',
+            help='Koji hub URL to proxy XML-RPC calls to and record responses of.',
+        )
+
+    def handle(self, *args, **options):
+
+        try:
+            standin = PlatformStandIn(
+                host=options['host'], port=options['port'], latency=options['latency'],
+                jitter=options['jitter'], error_rate=options['error_rate'],
+                locales=options['locales'], versions=options['versions'],
+                modules=options['modules'], fixtures_dir=options.get('fixtures'),
+                record_url=options.get('record'), record_koji_url=options.get('record_koji')
+            )
+        except (ValueError, OSError) as e:
+            raise CommandError(str(e))
+
+        self.stdout.write("Platforms stand-in at %s, koji hub at %s" % (
+            standin.url, standin.koji_url))
+        try:
+            standin.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            standin.stop()
+            self.stdout.write("Served: %s" % ", ".join(
+                "%s %s" % (counter, count) for counter, count in standin.stats().items()))
@@ -13,25 +13,23 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
-import os
-import shutil
-import time
-import threading
-import yaml
-
-from datetime import timedelta
+from collections import Counter
+from functools import partial
 
 from django.core.management.base import BaseCommand, CommandError
 from django.utils import timezone
 
-from dashboard.constants import TS_JOB_TYPES, BRANCH_MAPPING_KEYS
+from dashboard.constants import (
+    TS_JOB_TYPES
+)
 from dashboard.managers.packages import PackagesManager
 from dashboard.managers.graphs import (
     GraphManager, ReportsManager, GeoLocationManager
 )
 from dashboard.managers.jobs import (
-    JobTemplateManager, YMLBasedJobManager
+    JobTemplateManager, DownstreamSyncManager
 )
+from dashboard.services.consume.report import consume_stats_summary
 
 
 class Command(BaseCommand):
@@ -44,24 +42,27 @@ class Command(BaseCommand):
     job_template_manager = JobTemplateManager()
     location_manager = GeoLocationManager()
 
-    def _sync_package(self, pkg):
-        self.package_manager.sync_update_package_stats(pkg)
+    def sync_with_platform(self, concurrency=None, use_processes=None):
 
-    def sync_with_platform(self):
+        sync_started = timezone.now()
+        due_packages = self.package_manager.claim_packages_due_for_sync()
+        sync_counts = Counter()
+        sync_status = self.package_manager.sync_packages_with_platform(
+            due_packages, concurrency=concurrency, use_processes=use_processes,
+            sync_counts=sync_counts
+        )
+        self.stdout.write("%s packages synced with translation platform, %s updated" % (
+            len(sync_status), len([status for status in sync_status.values() if status])))
+        self.stdout.write("Versions: %s changed, %s unchanged, %s failed" % (
+            sync_counts['changed'], sync_counts['unchanged'], sync_counts['failed']))
 
-        all_packages = self.package_manager.get_packages().filter(
-            platform_last_updated__lte=timezone.now() - timedelta(hours=6)
-        ).order_by('platform_url')
-        for package in all_packages:
-            th = threading.Thread(
-                target=self._sync_package, args=(package.package_name, )
-            )
-            th.start()
-            th.join()
-            time.sleep(2)
+        for log_level, message in consume_stats_summary(since=sync_started):
+            self.stdout.write(message)
 
-        self.reports_manager.analyse_releases_status()
-        self.reports_manager.analyse_packages_status()
+        # summaries are built upon stats, nothing to do if none changed
+        if sync_counts['changed']:
+            self.reports_manager.analyse_releases_status()
+            self.reports_manager.analyse_packages_status()
 
     def _update_diff(self, package):
         try:
@@ -76,74 +77,18 @@ class Command(BaseCommand):
             # pass for now
             pass
 
-    def _sync_build_system(self, template, params):
-
-        if self.package_manager.is_package_build_latest(params):
-            return
-
-        t_params = template.job_template_params
-        if len(t_params) == len(params):
-            job_data = {field.upper(): param
-                        for field, param in zip(t_params, params)}
-            job_data.update({
-                'YML_FILE': yaml.dump(template.job_template_json,
-                                      default_flow_style=False).replace("\'", "")
-            })
-            job_data.update({'SCRATCH': True})
-
-            temp_path = 'false/{0}/'.format('-'.join(params))
-            job_manager = YMLBasedJobManager(
-                **job_data, **{'params': [p.upper() for p in t_params],
-                               'type': TS_JOB_TYPES[3]},
-                **{'active_user_email': 'system@transtats.org'},
-                **{'sandbox_path': temp_path},
-                **{'job_log_file': temp_path + '.log'}
-            )
+    def sync_with_build_system(self, concurrency=None):
 
-            try:
-                if os.path.isdir(temp_path):
-                    shutil.rmtree(temp_path)
-                os.mkdir(temp_path)
-                job_manager.execute_job()
-            except Exception as e:
-                # pass for now
-                pass
-            finally:
-                os.rmdir(temp_path)
-
-    def sync_with_build_system(self):
-
-        job_template = None
-        all_packages = self.package_manager.get_packages().filter(
-            release_branch_mapping__isnull=False
-        )
-        job_templates = self.job_template_manager.get_job_templates(
-            job_template_type=TS_JOB_TYPES[3]
-        )
-        if job_templates:
-            job_template = job_templates.first()
-
-        if all_packages and job_template:
-            for package in all_packages:
-                candidates = []
-                mapping = package.release_branch_mapping_json or {}
-
-                for release, map_dict in mapping.items():
-                    candidates.append((
-                        package.package_name,
-                        map_dict.get(BRANCH_MAPPING_KEYS[1]),
-                        map_dict.get(BRANCH_MAPPING_KEYS[2])
-                    ))
-
-                for candidate in candidates:
-                    th = threading.Thread(
-                        target=self._sync_build_system,
-                        args=(job_template, candidate,)
-                    )
-                    th.start()
-                    th.join()
-                    time.sleep(5)
+        if self.job_template_manager.get_job_templates(job_template_type=TS_JOB_TYPES[3]):
+            # candidates of releases in crunch go first
+            candidates, package_names = \
+                self.package_manager.get_build_system_sync_candidates()
+            sync_status = DownstreamSyncManager().run(candidates, concurrency=concurrency)
+            self.stdout.write("%s build system candidates synced, %s failed" % (
+                len(sync_status), len([status for status in sync_status.values() if not status])))
 
+            for package in self.package_manager.get_packages(pkgs=package_names) \
+                    if package_names else []:
                 self._update_diff(package)
 
         self.reports_manager.analyse_packages_status()
@@ -165,8 +110,34 @@ class Command(BaseCommand):
             help='Sync packages with build system only.',
         )
 
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            help='Number of packages to sync with translation platform at a time.',
+        )
+
+        parser.add_argument(
+            '--processes',
+            action='store_true',
+            help='Sync with translation platform in worker processes, rather than threads.',
+        )
+
+        parser.add_argument(
+            '--build-system-concurrency',
+            type=int,
+            help='Number of build system jobs to run at a time, each in a process of its own.',
+        )
+
     def handle(self, *args, **options):
 
+        sync_with_platform = partial(
+            self.sync_with_platform, concurrency=options.get('concurrency'),
+            use_processes=options.get('processes') or None
+        )
+        sync_with_build_system = partial(
+            self.sync_with_build_system, concurrency=options.get('build_system_concurrency')
+        )
+
         cmd_combinations_options = [
             'platform',
             'build_system',
@@ -174,10 +145,10 @@ class Command(BaseCommand):
         ]
 
         cmd_combinations = {
-            cmd_combinations_options[0]: self.sync_with_platform,
-            cmd_combinations_options[1]: self.sync_with_build_system,
-            cmd_combinations_options[2]: [self.sync_with_platform,
-                                          self.sync_with_build_system]
+            cmd_combinations_options[0]: sync_with_platform,
+            cmd_combinations_options[1]: sync_with_build_system,
+            cmd_combinations_options[2]: [sync_with_platform,
+                                          sync_with_build_system]
         }
 
         if options.get(cmd_combinations_options[0]):
@@ -19,13 +19,14 @@
 import json
 import functools
 from operator import add, itemgetter
-from collections import Counter, OrderedDict
+from collections import OrderedDict
 
 # third-party
 from langtable import langtable
 from slugify import slugify
 
 # django
+from django.db.models import Sum
 from django.utils import timezone
 
 # dashboard
@@ -33,7 +34,7 @@ from dashboard.constants import (
     RELSTREAM_SLUGS, WORKLOAD_HEADERS, BRANCH_MAPPING_KEYS
 )
 from dashboard.managers import BaseManager
-from dashboard.managers.inventory import ReleaseBranchManager
+from dashboard.managers.inventory import ReleaseBranchManager, locale_resolver
 from dashboard.managers.packages import PackagesManager, PackageBranchMapping
 from dashboard.managers.utilities import COUNTRY_CODE_3to2_LETTERS
 from dashboard.models import GraphRule, Report
@@ -203,18 +204,16 @@ class GraphManager(BaseManager):
         stats_for_graphs_dict['ticks'] = \
             [[i, lang] for i, lang in enumerate(locale_sequence.values(), 0)]
         indexes = [index for index, lang in stats_for_graphs_dict['ticks']]
+        locale_indexes = {locale_resolver.resolve(locale) or locale: i
+                          for i, (locale, alias) in enumerate(locale_sequence, 0)}
 
         graph_data_dict = {}
         for version, stats_lists in stats_dict.items():
             new_stats_list = []
             for stats_tuple in stats_lists:
-                index = [i for i, locale_tuple in enumerate(list(locale_sequence), 0)
-                         if (stats_tuple[0] in locale_tuple) or
-                         (stats_tuple[0].replace('-', '_') in locale_tuple) or
-                         (stats_tuple[0].replace('_', '-') in locale_tuple)]
-                if index:
-                    index.append(stats_tuple[1] or 0.0)
-                    new_stats_list.append(index)
+                index = locale_indexes.get(locale_resolver.resolve(stats_tuple[0]))
+                if index is not None:
+                    new_stats_list.append([index, stats_tuple[1] or 0.0])
                 if prepend_source:
                     if stats_tuple[0] == 'source' and stats_tuple[1] not in version.lower():
                         version = "{0} - {1}".format(stats_tuple[1], version)
@@ -355,46 +354,48 @@ class GraphManager(BaseManager):
         )
         return self._format_data_for_pie_chart(consolidated_stats, locale_lang_tuple)
 
-    def _process_workload_combined_view(self, packages_stats_dict, headers):
-        stats_summary_dict = OrderedDict()
-        for package, locale_stats in packages_stats_dict.items():
-            reduced_stats = {}
-            try:
-                reduced_stats = functools.reduce(
-                    lambda x, y: dict(Counter(x) + Counter(y)), list(locale_stats.values())
-                )
-            except Exception as e:
-                # log error, pass for now
-                pass
-            if not reduced_stats:
-                for field in headers:
-                    reduced_stats[field] = 0
-            try:
-                if not reduced_stats.get('Untranslated'):
-                    reduced_stats['Untranslated'] = 0
-                reduced_stats[headers[3]] = \
-                    (reduced_stats['Untranslated'] /
-                     reduced_stats.get('Total', 0) * 100)
-            except ZeroDivisionError:
-                # log error, pass for now
-                pass
-            stats_summary_dict[package] = reduced_stats
-        return stats_summary_dict
+    @staticmethod
+    def _workload_stats(total=0, translated=0, untranslated=0):
+        remaining = 0
+        try:
+            remaining = (untranslated / total) * 100
+        except ZeroDivisionError:
+            # log error, pass for now
+            pass
+        return {'Total': total, 'Translated': translated,
+                'Untranslated': untranslated, 'Remaining': round(remaining, 2)}
+
+    def _get_release_workload(self, release_branch, group_by, locales=None):
+        """
+        Sum up locale stats of packages of a release branch in db
+        :param release_branch: str
+        :param group_by: fields of LocaleStats to group by
+        :param locales: locales to sum up, None for release branch locales
+        :return: names of packages having synced stats, list of summed stats dicts
+        """
+        locale_stats, packages = self.package_manager.get_release_locale_stats(release_branch)
+        if locales is None:
+            # releases without a language set have stats of all locales summed up
+            locales = self.package_manager.get_relbranch_locales(release_branch) or None
+        if locales is not None:
+            locale_stats = locale_stats.filter(locale__in=locales)
+        return packages, locale_stats.values(*group_by).annotate(
+            total_sum=Sum('total'), translated_sum=Sum('translated'),
+            untranslated_sum=Sum('untranslated')
+        ).order_by()
 
     def get_workload_estimate(self, release_branch, locale=None):
         """
         Build list of packages with translation workload for a given branch
         """
         headers = WORKLOAD_HEADERS
-        pkg_stats = self.package_manager.get_release_specific_package_stats(
-            release_branch=release_branch)
-
-        required_stats_dict = {}
-        if not locale:
-            required_stats_dict = self._process_workload_combined_view(pkg_stats, headers)
-        elif isinstance(locale, str):
-            for pkg, locale_stat in pkg_stats.items():
-                required_stats_dict[pkg] = locale_stat.get(locale) or {header: 0 for header in headers}
+        packages, workload = self._get_release_workload(
+            release_branch, ['package_name'], locales=[locale] if isinstance(locale, str) else None
+        )
+        required_stats_dict = {package: self._workload_stats() for package in packages}
+        for stats in workload:
+            required_stats_dict[stats['package_name']] = self._workload_stats(
+                stats['total_sum'], stats['translated_sum'], stats['untranslated_sum'])
         return headers, OrderedDict(sorted(
             required_stats_dict.items(), key=lambda x: x[1]['Remaining'], reverse=True
         ))
@@ -438,10 +439,22 @@ class GraphManager(BaseManager):
         locale_lang_tuple = self.package_manager.get_locale_lang_tuple(
             locales=self.package_manager.get_relbranch_locales(release_branch)
         )
+        packages, workload = self._get_release_workload(
+            release_branch, ['locale', 'package_name'],
+            locales=[locale for locale, lang in locale_lang_tuple]
+        )
+        locale_workload = {locale: {package: self._workload_stats() for package in packages}
+                           for locale, lang in locale_lang_tuple}
+        for stats in workload:
+            if stats['locale'] not in locale_workload:
+                continue
+            locale_workload[stats['locale']][stats['package_name']] = self._workload_stats(
+                stats['total_sum'], stats['translated_sum'], stats['untranslated_sum'])
         workload_combined_detailed = {}
         for locale, lang in locale_lang_tuple:
-            workload_combined_detailed[lang] = \
-                self.get_workload_estimate(release_branch, locale=locale)[1]
+            workload_combined_detailed[lang] = OrderedDict(sorted(
+                locale_workload[locale].items(), key=lambda x: x[1]['Remaining'], reverse=True
+            ))
         return workload_combined_detailed
 
     def get_threshold_based(self, release_branch, threshold=70):
@@ -539,32 +552,21 @@ class ReportsManager(GraphManager):
                 relbranch_report[branch_name]['packages_need_attention'] = packages_need_attention
                 total_untranslated_msgs = (functools.reduce((lambda x, y: x + y), untranslated_messages)) or 0
                 relbranch_report[branch_name]['total_untranslated_msgs'] = total_untranslated_msgs
-                lang_stats_report = self._filter_disabled_languages(
-                    self.get_workload_combined_detailed(branch_slug)
+                locale_lang_dict = dict(self.package_manager.get_locale_lang_tuple(
+                    locales=self.package_manager.get_relbranch_locales(branch_slug)
+                ))
+                lang_stats = {lang: (0, 0, 0) for lang in locale_lang_dict.values()}
+                packages, workload = self._get_release_workload(
+                    branch_slug, ['locale'], locales=list(locale_lang_dict)
                 )
-                relbranch_report[branch_name]['languages'] = {}
-                for lang, pkg_stats in lang_stats_report.items():
-                    untranslated_msgs = []
-                    untranslated_msgs.extend(
-                        [stats.get('Untranslated') for pkg, stats in pkg_stats.items()]
-                    )
-                    total_untranslated_msgs = (functools.reduce((lambda x, y: x + y), untranslated_msgs)) or 0
-
-                    translated_msgs = []
-                    translated_msgs.extend(
-                        [stats.get('Translated') for pkg, stats in pkg_stats.items()]
-                    )
-                    total_translated_msgs = (functools.reduce((lambda x, y: x + y), translated_msgs)) or 0
-
-                    msgs = []
-                    msgs.extend(
-                        [stats.get('Total') for pkg, stats in pkg_stats.items()]
-                    )
-                    total_msgs = (functools.reduce((lambda x, y: x + y), msgs)) or 0
+                for stats in workload:
+                    if stats['locale'] not in locale_lang_dict:
+                        continue
                     # 0: untranslated, 1: translated, 2: total
-                    relbranch_report[branch_name]['languages'][lang] = (total_untranslated_msgs,
-                                                                        total_translated_msgs,
-                                                                        total_msgs)
+                    lang_stats[locale_lang_dict[stats['locale']]] = (
+                        stats['untranslated_sum'], stats['translated_sum'], stats['total_sum']
+                    )
+                relbranch_report[branch_name]['languages'] = self._filter_disabled_languages(lang_stats)
         if self.create_or_update_report(**{
             'subject': 'releases', 'report_json': relbranch_report
         }):
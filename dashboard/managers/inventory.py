@@ -22,8 +22,12 @@
 # python
 import io
 import json
+import time
+import hashlib
+import threading
 from uuid import uuid4
 from collections import OrderedDict
+from datetime import datetime
 
 # third party
 import requests
@@ -31,21 +35,111 @@ from slugify import slugify
 
 # django
 from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.utils import timezone
 
 # dashboard
 from dashboard.managers import BaseManager
 from dashboard.models import (
-    Platform, Language, LanguageSet, Product, Release, SyncStats
+    Platform, Language, LanguageSet, LocaleStats, Product, Release, SyncStats
 )
 from dashboard.constants import (
     TRANSPLATFORM_ENGINES, ZANATA_SLUGS, DAMNEDLIES_SLUGS,
-    TRANSIFEX_SLUGS, RELSTREAM_SLUGS, WEBLATE_SLUGS, BUILD_SYSTEMS
+    TRANSIFEX_SLUGS, RELSTREAM_SLUGS, WEBLATE_SLUGS, BUILD_SYSTEMS, SYNC_PRIORITIES
 )
 from dashboard.managers.utilities import parse_ical_file
 
 
-__all__ = ['InventoryManager', 'SyncStatsManager', 'ReleaseBranchManager']
+__all__ = ['LocaleResolver', 'locale_resolver', 'InventoryManager',
+           'SyncStatsManager', 'ReleaseBranchManager']
+
+
+class LocaleResolver(object):
+    """
+    Resolve spellings of a locale to locale_id of its Language
+        index of locale ids, aliases and their separator and case
+        variants is built from Language rows once. It is rebuilt when
+        languages change: in this process by signals, in others when
+        the version shared in cache changes, checked every
+        LOCALE_RESOLVER_CHECK seconds.
+    """
+
+    VERSION_KEY = 'transtats:locales:version'
+
+    def __init__(self, check_after=None):
+        self.check_after = check_after or getattr(settings, 'LOCALE_RESOLVER_CHECK', 60)
+        self._lock = threading.Lock()
+        self._index = None
+        self._version = None
+        self._checked_at = 0.0
+
+    @staticmethod
+    def _build_index():
+        languages = list(Language.objects.values_list('locale_id', 'locale_alias'))
+        spellings = [(locale, locale) for locale, alias in languages] + \
+            [(alias, locale) for locale, alias in languages if alias]
+        index = {}
+        # exact spellings take precedence over variants, locale ids over aliases
+        for variant in (lambda code: code,
+                        lambda code: code.replace('-', '_'),
+                        lambda code: code.replace('_', '-'),
+                        lambda code: code.lower(),
+                        lambda code: code.replace('-', '_').lower(),
+                        lambda code: code.replace('_', '-').lower()):
+            for code, locale in spellings:
+                index.setdefault(variant(code), locale)
+        return index
+
+    def _shared_version(self):
+        try:
+            return cache.get(self.VERSION_KEY)
+        except Exception:
+            return self._version
+
+    def _get_index(self):
+        with self._lock:
+            now = time.monotonic()
+            if self._index is not None and now - self._checked_at < self.check_after:
+                return self._index
+            version = self._shared_version()
+            if self._index is None or version != self._version:
+                self._index = self._build_index()
+                self._version = version
+            self._checked_at = now
+            return self._index
+
+    def resolve(self, code):
+        """
+        Resolve a locale code, as spelled by platforms or build systems
+        :param code: str
+        :return: locale_id or None
+        """
+        if not code or not isinstance(code, str):
+            return None
+        index = self._get_index()
+        return index.get(code) or index.get(code.lower())
+
+    def invalidate(self):
+        """
+        Drop index of this process, and of others by new shared version
+        """
+        with self._lock:
+            self._index = None
+        try:
+            cache.set(self.VERSION_KEY, uuid4().hex, None)
+        except Exception:
+            pass
+
+
+locale_resolver = LocaleResolver()
+
+
+@receiver([post_save, post_delete], sender=Language)
+def invalidate_locale_resolver(sender, **kwargs):
+    locale_resolver.invalidate()
 
 
 class InventoryManager(BaseManager):
@@ -396,12 +490,24 @@ class SyncStatsManager(BaseManager):
         :return: stats list, missing locales tuple
         """
         trans_stats = []
-        missing_locales = []
+        found_locales = set()
 
         locale_key = 'locale'
         if source == TRANSPLATFORM_ENGINES[3]:
             locale_key = 'code'
 
+        required_locales = {locale_resolver.resolve(locale_tuple[0]) or locale_tuple[0]: locale_tuple
+                            for locale_tuple in locales}
+
+        def _filter_stats_list(stats_list, wanted_locales):
+            # single pass over the stats, whatever the number of locales
+            for stats_param in stats_list:
+                locale = locale_resolver.resolve(stats_param.get(locale_key, ''))
+                if locale in wanted_locales:
+                    stats_param['source'] = source
+                    trans_stats.append(stats_param)
+                    found_locales.add(wanted_locales[locale])
+
         t_platform_group = []
         t_platform_group.extend(ZANATA_SLUGS)
         t_platform_group.extend(DAMNEDLIES_SLUGS)
@@ -410,37 +516,22 @@ class SyncStatsManager(BaseManager):
         if transplatform_slug in t_platform_group:
             if not stats_json.get('stats'):
                 return trans_stats, ()
-            for stats_param in stats_json['stats']:
-                stats_param_locale = stats_param.get(locale_key, '')
-                for locale_tuple in locales:
-                    if (stats_param_locale in locale_tuple) or \
-                            (stats_param_locale.replace('-', '_') in locale_tuple) or \
-                            (stats_param_locale.replace('_', '-') in locale_tuple):
-                        stats_param['source'] = source
-                        trans_stats.append(stats_param)
-                    else:
-                        missing_locales.append(locale_tuple)
+            _filter_stats_list(stats_json['stats'], required_locales)
 
         elif transplatform_slug in TRANSIFEX_SLUGS:
             for locale_tuple in locales:
                 if stats_json.get(locale_tuple[0]):
                     trans_stats.append({locale_tuple[0]: stats_json[locale_tuple[0]]})
-                    missing_locales.append(locale_tuple)
-                elif stats_json.get(locale_tuple[1]):
+                    found_locales.add(locale_tuple)
+                elif locale_tuple[1] and stats_json.get(locale_tuple[1]):
                     trans_stats.append({locale_tuple[1]: stats_json[locale_tuple[1]]})
-                    missing_locales.append(locale_tuple)
-                elif stats_json.get('stats'):
-                    for stats_param in stats_json['stats']:
-                        stats_param_locale = stats_param.get(locale_key, '')
-                        for locale_tuple in locales:
-                            if (stats_param_locale in locale_tuple) or \
-                                    (stats_param_locale.replace('-', '_') in locale_tuple):
-                                stats_param['source'] = source
-                                trans_stats.append(stats_param)
-                            else:
-                                missing_locales.append(locale_tuple)
-
-        return trans_stats, tuple(set(locales) - set(missing_locales))
+                    found_locales.add(locale_tuple)
+            if len(found_locales) < len(locales) and stats_json.get('stats'):
+                _filter_stats_list(stats_json['stats'], {
+                    locale: locale_tuple for locale, locale_tuple in required_locales.items()
+                    if locale_tuple not in found_locales})
+
+        return trans_stats, tuple(set(locales) - found_locales)
 
     def extract_locale_translated(self, transplatform_slug, stats_dict_list, source):
         """
@@ -474,7 +565,41 @@ class SyncStatsManager(BaseManager):
         locale_translated.append(['source', source])
         return locale_translated
 
-    def save_version_stats(self, project, version, stats_json, stats_source, p_stats=None):
+    @staticmethod
+    def stats_fingerprint(stats_json, *context):
+        """
+        Fingerprint translation stats, along with what they are processed upon
+        :param stats_json: translation stats dict
+        :param context: e.g. locales the stats are processed for
+        :return: sha1 hex digest
+        """
+        return hashlib.sha1(json.dumps(
+            [stats_json, context], sort_keys=True, default=str
+        ).encode('utf-8')).hexdigest()
+
+    def get_stats_fingerprints(self, packages, stats_source):
+        """
+        Fetch fingerprints of saved version stats
+        :param packages: package names list
+        :param stats_source: platform engine or build system
+        :return: dict {(package_name, version): fingerprint}
+        """
+        fingerprints = {}
+        try:
+            fingerprints = {
+                (package_name, version): fingerprint
+                for package_name, version, fingerprint in SyncStats.objects.filter(
+                    package_name__in=packages, source=stats_source,
+                    stats_fingerprint__isnull=False
+                ).values_list('package_name', 'project_version', 'stats_fingerprint')
+            }
+        except Exception as e:
+            self.app_logger(
+                'ERROR', "Stats fingerprints could not be fetched, details: " + str(e))
+        return fingerprints
+
+    def save_version_stats(self, project, version, stats_json, stats_source,
+                           p_stats=None, fingerprint=None):
         """
         Save version's translation stats in db
         :param project: transplatform project
@@ -482,6 +607,7 @@ class SyncStatsManager(BaseManager):
         :param stats_json: translation stats dict
         :param stats_source: platform engine or build system
         :param p_stats: processed stats dict
+        :param fingerprint: stats_fingerprint of stats_json
         :return: boolean
         """
 
@@ -489,27 +615,32 @@ class SyncStatsManager(BaseManager):
                              project_version=version,
                              source=stats_source)
         try:
-            existing_sync_stat = SyncStats.objects.filter(**filter_kwargs).first()
-            sync_uuid = uuid4()
-            if not existing_sync_stat:
-                params = {}
-                params.update(dict(package_name=project))
-                params.update(dict(job_uuid=sync_uuid))
-                params.update(dict(project_version=version))
-                params.update(dict(source=stats_source))
-                params.update(dict(stats_raw_json_str=json.dumps(stats_json)))
-                if isinstance(p_stats, dict):
-                    params.update(dict(stats_processed_json_str=json.dumps(p_stats)))
-                params.update(dict(sync_iter_count=1))
-                params.update(dict(sync_visibility=True))
-                new_sync_stats = SyncStats(**params)
-                new_sync_stats.save()
-            else:
-                SyncStats.objects.filter(**filter_kwargs).update(
-                    job_uuid=sync_uuid, stats_raw_json_str=json.dumps(stats_json),
-                    stats_processed_json_str=json.dumps(p_stats) if isinstance(p_stats, dict) else {},
-                    sync_iter_count=existing_sync_stat.sync_iter_count + 1
-                )
+            with transaction.atomic():
+                existing_sync_stat = SyncStats.objects.filter(**filter_kwargs).first()
+                sync_uuid = uuid4()
+                if not existing_sync_stat:
+                    params = {}
+                    params.update(dict(package_name=project))
+                    params.update(dict(job_uuid=sync_uuid))
+                    params.update(dict(project_version=version))
+                    params.update(dict(source=stats_source))
+                    params.update(dict(stats_raw_json_str=json.dumps(stats_json)))
+                    if isinstance(p_stats, dict):
+                        params.update(dict(stats_processed_json_str=json.dumps(p_stats)))
+                    params.update(dict(stats_fingerprint=fingerprint))
+                    params.update(dict(sync_iter_count=1))
+                    params.update(dict(sync_visibility=True))
+                    sync_stats = SyncStats(**params)
+                    sync_stats.save()
+                else:
+                    SyncStats.objects.filter(**filter_kwargs).update(
+                        job_uuid=sync_uuid, stats_raw_json_str=json.dumps(stats_json),
+                        stats_processed_json_str=json.dumps(p_stats) if isinstance(p_stats, dict) else None,
+                        stats_fingerprint=fingerprint,
+                        sync_iter_count=existing_sync_stat.sync_iter_count + 1
+                    )
+                    sync_stats = existing_sync_stat
+                self.save_locale_stats(sync_stats, p_stats, stats_json)
         except Exception as e:
             self.app_logger(
                 'ERROR', "version stats could not be saved, details: " + str(e))
@@ -517,6 +648,40 @@ class SyncStatsManager(BaseManager):
             return True
         return False
 
+    @staticmethod
+    def save_locale_stats(sync_stats, p_stats, stats_json=None):
+        """
+        Save locale-wise rows of processed stats of a synced version
+            fuzzy counts are picked from stats json, as processed
+            stats have none
+        :param sync_stats: SyncStats object
+        :param p_stats: processed stats dict
+        :param stats_json: translation stats dict
+        """
+        locale_fuzzy, locale_translated = {}, {}
+        raw_stats = stats_json.get('stats') if isinstance(stats_json, dict) else None
+        for stats_param in raw_stats if isinstance(raw_stats, list) else []:
+            if not isinstance(stats_param, dict):
+                continue
+            locale = locale_resolver.resolve(stats_param.get('locale') or stats_param.get('code'))
+            # of multiple stats of a locale, processed stats are of the most translated
+            if locale and (stats_param.get('translated') or 0) >= locale_translated.get(locale, 0):
+                locale_translated[locale] = stats_param.get('translated') or 0
+                locale_fuzzy[locale] = stats_param.get('fuzzy') or 0
+
+        LocaleStats.objects.filter(sync_stats_id=sync_stats.sync_id).delete()
+        if not isinstance(p_stats, dict):
+            return
+        LocaleStats.objects.bulk_create([
+            LocaleStats(
+                sync_stats_id=sync_stats.sync_id, package_name_id=sync_stats.package_name_id,
+                project_version=sync_stats.project_version, source=sync_stats.source,
+                locale=locale, total=stats.get('Total') or 0,
+                translated=stats.get('Translated') or 0, fuzzy=locale_fuzzy.get(locale, 0),
+                untranslated=stats.get('Untranslated') or 0
+            ) for locale, stats in p_stats.items() if isinstance(stats, dict)
+        ])
+
     def toggle_visibility(self, package, visibility=False, stats_source=None):
         """
         Toggle visibility of statistics to false or true
@@ -538,12 +703,13 @@ class SyncStatsManager(BaseManager):
             return True
         return False
 
-    def get_build_system_stats(self):
+    def get_build_system_stats(self, fields=None):
         """
         The build system statistics
+        :param fields: fields to be fetched
         :return: queryset
         """
-        build_sys_stats = self.get_sync_stats(sources=BUILD_SYSTEMS)
+        build_sys_stats = self.get_sync_stats(sources=BUILD_SYSTEMS, fields=fields)
         return build_sys_stats
 
 
@@ -747,6 +913,54 @@ class ReleaseBranchManager(InventoryManager):
         else:
             return True
 
+    @staticmethod
+    def parse_milestone_date(milestone_date):
+        """
+        Parse date of a release schedule milestone
+        :param milestone_date: str, as in schedule_json: '20190521' or '20190521T...'
+        :return: date or None
+        """
+        try:
+            return datetime.strptime(str(milestone_date)[:8], '%Y%m%d').date()
+        except ValueError:
+            return None
+
+    def get_release_sync_priorities(self, today=None):
+        """
+        Sync priority of release branches, as per their schedule
+            releases approaching (or in between) crunch milestones are in
+            crunch, EOL and not tracked releases are of low priority
+        :param today: date
+        :return: dict {release_slug: priority}
+        """
+        if not getattr(settings, 'SYNC_BY_RELEASE_MILESTONES', True):
+            return {}
+        today = today or timezone.localdate()
+        crunch_days = getattr(settings, 'SYNC_CRUNCH_DAYS', 14)
+        crunch_milestones = [milestone.lower() for milestone in getattr(
+            settings, 'SYNC_CRUNCH_MILESTONES', ('String Freeze', 'Translation Deadline'))]
+        eol_phases = getattr(settings, 'SYNC_EOL_PHASES', ('Unsupported', 'End of Life', 'EOL'))
+
+        release_priorities = {}
+        releases = self.get_release_branches(fields=(
+            'release_slug', 'current_phase', 'schedule_json_str', 'track_trans_flag'
+        ))
+        for release in releases or []:
+            milestones = [(milestone.lower(), self.parse_milestone_date(milestone_date))
+                          for milestone, milestone_date in (release.schedule_json or {}).items()]
+            if not release.track_trans_flag or release.current_phase in eol_phases or \
+                    [milestone for milestone, milestone_date in milestones
+                     if ('eol' in milestone.split() or 'end of life' in milestone) and
+                     milestone_date and milestone_date <= today]:
+                release_priorities[release.release_slug] = SYNC_PRIORITIES[2]
+            elif [milestone for milestone, milestone_date in milestones
+                  if [crunch for crunch in crunch_milestones if crunch in milestone] and
+                  milestone_date and 0 <= (milestone_date - today).days <= crunch_days]:
+                release_priorities[release.release_slug] = SYNC_PRIORITIES[0]
+            else:
+                release_priorities[release.release_slug] = SYNC_PRIORITIES[1]
+        return release_priorities
+
     def get_latest_release(self):
         """
         Returns latest release query object
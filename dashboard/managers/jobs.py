@@ -20,14 +20,17 @@ import io
 import os
 import json
 import shutil
+import tempfile
 import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from collections import OrderedDict
 from datetime import datetime
 from uuid import uuid4
-from yaml import load, FullLoader
+from yaml import dump, load, FullLoader
 
 # django
 from django.conf import settings
+from django.db import connections
 from django.utils import timezone
 
 # dashboard
@@ -42,11 +45,15 @@ from dashboard.models import (
     Platform, Package, Product, Release, JobTemplate, Job,
     CacheBuildDetails
 )
+from dashboard.services.consume.circuitbreaker import circuit_breakers
+from dashboard.services.consume.workers import reset_worker_connections
 
 
+SYSTEM_USER_EMAIL = 'system@transtats.org'
+
 __all__ = ['JobTemplateManager', 'JobManager', 'JobsLogManager',
            'TransplatformSyncManager', 'ReleaseScheduleSyncManager',
-           'BuildTagsSyncManager', 'YMLBasedJobManager']
+           'BuildTagsSyncManager', 'YMLBasedJobManager', 'DownstreamSyncManager']
 
 
 class JobTemplateManager(BaseManager):
@@ -123,6 +130,14 @@ class JobManager(object):
         """
         Update job with finish details
         """
+        # breakers of hosts which failed while this job ran, or still fail
+        tripped_breakers = circuit_breakers.tripped(since=self.start_time)
+        if tripped_breakers:
+            self.log_json['Circuit Breakers'] = OrderedDict(
+                (host, 'Circuit breaker is {state}, last opened at {last_opened}, '
+                       '{failures} consecutive failures.'.format(**status))
+                for host, status in tripped_breakers.items()
+            )
         try:
             if remove:
                 Job.objects.filter(job_uuid=self.uuid).delete()
@@ -255,20 +270,17 @@ class JobsLogManager(BaseManager):
 
                                 processed_stats = []
                                 analysed_data['stats'] = []
+                                grouped_stats = {}
+                                try:
+                                    grouped_stats = self.package_manager.group_n_reduce_stats(
+                                        locale_key, stats_json
+                                    )
+                                except Exception as e:
+                                    self.app_logger(
+                                        'ERROR', "Error while filtering stats, details: " + str(e))
                                 for locale, l_alias in list(lang_id_name.keys()):
-                                    filter_stat = []
                                     stats_chunk = []
-
-                                    try:
-                                        filter_stat = self.package_manager.filter_n_reduce_stats(
-                                            locale_key, locale, l_alias, stats_json
-                                        )
-                                    except Exception as e:
-                                        self.app_logger(
-                                            'ERROR', "Error while filtering stats, details: " + str(e))
-                                    else:
-                                        filter_stat = filter_stat[0] \
-                                            if isinstance(filter_stat, list) and len(filter_stat) > 0 else {}
+                                    filter_stat = grouped_stats.get(locale, {})
 
                                     stats_chunk.append(locale_lang_dict.get(locale, locale))
                                     if filter_stat.get('total') and filter_stat.get('total') > 0:
@@ -605,7 +617,7 @@ class YMLBasedJobManager(BaseManager):
         self.suffix = self.job_suffix(
             [getattr(self, param, '') for param in self.params]
         )
-        self.job_log_file = self.sandbox_path + '.log'
+        self.job_log_file = kwargs.get('job_log_file') or self.sandbox_path + '.log'
 
     def _get_package(self):
         package_details = \
@@ -662,7 +674,8 @@ class YMLBasedJobManager(BaseManager):
 
         try:
             self.package_manager.syncstats_manager.save_version_stats(
-                self._get_package(), stats_version, stats_dict, stats_source
+                self._get_package(), stats_version, stats_dict, stats_source,
+                p_stats=self.package_manager.process_stats_json(stats_dict, stats_source)
             )
             if stats_source == 'upstream':
                 self.package_manager.update_package(self.package, {
@@ -674,7 +687,7 @@ class YMLBasedJobManager(BaseManager):
                     'downstream_last_updated': timezone.now()
                 })
             # If invoked by system user, cache build details
-            if self.active_user_email == 'system@transtats.org' and \
+            if self.active_user_email == SYSTEM_USER_EMAIL and \
                     self.type == TS_JOB_TYPES[3]:
                 cache_params = {}
                 match_params = {
@@ -794,7 +807,8 @@ class YMLBasedJobManager(BaseManager):
             getattr(self, 'pkg_tp_auth_usr', ''),
             getattr(self, 'pkg_tp_auth_token', ''),
             getattr(self, 'pkg_tp_url', ''),
-            log_file
+            log_file,
+            self.sandbox_path
         )
         action_mapper.set_actions()
         # lets execute collected tasks
@@ -825,10 +839,173 @@ class YMLBasedJobManager(BaseManager):
                 job_manager.mark_job_finish()
             else:
                 job_manager.mark_job_finish(remove=True)
-            time.sleep(4)
+            # let the UI read the log, before it is removed
+            if getattr(self, 'active_user_email', None) != SYSTEM_USER_EMAIL:
+                time.sleep(4)
         # if not a dry run, save results is db
         if action_mapper.result and not getattr(self, 'DRY_RUN', None):
             self._save_result_in_db(action_mapper.result, action_mapper.build)
         if os.path.exists(log_file):
             os.unlink(log_file)
         return self.job_id
+
+
+class DownstreamSyncManager(BaseManager):
+    """
+    Sync packages with build system
+        runs syncdownstream jobs of (package, build system, build tag)
+        candidates in a pool of processes (job tasks change directory),
+        each job in a sandbox and log file of its own
+    """
+
+    sandbox_root = None
+    LOG_RETENTION_DAYS = 7
+
+    def __init__(self, *args, **kwargs):
+        super(DownstreamSyncManager, self).__init__(**kwargs)
+        self.sandbox_root = self.sandbox_root or getattr(
+            settings, 'DOWNSTREAM_SYNC_SANDBOX',
+            os.path.join(os.path.dirname(settings.BASE_DIR), 'false', 'sandbox')
+        )
+        self.package_manager = PackagesManager()
+
+    def _has_disk_space(self):
+        free_space = shutil.disk_usage(self.sandbox_root).free
+        return free_space >= getattr(settings, 'DOWNSTREAM_SYNC_MIN_FREE_MB', 2048) * 1024 * 1024
+
+    def _wait_for_disk_space(self):
+        """
+        Wait until free disk space of sandboxes is enough for a job
+        :return: boolean
+        """
+        wait_until = time.monotonic() + getattr(settings, 'DOWNSTREAM_SYNC_DISK_WAIT', 600)
+        while not self._has_disk_space():
+            if time.monotonic() >= wait_until:
+                return False
+            # sandboxes of jobs in flight are removed as they finish
+            time.sleep(5)
+        return True
+
+    def _prune_logs(self):
+        """
+        Remove logs of failed jobs, older than LOG_RETENTION_DAYS
+        """
+        expiry = time.time() - self.LOG_RETENTION_DAYS * 24 * 60 * 60
+        for file_name in os.listdir(self.sandbox_root):
+            file_path = os.path.join(self.sandbox_root, file_name)
+            try:
+                if '.log.' in file_name and os.path.getmtime(file_path) < expiry:
+                    os.unlink(file_path)
+            except OSError:
+                pass
+
+    def run_job(self, candidate, check_latest_build=True):
+        """
+        Run syncdownstream job of a candidate, unless its latest build is synced
+        :param candidate: (package_name, build_system, build_tag)
+        :param check_latest_build: False, if checked in bulk already
+        :return: boolean
+        """
+        candidate = tuple(candidate)
+        if check_latest_build and self.package_manager.is_package_build_latest(candidate):
+            return True
+        job_template = JobTemplateManager().get_job_templates(
+            job_template_type=TS_JOB_TYPES[3]
+        ).first()
+        t_params = job_template.job_template_params if job_template else []
+        if len(t_params) != len(candidate):
+            return False
+
+        os.makedirs(self.sandbox_root, exist_ok=True)
+        if not self._wait_for_disk_space():
+            self.app_logger(
+                'ERROR', "Build system sync of %s skipped, not enough free disk space "
+                         "in %s" % (", ".join(candidate), self.sandbox_root))
+            return False
+
+        job_data = {field.upper(): param
+                    for field, param in zip(t_params, candidate)}
+        job_data.update({
+            'YML_FILE': dump(job_template.job_template_json,
+                             default_flow_style=False).replace("\'", "")
+        })
+        job_data.update({'SCRATCH': True})
+
+        sandbox_path = tempfile.mkdtemp(
+            prefix='%s-' % '-'.join(candidate).replace(os.sep, '_'), dir=self.sandbox_root
+        )
+        # log is kept next to the sandbox, if job fails
+        job_log_file = sandbox_path + '.log'
+        job_manager = YMLBasedJobManager(
+            **job_data, **{'params': [p.upper() for p in t_params],
+                           'type': TS_JOB_TYPES[3]},
+            **{'active_user_email': SYSTEM_USER_EMAIL},
+            **{'sandbox_path': sandbox_path + os.sep},
+            **{'job_log_file': job_log_file}
+        )
+        try:
+            job_manager.execute_job()
+        except Exception as e:
+            self.app_logger(
+                'ERROR', "Build system sync of %s failed, log: %s.*, details: %s" % (
+                    ", ".join(candidate), job_log_file, str(e)))
+            return False
+        finally:
+            shutil.rmtree(sandbox_path, ignore_errors=True)
+        return True
+
+    def run(self, candidates, concurrency=None):
+        """
+        Run syncdownstream jobs of candidates, at most concurrency at a time
+            latest builds of candidates are checked in bulk, jobs run
+            only for candidates with new builds
+        :param candidates: list of (package_name, build_system, build_tag)
+        :param concurrency: number of worker processes, 1 to run in this one
+        :return: dict {candidate: boolean}
+        """
+        concurrency = concurrency or getattr(settings, 'DOWNSTREAM_SYNC_CONCURRENCY', 4)
+        candidates = [tuple(candidate) for candidate in candidates]
+        outdated_candidates = self.package_manager.get_outdated_build_candidates(candidates)
+        # candidates with latest build synced already need no job
+        sync_status = {candidate: True for candidate in candidates
+                       if candidate not in outdated_candidates}
+        if not outdated_candidates:
+            return sync_status
+        os.makedirs(self.sandbox_root, exist_ok=True)
+        self._prune_logs()
+        if concurrency == 1:
+            sync_status.update({candidate: self.run_job(candidate, check_latest_build=False)
+                                for candidate in outdated_candidates})
+            return sync_status
+
+        # forked workers must not share db connections of this process
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=min(concurrency, len(outdated_candidates)),
+                                 initializer=reset_worker_connections) as executor:
+            futures = {executor.submit(_run_downstream_sync_job, candidate,
+                                       self.sandbox_root): candidate
+                       for candidate in outdated_candidates}
+            for future in as_completed(futures):
+                try:
+                    sync_status[futures[future]] = future.result()
+                except Exception as e:
+                    sync_status[futures[future]] = False
+                    self.app_logger(
+                        'ERROR', "Build system sync of %s failed, details: %s" % (
+                            ", ".join(futures[future]), str(e)))
+        return sync_status
+
+
+def _run_downstream_sync_job(candidate, sandbox_root):
+    """
+    Job of the downstream sync pool, module level to run in processes
+    :param candidate: (package_name, build_system, build_tag)
+    :param sandbox_root: directory of job sandboxes
+    :return: boolean
+    """
+    try:
+        return DownstreamSyncManager(sandbox_root=sandbox_root).run_job(
+            candidate, check_latest_build=False
+        )
+    finally:
+        connections.close_all()
@@ -19,24 +19,35 @@
 # python
 import re
 import json
+import random
 import difflib
 import operator
-from collections import OrderedDict
+import threading
+import multiprocessing
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from datetime import timedelta
 from functools import reduce
+from itertools import zip_longest
 
 # django
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Case, F, Func, IntegerField, Q, Sum, Value, When
+from django.db.models.functions import Length
 from django.utils import timezone
 
 # dashboard
 from dashboard.constants import (
-    TRANSPLATFORM_ENGINES, DAMNEDLIES_SLUGS,
-    RELSTREAM_SLUGS, BRANCH_MAPPING_KEYS,
+    TRANSPLATFORM_ENGINES, DAMNEDLIES_SLUGS, BUILD_SYSTEMS,
+    RELSTREAM_SLUGS, BRANCH_MAPPING_KEYS, SYNC_PRIORITIES
 )
 from dashboard.managers.inventory import (
-    InventoryManager, SyncStatsManager, ReleaseBranchManager
+    InventoryManager, SyncStatsManager, ReleaseBranchManager, locale_resolver
 )
-from dashboard.models import Platform, Package, CacheBuildDetails
+from dashboard.models import Platform, Package, CacheBuildDetails, LocaleStats, SyncStats
 from dashboard.managers.utilities import parse_project_details_json
+from dashboard.services.consume.workers import reset_worker_connections
 
 
 __all__ = ['PackagesManager', 'PackageBranchMapping']
@@ -105,43 +116,32 @@ class PackagesManager(InventoryManager):
             )
         return packages
 
-    def get_release_specific_package_stats(self, release_branch):
+    def get_release_locale_stats(self, release_branch):
         """
-        Fetch processed stats for all packages of a release
+        Locale stats of platform versions, packages are mapped to for a release branch
         :param release_branch: str
-        :return: package stats: dict
+        :return: LocaleStats queryset, names of packages having synced stats
         """
-        packages_stats = {}
         release_packages = self.get_relbranch_specific_pkgs(
             release_branch, fields=['package_name', 'release_branch_mapping']
         )
-        branch_locales = self.get_relbranch_locales(release_branch)
-        locales_count_match = True \
-            if len(branch_locales) == self.get_active_locales_count() else False
-        for package in release_packages:
-            version = package.release_branch_mapping_json[release_branch][BRANCH_MAPPING_KEYS[0]]
-            package_stats = self.syncstats_manager.get_sync_stats(
-                pkgs=[package.package_name],
-                fields=['stats_raw_json_str', 'stats_processed_json_str'],
-                versions=[version]
-            ).first()
-            if package_stats:
-                processed_stats = {}
-                if not package_stats.stats_processed_json:
-                    if package_stats.stats_raw_json.get('stats'):
-                        processed_stats = self._process_response_stats_json(
-                            package_stats.stats_raw_json['stats'])
-
-                    if package.platform_slug.engine_name == TRANSPLATFORM_ENGINES[1] and not processed_stats:
-                        processed_stats = self._process_response_stats_json_tx(
-                            package_stats.stats_raw_json)
-                else:
-                    processed_stats = package_stats.stats_processed_json
-                package_processed_stats = processed_stats
-                packages_stats[package.package_name] = package_processed_stats \
-                    if locales_count_match else {locale: package_processed_stats.get(locale, {})
-                                                 for locale in branch_locales}
-        return packages_stats
+        version_filters = [
+            Q(package_name=package.package_name,
+              project_version=package.release_branch_mapping_json[release_branch][BRANCH_MAPPING_KEYS[0]])
+            for package in release_packages
+            if (package.release_branch_mapping_json or {}).get(release_branch, {}).get(BRANCH_MAPPING_KEYS[0])
+        ]
+        if not version_filters:
+            return LocaleStats.objects.none(), []
+        version_filter = reduce(operator.or_, version_filters)
+        platform_source = F('package_name__platform_slug__engine_name')
+        synced_packages = list(SyncStats.objects.filter(
+            version_filter, source=platform_source, sync_visibility=True
+        ).values_list('package_name', flat=True).distinct())
+        locale_stats = LocaleStats.objects.filter(
+            version_filter, source=platform_source, sync_stats__sync_visibility=True
+        )
+        return locale_stats, synced_packages
 
     def get_trans_stats_by_rule(self, coverage_rule):
         """
@@ -180,25 +180,13 @@ class PackagesManager(InventoryManager):
 
                 package_stats = self.syncstats_manager.get_sync_stats(
                     pkgs=[package.package_name],
-                    fields=['stats_raw_json_str', 'stats_processed_json_str',
-                            'project_version', 'source']
+                    fields=['stats_processed_json_str', 'project_version', 'source']
                 )
 
                 for p_stats in package_stats:
-                    processed_stats = {}
                     not_found = {'Total': 'Not Found', 'Translated': 'Not Found',
                                  'Untranslated': 'Not Found', 'Remaining': 'N/A'}
-
-                    if not p_stats.stats_processed_json:
-                        if p_stats.stats_raw_json.get('stats'):
-                            processed_stats = self._process_response_stats_json(
-                                p_stats.stats_raw_json['stats'])
-
-                        if p_stats.source == TRANSPLATFORM_ENGINES[1] and not processed_stats:
-                            processed_stats = self._process_response_stats_json_tx(
-                                p_stats.stats_raw_json)
-                    else:
-                        processed_stats = p_stats.stats_processed_json
+                    processed_stats = p_stats.stats_processed_json or {}
                     package_processed_stats = {
                         locale_lang_dict.get(locale, locale):
                             processed_stats.get(locale, not_found) for locale in locales}
@@ -466,61 +454,466 @@ class PackagesManager(InventoryManager):
                 update_pkg_status = True
         return update_pkg_status
 
-    def sync_update_package_stats(self, package_name):
+    def sync_update_package_stats(self, package_name, sync_counts=None, release_priorities=None):
         """
         Sync with translation platform and update trans stats in db for a package
         :param package_name: str
+        :param sync_counts: Counter of changed, unchanged and failed versions
+        :param release_priorities: dict, of get_release_sync_priorities
         :return: boolean
         """
         update_stats_status = False
+        sync_counts = sync_counts if sync_counts is not None else Counter()
         package, ext = self._get_pkg_and_ext(package_name)
         project, versions = parse_project_details_json(
             package.platform_slug.engine_name, package.package_details_json
         )
+        engine_name = package.platform_slug.engine_name
+        stats_requests = []
+        locales = []
+        if engine_name == TRANSPLATFORM_ENGINES[0]:
+            # this is a quick fix for chinese in DamnedLies modules
+            locales = [locale.locale_alias if 'zh' not in locale.locale_id else locale.locale_id
+                       for locale in self.get_locales(only_active=True)]
+            for version in versions:
+                stats_requests.extend([(
+                    engine_name, package.platform_slug.api_url,
+                    (locale, version), dict(package_name=package_name)
+                ) for locale in locales])
+        else:
+            stats_requests.extend([(
+                engine_name, package.platform_slug.api_url, (project, version),
+                dict(auth_user=package.platform_slug.auth_login_id,
+                     auth_token=package.platform_slug.auth_token_key)
+            ) for version in versions])
+
+        # fetch all versions (and locales) concurrently
+        fetched_stats = {}
+        for stats_request, stats_json in \
+                self.api_resources.fetch_translation_statistics_batch(stats_requests):
+            fetched_stats[stats_request[2]] = stats_json
+
+        saved_fingerprints = self.syncstats_manager.get_stats_fingerprints(
+            [package_name], engine_name)
+        fingerprint_context = self._stats_fingerprint_context()
+        changed_versions = sync_counts['changed']
+        failed_versions = sync_counts['failed']
         for version in versions:
-            proj_trans_stats_response_dict = {}
-            if package.platform_slug.engine_name == TRANSPLATFORM_ENGINES[0]:
-                # this is a quick fix for chinese in DamnedLies modules
-                locales = [locale.locale_alias if 'zh' not in locale.locale_id else locale.locale_id
-                           for locale in self.get_locales(only_active=True)]
-                locales_stats_list = []
-                for locale in locales:
-                    locale_stats = self.api_resources.fetch_translation_statistics(
-                        package.platform_slug.engine_name, package.platform_slug.api_url,
-                        locale, version, **dict(package_name=package_name)
-                    )
-                    if locale_stats:
-                        locales_stats_list.append(locale_stats)
-                proj_trans_stats_response_dict.update({"id": version, "stats": locales_stats_list})
+            if engine_name == TRANSPLATFORM_ENGINES[0]:
+                locales_stats_list = [fetched_stats.get((locale, version)) for locale in locales
+                                      if fetched_stats.get((locale, version))]
+                proj_trans_stats_response_dict = {"id": version, "stats": locales_stats_list}
             else:
-                proj_trans_stats_response_dict = self.api_resources.fetch_translation_statistics(
-                    package.platform_slug.engine_name, package.platform_slug.api_url, project, version,
-                    **dict(auth_user=package.platform_slug.auth_login_id,
-                           auth_token=package.platform_slug.auth_token_key)
-                )
-            if proj_trans_stats_response_dict:
-                processed_stats = {}
-                # Process and Update locale-wise stats
-                if self.PROCESS_STATS and proj_trans_stats_response_dict.get('stats'):
-                    processed_stats = self._process_response_stats_json(
-                        proj_trans_stats_response_dict['stats'], package.platform_slug.engine_name)
-
-                if self.PROCESS_STATS and package.platform_slug.engine_name == TRANSPLATFORM_ENGINES[1] \
-                        and not processed_stats:
-                    processed_stats = self._process_response_stats_json_tx(
-                        proj_trans_stats_response_dict)
-
-                if self.syncstats_manager.save_version_stats(
-                        package, version, proj_trans_stats_response_dict,
-                        package.platform_slug.engine_name, p_stats=processed_stats
-                ):
-                    Package.objects.filter(platform_url=package.platform_url).update(
-                        platform_last_updated=timezone.now())
-                    update_stats_status = True
+                proj_trans_stats_response_dict = fetched_stats.get((project, version), {})
+            if self._save_synced_version_stats(
+                    package, version, proj_trans_stats_response_dict,
+                    saved_fingerprints.get((package_name, version)),
+                    fingerprint_context, sync_counts):
+                update_stats_status = True
+        package_changed = sync_counts['changed'] > changed_versions
+        self.schedule_platform_sync(
+            package, None if sync_counts['failed'] > failed_versions and not update_stats_status
+            else package_changed, release_priorities
+        )
         # this makes sense if we create branch-mapping just after package sync
-        self.build_branch_mapping(package_name)
+        if package_changed or not package.release_branch_mapping:
+            self.build_branch_mapping(package_name)
         return update_stats_status
 
+    def _stats_fingerprint_context(self):
+        """
+        What processed stats depend on, besides the platform response
+        """
+        if not self.PROCESS_STATS:
+            return []
+        return sorted(self.get_lang_id_name_dict() or [])
+
+    @staticmethod
+    def get_package_sync_priority(release_branch_mapping, release_priorities):
+        """
+        Sync priority of a package, the highest of its releases
+        :param release_branch_mapping: dict
+        :param release_priorities: dict, of get_release_sync_priorities
+        :return: one of SYNC_PRIORITIES
+        """
+        priorities = [release_priorities.get(release, SYNC_PRIORITIES[1])
+                      for release in release_branch_mapping or {}]
+        return min(priorities, key=SYNC_PRIORITIES.index) if priorities else SYNC_PRIORITIES[1]
+
+    @staticmethod
+    def _annotate_sync_priority_rank(packages, release_priorities):
+        """
+        Rank of package sync priority in db, index of SYNC_PRIORITIES
+            as of get_package_sync_priority: the highest priority of
+            releases, package branch mapping has keys of; releases not
+            in release_priorities are of normal priority
+        :param packages: Package queryset
+        :param release_priorities: dict, of get_release_sync_priorities
+        :return: Package queryset, annotated with sync_priority_rank
+        """
+        def _mapped_to(releases):
+            # branch mapping json is keyed by release slug
+            return reduce(operator.or_, [
+                Q(release_branch_mapping__contains='"%s":' % release) for release in releases])
+
+        crunch_releases, _, low_releases = [
+            [release for release, release_priority in release_priorities.items()
+             if release_priority == priority] for priority in SYNC_PRIORITIES]
+        rank_whens = []
+        if crunch_releases:
+            rank_whens.append(When(_mapped_to(crunch_releases), then=Value(0)))
+        if low_releases:
+            # mapped to releases of low priority only: a dict per release, so
+            # releases are as many as '": {' in branch mapping json
+            mapping_key = '": {'
+            packages = packages.annotate(
+                mapped_releases=(Length('release_branch_mapping') - Length(Func(
+                    F('release_branch_mapping'), Value(mapping_key), Value(''), function='REPLACE'
+                ))) / len(mapping_key),
+                mapped_low_releases=sum(Case(
+                    When(_mapped_to([release]), then=Value(1)), default=Value(0),
+                    output_field=IntegerField()
+                ) for release in low_releases)
+            )
+            rank_whens.append(When(mapped_low_releases__lt=F('mapped_releases'), then=Value(1)))
+            rank_whens.append(When(_mapped_to(low_releases), then=Value(2)))
+        return packages.annotate(sync_priority_rank=Case(
+            *rank_whens, default=Value(SYNC_PRIORITIES.index(SYNC_PRIORITIES[1])),
+            output_field=IntegerField()
+        ))
+
+    def claim_packages_due_for_sync(self, limit=None):
+        """
+        Fetch packages due for sync with translation platform, most overdue first
+            packages of releases in crunch go first. Claimed packages are due
+            again after the least interval, so that a next tick does not pick
+            them while their sync is in flight. Due packages are locked while
+            being claimed, those locked by a concurrent claim are skipped.
+        :param limit: max number of packages: int
+        :return: Package queryset
+        """
+        now = timezone.now()
+        release_priorities = self.release_manager.get_release_sync_priorities()
+        try:
+            with transaction.atomic():
+                due_packages = Package.objects.select_for_update(skip_locked=True).filter(
+                    Q(platform_next_sync__isnull=True) | Q(platform_next_sync__lte=now)
+                )
+                sync_order = [F('platform_next_sync').asc(nulls_first=True)]
+                if release_priorities:
+                    due_packages = self._annotate_sync_priority_rank(
+                        due_packages, release_priorities)
+                    sync_order.insert(0, 'sync_priority_rank')
+                package_names = list(due_packages.order_by(*sync_order).values_list(
+                    'package_name', flat=True)[:limit])
+                Package.objects.filter(package_name__in=package_names).update(
+                    platform_next_sync=now + timedelta(
+                        minutes=getattr(settings, 'PLATFORM_SYNC_INTERVAL_MIN', 2 * 60)))
+        except Exception as e:
+            self.app_logger(
+                'ERROR', "Packages due for sync could not be claimed, details: " + str(e))
+            return Package.objects.none()
+        if not package_names:
+            return Package.objects.none()
+        return self.get_packages(pkgs=package_names)
+
+    def schedule_platform_sync(self, package, changed, release_priorities=None):
+        """
+        Schedule next sync of a package with its translation platform
+            sync interval is halved when stats changed, and stretched
+            otherwise; failed sync is due again after the least interval.
+            Next sync is sooner for releases in crunch, later for low
+            priority ones. Jitter spreads packages synced together over time.
+        :param package: Package object
+        :param changed: boolean, None if sync failed
+        :param release_priorities: dict, of get_release_sync_priorities
+        """
+        least_interval = getattr(settings, 'PLATFORM_SYNC_INTERVAL_MIN', 2 * 60)
+        interval = package.platform_sync_interval or \
+            getattr(settings, 'PLATFORM_SYNC_INTERVAL_DEFAULT', 12 * 60)
+        now = timezone.now()
+        if changed is None:
+            schedule = dict(platform_next_sync=now + timedelta(minutes=least_interval))
+        else:
+            interval = max(least_interval, interval // 2) if changed else min(
+                getattr(settings, 'PLATFORM_SYNC_INTERVAL_MAX', 7 * 24 * 60),
+                int(interval * getattr(settings, 'PLATFORM_SYNC_BACKOFF', 1.5)))
+            if release_priorities is None:
+                release_priorities = self.release_manager.get_release_sync_priorities()
+            priority_factor = {
+                SYNC_PRIORITIES[0]: getattr(settings, 'SYNC_CRUNCH_INTERVAL_FACTOR', 0.25),
+                SYNC_PRIORITIES[2]: getattr(settings, 'SYNC_LOW_PRIORITY_INTERVAL_FACTOR', 4),
+            }.get(self.get_package_sync_priority(
+                package.release_branch_mapping_json, release_priorities), 1)
+            schedule = dict(
+                platform_last_updated=now, platform_sync_interval=interval,
+                platform_next_sync=now + timedelta(minutes=max(
+                    getattr(settings, 'PLATFORM_SYNC_TICK', 15),
+                    interval * priority_factor * random.uniform(0.9, 1.1)))
+            )
+        Package.objects.filter(package_id=package.package_id).update(**schedule)
+
+    def _save_synced_version_stats(self, package, version, proj_trans_stats_response_dict,
+                                   saved_fingerprint=None, fingerprint_context=None,
+                                   sync_counts=None):
+        """
+        Process and save translation platform stats of a package version
+            stats are neither processed nor saved again if the platform
+            returned the same as of the last sync
+        :param package: Package object
+        :param version: str
+        :param proj_trans_stats_response_dict: dict
+        :param saved_fingerprint: stats fingerprint of the last sync
+        :param fingerprint_context: list, from _stats_fingerprint_context
+        :param sync_counts: Counter of changed, unchanged and failed versions
+        :return: boolean
+        """
+        sync_counts = sync_counts if sync_counts is not None else Counter()
+        if not proj_trans_stats_response_dict:
+            sync_counts['failed'] += 1
+            return False
+        engine_name = package.platform_slug.engine_name
+        fingerprint = self.syncstats_manager.stats_fingerprint(
+            proj_trans_stats_response_dict, engine_name,
+            self._stats_fingerprint_context() if fingerprint_context is None
+            else fingerprint_context
+        )
+        if fingerprint == saved_fingerprint:
+            sync_counts['unchanged'] += 1
+            return True
+
+        processed_stats = {}
+        # Process and Update locale-wise stats
+        if self.PROCESS_STATS:
+            processed_stats = self.process_stats_json(proj_trans_stats_response_dict, engine_name)
+
+        if self.syncstats_manager.save_version_stats(
+                package, version, proj_trans_stats_response_dict,
+                engine_name, p_stats=processed_stats, fingerprint=fingerprint
+        ):
+            sync_counts['changed'] += 1
+            return True
+        sync_counts['failed'] += 1
+        return False
+
+    def sync_damnedlies_release_stats(self, package_names=None, sync_counts=None,
+                                      release_priorities=None):
+        """
+        Sync DamnedLies packages release-wise
+            each (release, locale) document is fetched and parsed once,
+            and stats of all tracked modules therein are saved together
+        :param package_names: list, defaults to all DamnedLies packages
+        :param sync_counts: Counter of changed, unchanged and failed versions
+        :param release_priorities: dict, of get_release_sync_priorities
+        :return: list of package names updated
+        """
+        packages = self.get_packages(pkgs=package_names).filter(
+            platform_slug__engine_name=TRANSPLATFORM_ENGINES[0]
+        ).select_related('platform_slug')
+        if not packages:
+            return []
+        sync_counts = sync_counts if sync_counts is not None else Counter()
+        # this is a quick fix for chinese in DamnedLies modules
+        locales = [locale.locale_alias if 'zh' not in locale.locale_id else locale.locale_id
+                   for locale in self.get_locales(only_active=True)]
+
+        # group tracked modules by platform and release
+        release_modules = OrderedDict()
+        for package in packages:
+            project, versions = parse_project_details_json(
+                TRANSPLATFORM_ENGINES[0], package.package_details_json
+            )
+            for version in versions:
+                release_modules.setdefault(
+                    (package.platform_slug.api_url, version), []
+                ).append(package)
+
+        stats_requests = []
+        for (api_url, version), release_packages in release_modules.items():
+            module_names = [package.package_name for package in release_packages]
+            stats_requests.extend([(
+                TRANSPLATFORM_ENGINES[0], api_url, (locale, version),
+                dict(package_names=module_names)
+            ) for locale in locales])
+
+        fetched_stats = {}
+        for stats_request, modules_stats in \
+                self.api_resources.fetch_translation_statistics_batch(stats_requests):
+            fetched_stats[(stats_request[1], ) + tuple(stats_request[2])] = modules_stats or {}
+
+        saved_fingerprints = self.syncstats_manager.get_stats_fingerprints(
+            [package.package_name for package in packages], TRANSPLATFORM_ENGINES[0])
+        fingerprint_context = self._stats_fingerprint_context()
+        updated_packages, changed_packages, failed_packages = set(), set(), set()
+        with transaction.atomic():
+            for (api_url, version), release_packages in release_modules.items():
+                for package in release_packages:
+                    locales_stats_list = [
+                        fetched_stats[(api_url, locale, version)][package.package_name]
+                        for locale in locales
+                        if package.package_name in fetched_stats.get((api_url, locale, version), {})
+                    ]
+                    changed_versions = sync_counts['changed']
+                    if self._save_synced_version_stats(
+                            package, version, {"id": version, "stats": locales_stats_list},
+                            saved_fingerprints.get((package.package_name, version)),
+                            fingerprint_context, sync_counts):
+                        updated_packages.add(package.package_name)
+                    else:
+                        failed_packages.add(package.package_name)
+                    if sync_counts['changed'] > changed_versions:
+                        changed_packages.add(package.package_name)
+            if release_priorities is None:
+                release_priorities = self.release_manager.get_release_sync_priorities()
+            for package in packages:
+                self.schedule_platform_sync(
+                    package, None if package.package_name in failed_packages - updated_packages
+                    else package.package_name in changed_packages, release_priorities
+                )
+        for package in packages:
+            if package.package_name in changed_packages or not package.release_branch_mapping:
+                self.build_branch_mapping(package.package_name)
+        return [package.package_name for package in packages
+                if package.package_name in updated_packages]
+
+    @staticmethod
+    def get_platform_sync_jobs(packages):
+        """
+        Split sync of packages with their platforms into jobs
+            a job per package, DamnedLies packages of a platform go together
+            as one (release documents are shared by all modules); platforms
+            are interleaved, so that workers do not all wait on a capped one
+        :param packages: Package queryset
+        :return: list of tuples (api_url, release_wise, package_names)
+        """
+        platform_jobs, damnedlies_packages = OrderedDict(), OrderedDict()
+        for package in packages.select_related('platform_slug'):
+            platform = package.platform_slug
+            if platform.engine_name == TRANSPLATFORM_ENGINES[0]:
+                damnedlies_packages.setdefault(platform.api_url, []).append(package.package_name)
+            else:
+                platform_jobs.setdefault(platform.api_url, []).append(
+                    (platform.api_url, False, [package.package_name]))
+        for api_url, package_names in damnedlies_packages.items():
+            platform_jobs.setdefault(api_url, []).insert(0, (api_url, True, package_names))
+        return [job for jobs_round in zip_longest(*platform_jobs.values())
+                for job in jobs_round if job]
+
+    def sync_platform_stats(self, package_names, release_wise=False, sync_counts=None,
+                            release_priorities=None):
+        """
+        Sync translation stats of a job of get_platform_sync_jobs
+        :param package_names: list
+        :param release_wise: DamnedLies packages, to be synced together: boolean
+        :param sync_counts: Counter of changed, unchanged and failed versions
+        :param release_priorities: dict, of get_release_sync_priorities
+        :return: dict {package_name: boolean}
+        """
+        if release_priorities is None:
+            release_priorities = self.release_manager.get_release_sync_priorities()
+        if release_wise:
+            updated_packages = self.sync_damnedlies_release_stats(
+                package_names, sync_counts, release_priorities)
+            return {name: name in updated_packages for name in package_names}
+        return {name: self.sync_update_package_stats(name, sync_counts, release_priorities)
+                for name in package_names}
+
+    def sync_packages_with_platform(self, packages, concurrency=None, use_processes=None,
+                                    sync_counts=None):
+        """
+        Sync translation stats of packages with their platforms, by a worker pool
+            at most api_max_concurrency packages of a platform are synced at
+            a time. Returns once all jobs are done, so that reports can be
+            built upon all of them.
+        :param packages: Package queryset
+        :param concurrency: number of workers: int
+        :param use_processes: workers are processes rather than threads: boolean
+        :param sync_counts: Counter of changed, unchanged and failed versions
+        :return: dict {package_name: boolean}
+        """
+        sync_counts = sync_counts if sync_counts is not None else Counter()
+        concurrency = concurrency or getattr(settings, 'PLATFORM_SYNC_CONCURRENCY', 8)
+        if use_processes is None:
+            use_processes = getattr(settings, 'PLATFORM_SYNC_PROCESSES', False)
+
+        jobs = self.get_platform_sync_jobs(packages)
+        if not jobs:
+            return {}
+        platform_caps = {
+            api_url: min(max_concurrency or concurrency, concurrency)
+            for api_url, max_concurrency in Platform.objects.filter(
+                api_url__in={api_url for api_url, _, _ in jobs}
+            ).values_list('api_url', 'api_max_concurrency')
+        }
+
+        release_priorities = self.release_manager.get_release_sync_priorities()
+
+        sync_manager = None
+        if use_processes:
+            sync_manager = multiprocessing.Manager()
+            platform_slots = {api_url: sync_manager.BoundedSemaphore(cap)
+                              for api_url, cap in platform_caps.items()}
+            # forked workers must not share db connections of this process
+            connections.close_all()
+            executor = ProcessPoolExecutor(max_workers=min(concurrency, len(jobs)),
+                                           initializer=reset_worker_connections)
+        else:
+            platform_slots = {api_url: threading.BoundedSemaphore(cap)
+                              for api_url, cap in platform_caps.items()}
+            executor = ThreadPoolExecutor(max_workers=min(concurrency, len(jobs)))
+
+        sync_status = {}
+        try:
+            with executor:
+                futures = {executor.submit(_sync_platform_job, release_wise, package_names,
+                                           platform_slots[api_url], release_priorities):
+                           package_names
+                           for api_url, release_wise, package_names in jobs}
+                for future in as_completed(futures):
+                    try:
+                        job_status, job_counts = future.result()
+                        sync_status.update(job_status)
+                        sync_counts.update(job_counts)
+                    except Exception as e:
+                        sync_status.update({name: False for name in futures[future]})
+                        self.app_logger(
+                            'ERROR', "Package sync failed for %s, details: %s" % (
+                                ", ".join(futures[future]), str(e)))
+        finally:
+            if sync_manager:
+                sync_manager.shutdown()
+        return sync_status
+
+    def get_build_system_sync_candidates(self, priorities=None):
+        """
+        Build tag candidates of packages to sync with build system
+            candidates of releases in crunch go first
+        :param priorities: SYNC_PRIORITIES of releases to pick, defaults to all
+        :return: list of (package_name, build_system, build_tag), package names
+        """
+        release_priorities = self.release_manager.get_release_sync_priorities()
+        packages = self.get_packages(pkg_params=(
+            'package_name', 'release_branch_mapping'
+        )).filter(release_branch_mapping__isnull=False)
+
+        candidates, package_names = [], []
+        for package in packages or []:
+            package_candidates = []
+            for release, map_dict in (package.release_branch_mapping_json or {}).items():
+                priority = release_priorities.get(release, SYNC_PRIORITIES[1])
+                if priorities and priority not in priorities:
+                    continue
+                package_candidates.append((SYNC_PRIORITIES.index(priority), (
+                    package.package_name,
+                    map_dict.get(BRANCH_MAPPING_KEYS[1]),
+                    map_dict.get(BRANCH_MAPPING_KEYS[2])
+                )))
+            if package_candidates:
+                candidates.extend(package_candidates)
+                package_names.append(package.package_name)
+        return [candidate for _, candidate in sorted(
+            candidates, key=lambda candidate: candidate[0])], package_names
+
     @staticmethod
     def get_pkg_branch_mapping(pkg):
         return PackageBranchMapping(pkg).branch_mapping
@@ -547,6 +940,26 @@ class PackagesManager(InventoryManager):
             return True
         return False
 
+    @staticmethod
+    def group_n_reduce_stats(locale_key, stats_json):
+        """
+        Group statistics by language in a single pass, reduce
+            multiple statistics of a language to the most translated
+        :param locale_key: str
+        :param stats_json: list
+        :return: dict {locale_id: stats}
+        """
+        grouped_stats = {}
+        for stats in stats_json:
+            locale = locale_resolver.resolve(stats.get(locale_key))
+            if not locale:
+                continue
+            if locale in grouped_stats and \
+                    grouped_stats[locale].get('translated', 0) > stats.get('translated', 0):
+                continue
+            grouped_stats[locale] = stats
+        return grouped_stats
+
     def filter_n_reduce_stats(self, locale_key, locale, locale_alias, stats_json):
         """
         Filter and reduce multiple statistics for single language
@@ -556,62 +969,48 @@ class PackagesManager(InventoryManager):
         :param stats_json: dict
         :return: list
         """
-        filter_n_reduced_stat = []
-
-        def _reduce_stats_for_a_locale(stats):
-            return [reduce(
-                lambda x, y: x if x.get('translated', 0) > y.get('translated', 0)
-                else y, stats
-            )]
-
-        filter_stat_locale = list(filter(
-            lambda x: x[locale_key] == locale or
-            x[locale_key].replace('-', '_') == locale,
-            stats_json
-        ))
-        filter_stat_alias = list(filter(
-            lambda x: x[locale_key] == locale_alias or
-            x[locale_key].replace('_', '-') == locale_alias,
-            stats_json
-        ))
-
-        if filter_stat_locale and len(filter_stat_locale) > 1:
-            filter_stat_locale = _reduce_stats_for_a_locale(filter_stat_locale)
-
-        if filter_stat_alias and len(filter_stat_alias) > 1:
-            filter_stat_alias = _reduce_stats_for_a_locale(filter_stat_alias)
-
-        if filter_stat_locale and filter_stat_alias:
-            filter_n_reduced_stat = _reduce_stats_for_a_locale(
-                filter_stat_locale + filter_stat_alias
-            )
-        elif filter_stat_locale and not filter_stat_alias:
-            filter_n_reduced_stat = filter_stat_locale
-        elif filter_stat_alias and not filter_stat_locale:
-            filter_n_reduced_stat = filter_stat_alias
-
-        return filter_n_reduced_stat
+        locale_stats = self.group_n_reduce_stats(locale_key, stats_json).get(
+            locale_resolver.resolve(locale) or locale_resolver.resolve(locale_alias) or locale
+        )
+        return [locale_stats] if locale_stats else []
 
-    def _process_response_stats_json(self, stats_json, engine=None):
+    def process_stats_json(self, stats_json, source, lang_id_name=None):
+        """
+        Process stats json of any source into locale-wise stats
+            to be saved along with stats json, so that reads never
+            process raw stats
+        :param stats_json: dict, as saved in stats_raw_json
+        :param source: platform engine, build system or upstream
+        :param lang_id_name: dict, of get_lang_id_name_dict
+        :return: dict {locale: {Total, Translated, Untranslated, Remaining}}
+        """
+        processed_stats = {}
+        if not isinstance(stats_json, dict):
+            return processed_stats
+        if stats_json.get('stats') and isinstance(stats_json['stats'], list):
+            processed_stats = self._process_response_stats_json(
+                stats_json['stats'], source, lang_id_name=lang_id_name)
+        if source == TRANSPLATFORM_ENGINES[1] and not processed_stats:
+            processed_stats = self._process_response_stats_json_tx(
+                stats_json, lang_id_name=lang_id_name)
+        return processed_stats
+
+    def _process_response_stats_json(self, stats_json, engine=None, lang_id_name=None):
 
         locale_key = 'locale'
         if engine and engine == TRANSPLATFORM_ENGINES[3]:
             locale_key = 'code'
 
-        lang_id_name = self.get_lang_id_name_dict() or []
+        lang_id_name = lang_id_name or self.get_lang_id_name_dict() or []
+        grouped_stats = {}
+        try:
+            grouped_stats = self.group_n_reduce_stats(locale_key, stats_json)
+        except Exception as e:
+            self.app_logger(
+                'ERROR', "Error while filtering stats, details: " + str(e))
         processed_stats_json = {}
         for locale, l_alias in list(lang_id_name.keys()):
-            filter_stat = {}
-            try:
-                filter_stat = self.filter_n_reduce_stats(
-                    locale_key, locale, l_alias, stats_json
-                )
-            except Exception as e:
-                self.app_logger(
-                    'ERROR', "Error while filtering stats, details: " + str(e))
-            else:
-                filter_stat = filter_stat[0] \
-                    if isinstance(filter_stat, list) and len(filter_stat) > 0 else {}
+            filter_stat = grouped_stats.get(locale, {})
             processed_stats_json[locale] = {}
             processed_stats_json[locale]['Total'] = filter_stat.get('total', 0)
             processed_stats_json[locale]['Translated'] = filter_stat.get('translated', 0)
@@ -627,27 +1026,29 @@ class PackagesManager(InventoryManager):
             processed_stats_json[locale]['Remaining'] = round(remaining, 2)
         return processed_stats_json
 
-    def _process_response_stats_json_tx(self, stats_json):
-        lang_id_name = self.get_lang_id_name_dict() or []
+    def _process_response_stats_json_tx(self, stats_json, lang_id_name=None):
+        lang_id_name = lang_id_name or self.get_lang_id_name_dict() or []
+        active_locales = {locale for locale, alias in lang_id_name.keys()}
 
         processed_stats_json = {}
-        for lang_alias_tuple in lang_id_name.keys():
-            for locale, stats in stats_json.items():
-                if locale in lang_alias_tuple:
-                    filter_stats = {}
-                    filter_stats['Translated'] = stats.get('translated_entities', 0)
-                    filter_stats['Untranslated'] = stats.get('untranslated_entities', 0)
-                    total_entities = stats.get('translated_entities', 0) + stats.get('untranslated_entities', 0)
-                    filter_stats['Total'] = total_entities
-                    remaining = 0
-                    try:
-                        remaining = (stats.get('untranslated_entities', 0.0) /
-                                     total_entities) * 100
-                    except ZeroDivisionError:
-                        # log error, pass for now
-                        pass
-                    filter_stats['Remaining'] = round(remaining, 2)
-                    processed_stats_json.update({lang_alias_tuple[0]: filter_stats})
+        for locale, stats in stats_json.items():
+            locale = locale_resolver.resolve(locale)
+            if locale not in active_locales:
+                continue
+            filter_stats = {}
+            filter_stats['Translated'] = stats.get('translated_entities', 0)
+            filter_stats['Untranslated'] = stats.get('untranslated_entities', 0)
+            total_entities = stats.get('translated_entities', 0) + stats.get('untranslated_entities', 0)
+            filter_stats['Total'] = total_entities
+            remaining = 0
+            try:
+                remaining = (stats.get('untranslated_entities', 0.0) /
+                             total_entities) * 100
+            except ZeroDivisionError:
+                # log error, pass for now
+                pass
+            filter_stats['Remaining'] = round(remaining, 2)
+            processed_stats_json.update({locale: filter_stats})
         return processed_stats_json
 
     def refresh_package(self, package_name):
@@ -734,83 +1135,133 @@ class PackagesManager(InventoryManager):
             self.update_package(package, {'stats_diff': json.dumps(polished_stats_diff)})
         return polished_stats_diff
 
+    def get_outdated_build_candidates(self, candidates):
+        """
+        Filter candidates, new builds of which are not synced yet
+            latest builds of all candidates are fetched in koji multicalls
+            per hub, and compared against build details cached so far
+        :param candidates: list of (package_name, build_system, build_tag)
+        :return: list of outdated candidates, in given order
+        """
+        candidates = [tuple(candidate) for candidate in candidates]
+        if not candidates:
+            return []
+
+        cached_builds = {
+            (package_name, build_system, build_tag): build_details
+            for package_name, build_system, build_tag, build_details in
+            CacheBuildDetails.objects.filter(
+                package_name__in={candidate[0] for candidate in candidates}
+            ).values_list('package_name', 'build_system', 'build_tag', 'build_details_json_str')
+        }
+
+        latest_builds = {}
+        for build_system in {candidate[1] for candidate in candidates}:
+            product = self.get_release_streams(built=build_system)
+            product_hub_url = product.first().product_server if product else ''
+            tag_packages = [(build_tag, package_name) for package_name, system, build_tag
+                            in candidates if system == build_system]
+            try:
+                builds = self.api_resources.latest_builds_batch(
+                    hub_url=product_hub_url, tag_packages=tag_packages
+                )
+            except Exception as e:
+                # unknown latest builds are synced anyway
+                self.app_logger(
+                    'ERROR', "Latest builds of %s could not be fetched, details: %s" % (
+                        build_system, str(e)))
+                continue
+            latest_builds.update({
+                (package_name, build_system, build_tag): build_list
+                for (build_tag, package_name), build_list in builds.items()
+            })
+
+        outdated_candidates = []
+        for candidate in candidates:
+            build_list = latest_builds.get(candidate)
+            if build_list is None or candidate not in cached_builds:
+                outdated_candidates.append(candidate)
+                continue
+            latest_build = build_list[0] if build_list else {}
+            if CacheBuildDetails.str2json(cached_builds[candidate]) != latest_build:
+                outdated_candidates.append(candidate)
+        return outdated_candidates
+
     def is_package_build_latest(self, params):
         """
         Determine if new build is available for the package
         :param params: package_name, build_system, build_tag
         :return: boolean - True or False
         """
-        if not isinstance(params, (list, tuple)) and not len(params) == 3:
+        if not isinstance(params, (list, tuple)) or not len(params) == 3:
             return
-        package_name, build_system, build_tag = params
-        product_hub_url = ''
-        product = self.get_release_streams(built=build_system)
-        if product:
-            product_hub_url = product.first().product_server
-
-        try:
-            builds = self.api_resources.build_info(
-                hub_url=product_hub_url,
-                tag=build_tag,
-                pkg=package_name
-            )
-
-            latest_build = {}
-            if builds and len(builds) > 0:
-                latest_build = builds[0]
-
-            kwargs = {}
-            package_qs = self.get_packages(pkgs=[package_name])
-            kwargs.update(dict(package_name=package_qs.get()))
-            kwargs.update(dict(build_system=build_system))
-            kwargs.update(dict(build_tag=build_tag))
-
-            try:
-                cache_build_detail = CacheBuildDetails.objects.filter(**kwargs)
-            except Exception as e:
-                return False
-            else:
-                if cache_build_detail and \
-                        cache_build_detail.first().build_details_json == latest_build:
-                    return True
-        except Exception:
-            return False
-
-        return
+        return not self.get_outdated_build_candidates([params])
 
     def get_build_system_stats_by_release(self, release=None):
         """
         Get Build System Stats by Release
-        :param release:
-        :return:
+            a build is counted for the first release of package branch
+            mapping, whose build tag it contains, locale stats of builds
+            of a release are summed up in db
+        :param release: release branch slug
+        :return: dict {release: {locale: stats}}
         """
         releases = self.release_manager.get_release_branches(relbranch=release)
-        build_system_stats_query_set = self.syncstats_manager.get_build_system_stats()
         stats_by_release = {release.release_slug: {} for release in releases}
-
-        for sync_stats in build_system_stats_query_set:
-            if isinstance(sync_stats.stats_raw_json, dict) and sync_stats.stats_raw_json.get('stats'):
-                processed_stats = self._process_response_stats_json(sync_stats.stats_raw_json['stats'])
-                pkg_branch_map = sync_stats.package_name.release_branch_mapping_json
-
-                respective_release = [r for r, d in pkg_branch_map.items()
-                                      if d and d.get(BRANCH_MAPPING_KEYS[2]) in sync_stats.project_version]
-                if respective_release and len(respective_release) > 0:
-                    pkg_release = respective_release[0]
-                    if pkg_release in stats_by_release and not stats_by_release.get(pkg_release):
-                        stats_by_release[pkg_release] = processed_stats
-                    else:
-                        for r_locale, r_stats in stats_by_release[pkg_release].items():
-                            for k, v in r_stats.items():
-                                if not k == 'Remaining':
-                                    stats_by_release[pkg_release][r_locale][k] += \
-                                        processed_stats.get(r_locale, {}).get(k, 0)
+        build_system_stats = self.syncstats_manager.get_build_system_stats(fields=(
+            'sync_id', 'project_version', 'package_name__package_name',
+            'package_name__release_branch_mapping'
+        ))
+        if build_system_stats is None:
+            build_system_stats = SyncStats.objects.none()
+        release_builds = {}
+        for sync_stats in build_system_stats.select_related('package_name'):
+            pkg_branch_map = sync_stats.package_name.release_branch_mapping_json or {}
+            respective_release = [r for r, d in pkg_branch_map.items()
+                                  if d and d.get(BRANCH_MAPPING_KEYS[2]) and
+                                  d[BRANCH_MAPPING_KEYS[2]] in (sync_stats.project_version or '')]
+            if respective_release and respective_release[0] in stats_by_release:
+                release_builds.setdefault(respective_release[0], []).append(sync_stats.sync_id)
+
+        for release_slug, sync_ids in release_builds.items():
+            locale_stats = LocaleStats.objects.filter(sync_stats_id__in=sync_ids).values(
+                'locale').annotate(total_sum=Sum('total'), translated_sum=Sum('translated'),
+                                   untranslated_sum=Sum('untranslated')).order_by()
+            for stats in locale_stats:
+                remaining = 0
+                try:
+                    remaining = (stats['untranslated_sum'] / stats['total_sum']) * 100
+                except ZeroDivisionError:
+                    pass
+                stats_by_release[release_slug][stats['locale']] = {
+                    'Total': stats['total_sum'], 'Translated': stats['translated_sum'],
+                    'Untranslated': stats['untranslated_sum'], 'Remaining': round(remaining, 2)
+                }
 
         if release and release in stats_by_release:
             return stats_by_release.get(release, {})
         return stats_by_release
 
 
+def _sync_platform_job(release_wise, package_names, platform_slot, release_priorities=None):
+    """
+    Sync job of the platform worker pool, module level to run in processes too
+    :param release_wise: DamnedLies packages, to be synced together: boolean
+    :param package_names: list
+    :param platform_slot: semaphore capping concurrency of the platform
+    :param release_priorities: dict, of get_release_sync_priorities
+    :return: tuple (dict {package_name: boolean}, Counter of versions)
+    """
+    sync_counts = Counter()
+    try:
+        with platform_slot:
+            return PackagesManager().sync_platform_stats(
+                package_names, release_wise, sync_counts, release_priorities), sync_counts
+    finally:
+        # db connections are per thread (or process), do not leave them open
+        connections.close_all()
+
+
 class PackageBranchMapping(object):
     """
     Creates Branch Mapping
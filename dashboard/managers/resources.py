@@ -17,18 +17,25 @@
 
 from subprocess import Popen, PIPE
 from collections import OrderedDict
+from concurrent.futures import as_completed
 try:
     import koji
 except Exception as e:
     raise Exception("koji could not be imported, details: %s" % e)
 from urllib.parse import urlparse
 
+from django.conf import settings
+from django.db import connections
+
 # dashboard
 from dashboard.constants import (
     TRANSPLATFORM_ENGINES, BUILD_SYSTEMS, RELSTREAM_SLUGS
 )
-from dashboard.converters.xml2dict import parse
 from dashboard.decorators import call_service
+from dashboard.services.consume.fetchpool import fetch_pool
+from dashboard.services.consume.kojisessions import koji_sessions
+from dashboard.services.consume.ratelimit import rate_limiters
+from dashboard.services.consume.streaming import stream_xml_items
 
 
 __all__ = ['APIResources']
@@ -170,34 +177,51 @@ class TransplatformResources(object):
         return translated, fuzzy, untranslated, total
 
     @staticmethod
-    @call_service(TRANSPLATFORM_ENGINES[0])
-    def _fetch_damnedlies_locale_release_stats(base_url, resource, *url_params, **kwargs):
+    def _damnedlies_locale_stat(locale, module_stat=None):
         locale_stat_dict = {}
         locale_stat_dict["unit"] = "MESSAGE"
-        locale_stat_dict["locale"] = url_params[0]
-        response = kwargs.get('rest_response', {})
-        if response.get('content'):
-            json_content = parse(response['content'])
-            gnome_module_categories = json_content['stats']['category'] or []
-            for category in gnome_module_categories:
-                stats_tuple = ()
-                modules = category.get('module')
-                if isinstance(modules, list):
-                    for module in modules:
-                        if module.get('@id') == kwargs.get('package_name', ''):
-                            stats_tuple = \
-                                TransplatformResources._locate_damnedlies_stats(module)
-                elif isinstance(modules, OrderedDict):
-                    if modules.get('@id') == kwargs.get('package_name', ''):
-                        stats_tuple = \
-                            TransplatformResources._locate_damnedlies_stats(modules)
-                if stats_tuple:
-                    locale_stat_dict["translated"] = stats_tuple[0]
-                    locale_stat_dict["untranslated"] = stats_tuple[1]
-                    locale_stat_dict["fuzzy"] = stats_tuple[2]
-                    locale_stat_dict["total"] = stats_tuple[3]
+        locale_stat_dict["locale"] = locale
+        if module_stat:
+            stats_tuple = TransplatformResources._locate_damnedlies_stats(module_stat)
+            locale_stat_dict["translated"] = stats_tuple[0]
+            locale_stat_dict["untranslated"] = stats_tuple[1]
+            locale_stat_dict["fuzzy"] = stats_tuple[2]
+            locale_stat_dict["total"] = stats_tuple[3]
         return locale_stat_dict
 
+    @staticmethod
+    @call_service(TRANSPLATFORM_ENGINES[0])
+    def _fetch_damnedlies_release_document(base_url, resource, *url_params, **kwargs):
+        return kwargs.get('rest_response', {})
+
+    @staticmethod
+    def _fetch_damnedlies_locale_release_stats(base_url, resource, *url_params, **kwargs):
+        """
+        Locale stats of a module, or of all modules in package_names
+            release document is parsed once for all requested modules;
+            modules are not passed to the service call, so that request
+            kwargs, the document is cached by, stay the same for all
+        """
+        package_names = kwargs.pop('package_names', None)
+        package_name = kwargs.pop('package_name', '')
+        response = TransplatformResources._fetch_damnedlies_release_document(
+            base_url, resource, *url_params, **kwargs
+        )
+        modules_stats = {}
+        if response.get('content'):
+            wanted_modules = set(package_names or [package_name])
+            # walk stats/category/module incrementally, keep tracked modules only
+            for module in stream_xml_items(
+                    response['content'], 3,
+                    item_filter=lambda attrs, item: attrs.get('id') in wanted_modules):
+                modules_stats[module['@id']] = module
+        if package_names is not None:
+            return {module_name: TransplatformResources._damnedlies_locale_stat(
+                url_params[0], modules_stats[module_name]) for module_name in modules_stats}
+        return TransplatformResources._damnedlies_locale_stat(
+            url_params[0], modules_stats.get(package_name)
+        )
+
     @staticmethod
     @call_service(TRANSPLATFORM_ENGINES[1])
     def _fetch_transifex_proj_tran_stats(base_url, resource, *url_params, **kwargs):
@@ -366,23 +390,56 @@ class TransplatformResources(object):
         selected_config = method_mapper[translation_platform]
         return self._execute_method(selected_config, *args, **kwargs)
 
+    def fetch_translation_statistics_batch(self, stats_requests):
+        """
+        Fetches translation statistics for many project versions concurrently
+            fetches run on the fetch pool of the process, shared by all
+            package syncs, and requests to a host are paced by its rate limiter
+        :param stats_requests: list of tuples
+            (translation_platform, instance_url, url_params, kwargs)
+            url_params and kwargs are same as of fetch_translation_statistics
+        :return: generator of (stats_request, stats_json) as they complete
+        """
+        def _fetch(stats_request):
+            translation_platform, instance_url, url_params, kwargs = stats_request
+            try:
+                return self.fetch_translation_statistics(
+                    translation_platform, instance_url, *url_params, **(kwargs or {})
+                )
+            finally:
+                # db connections are per thread, do not leave them open
+                connections.close_all()
+
+        if not stats_requests:
+            return
+        futures = {fetch_pool.submit(_fetch, stats_request): stats_request
+                   for stats_request in stats_requests}
+        try:
+            for future in as_completed(futures):
+                try:
+                    stats_json = future.result()
+                except Exception:
+                    stats_json = {}
+                yield futures[future], stats_json
+        finally:
+            # generator closed early: do not leave fetches of it queued
+            for future in futures:
+                future.cancel()
+
 
 class KojiResources(object):
     """
     Koji Resources
     """
 
-    @staticmethod
-    def _session(hub):
-        krb_service = ''
-        if BUILD_SYSTEMS[0] in hub:
-            krb_service = 'brewhub'
-        elif BUILD_SYSTEMS[1] in hub:
-            krb_service = 'kojihub'
-        return koji.ClientSession(
-            hub, opts={'krbservice': krb_service, 'no_ssl_verify': True}
+    def _call_hub(self, hub_url, method, *args, **kwargs):
+        """
+        Call koji hub method on a pooled session,
+            paced by rate limiter of the hub
+        """
+        return rate_limiters.limiter(hub_url).call(
+            koji_sessions.call, hub_url, method, *args, **kwargs
         )
-        # self.session.gssapi_login()
 
     def establish_kerberos_ticket(self):
         """
@@ -402,11 +459,11 @@ class KojiResources(object):
         Get build tags
         """
         all_tags = []
-        active_repos = self._session(hub_url).getActiveRepos()
+        active_repos = self._call_hub(hub_url, 'getActiveRepos')
         tag_starts_with = ''
 
         if BUILD_SYSTEMS[0] in hub_url:
-            all_tags = self._session(hub_url).listTags()
+            all_tags = self._call_hub(hub_url, 'listTags')
             if product.product_slug == RELSTREAM_SLUGS[0]:
                 tag_starts_with = 'rhel'
             elif product.product_slug == RELSTREAM_SLUGS[2]:
@@ -435,13 +492,37 @@ class KojiResources(object):
         return sorted(processed_tags, reverse=True)
 
     def build_info(self, hub_url, tag, pkg):
-        return self._session(hub_url).getLatestBuilds(tag, package=pkg)
+        return self._call_hub(hub_url, 'getLatestBuilds', tag, package=pkg)
+
+    def latest_builds_batch(self, hub_url, tag_packages, batch=None):
+        """
+        Get latest builds of (tag, package) pairs by koji multicalls
+        :param hub_url: koji hub url
+        :param tag_packages: list of (tag, package) tuples
+        :param batch: calls per multicall, defaults to KOJI_MULTICALL_BATCH
+        :return: dict {(tag, package): builds list, None if the call faulted}
+        """
+        batch = batch or getattr(settings, 'KOJI_MULTICALL_BATCH', 100)
+        tag_packages = list(tag_packages)
+        latest_builds = {}
+        with koji_sessions.session(hub_url) as session:
+            for start in range(0, len(tag_packages), batch):
+                calls = tag_packages[start:start + batch]
+                # legacy multicall interface, supported by old and new koji alike
+                session.multicall = True
+                for tag, package in calls:
+                    session.getLatestBuilds(tag, package=package)
+                results = rate_limiters.limiter(hub_url).call(session.multiCall)
+                for tag_package, result in zip(calls, results):
+                    # a fault comes as dict, a result as singleton list
+                    latest_builds[tag_package] = result[0] if isinstance(result, list) else None
+        return latest_builds
 
     def get_build(self, hub_url, build_id):
-        return self._session(hub_url).getBuild(build_id)
+        return self._call_hub(hub_url, 'getBuild', build_id)
 
     def list_RPMs(self, hub_url, build_id):
-        return self._session(hub_url).listRPMs(buildID=build_id)
+        return self._call_hub(hub_url, 'listRPMs', buildID=build_id)
 
     def get_path_info(self, build=None, srpm=None):
         if build and not srpm:
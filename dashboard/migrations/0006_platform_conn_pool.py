@@ -0,0 +1,23 @@
+# Generated by Django 2.0.8 on 2026-10-18 16:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0005_cachebuilddetails'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='platform',
+            name='conn_keep_alive',
+            field=models.BooleanField(default=True, verbose_name='Keep-Alive Connections'),
+        ),
+        migrations.AddField(
+            model_name='platform',
+            name='conn_pool_size',
+            field=models.PositiveSmallIntegerField(default=10, verbose_name='Connection Pool Size'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 2.0.8 on 2026-10-18 16:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0006_platform_conn_pool'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cacheapi',
+            name='response_etag',
+            field=models.CharField(blank=True, max_length=400, null=True),
+        ),
+        migrations.AddField(
+            model_name='cacheapi',
+            name='response_last_modified',
+            field=models.CharField(blank=True, max_length=100, null=True),
+        ),
+    ]
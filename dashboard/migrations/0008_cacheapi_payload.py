@@ -0,0 +1,64 @@
+# Generated by Django 2.0.8 on 2026-10-18 16:59
+
+import json
+import zlib
+
+from django.db import migrations, models
+
+
+def compress_cached_responses(apps, schema_editor):
+    CacheAPI = apps.get_model('dashboard', 'CacheAPI')
+    for cache in CacheAPI.objects.only('response_content').iterator():
+        payload = zlib.compress((cache.response_content or '').encode('utf-8'))
+        CacheAPI.objects.filter(pk=cache.pk).update(
+            response_payload=payload, response_payload_size=len(payload)
+        )
+
+
+def decompress_cached_responses(apps, schema_editor):
+    CacheAPI = apps.get_model('dashboard', 'CacheAPI')
+    for cache in CacheAPI.objects.only('response_payload').iterator():
+        content = zlib.decompress(bytes(cache.response_payload)).decode('utf-8') \
+            if cache.response_payload else ''
+        try:
+            content_json = json.loads(content)
+        except ValueError:
+            content_json = {}
+        CacheAPI.objects.filter(pk=cache.pk).update(
+            response_content=content, response_content_json_str=json.dumps(content_json)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0007_cacheapi_validators'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cacheapi',
+            name='response_payload',
+            field=models.BinaryField(null=True),
+        ),
+        migrations.AddField(
+            model_name='cacheapi',
+            name='response_payload_size',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(compress_cached_responses, decompress_cached_responses),
+        # for reverse, re-added column must be filled in existing rows
+        migrations.AlterField(
+            model_name='cacheapi',
+            name='response_content',
+            field=models.TextField(max_length=10000, default=''),
+        ),
+        migrations.RemoveField(
+            model_name='cacheapi',
+            name='response_content',
+        ),
+        migrations.RemoveField(
+            model_name='cacheapi',
+            name='response_content_json_str',
+        ),
+    ]
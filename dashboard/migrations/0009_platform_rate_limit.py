@@ -0,0 +1,23 @@
+# Generated by Django 2.0.8 on 2026-10-18 17:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0008_cacheapi_payload'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='platform',
+            name='api_max_concurrency',
+            field=models.PositiveSmallIntegerField(default=4, verbose_name='API Max Concurrent Requests'),
+        ),
+        migrations.AddField(
+            model_name='platform',
+            name='api_rate_limit',
+            field=models.FloatField(default=5.0, verbose_name='API Requests per Second'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 2.0.8 on 2026-10-18 17:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0009_platform_rate_limit'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='syncstats',
+            name='stats_fingerprint',
+            field=models.CharField(blank=True, max_length=40, null=True),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 2.0.8 on 2026-10-18 17:26
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def spread_platform_syncs(apps, schema_editor):
+    # existing packages are due evenly over the default interval, not at once
+    Package = apps.get_model('dashboard', 'Package')
+    package_ids = list(Package.objects.order_by('platform_last_updated')
+                       .values_list('package_id', flat=True))
+    interval = getattr(settings, 'PLATFORM_SYNC_INTERVAL_DEFAULT', 12 * 60)
+    now = timezone.now()
+    for index, package_id in enumerate(package_ids):
+        Package.objects.filter(package_id=package_id).update(
+            platform_sync_interval=interval,
+            platform_next_sync=now + timedelta(minutes=interval * index / len(package_ids))
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0010_syncstats_fingerprint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='package',
+            name='platform_next_sync',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='package',
+            name='platform_sync_interval',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.RunPython(spread_platform_syncs, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 2.0.8 on 2026-10-18 17:44
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0011_package_sync_schedule'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LocaleStats',
+            fields=[
+                ('locale_stats_id', models.AutoField(primary_key=True, serialize=False)),
+                ('project_version', models.CharField(max_length=500, null=True)),
+                ('source', models.CharField(max_length=500, null=True)),
+                ('locale', models.CharField(max_length=50, verbose_name='Locale ID')),
+                ('total', models.IntegerField(default=0)),
+                ('translated', models.IntegerField(default=0)),
+                ('fuzzy', models.IntegerField(default=0)),
+                ('untranslated', models.IntegerField(default=0)),
+                ('package_name', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='dashboard.Package', to_field='package_name', verbose_name='Package')),
+                ('sync_stats', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='locale_stats', to='dashboard.SyncStats')),
+            ],
+            options={
+                'db_table': 'ts_localestats',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='localestats',
+            index=models.Index(fields=['package_name', 'project_version', 'source'], name='ts_localest_package_6fbccc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='localestats',
+            index=models.Index(fields=['source', 'locale'], name='ts_localest_source_fd5ac4_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='localestats',
+            unique_together={('sync_stats', 'locale')},
+        ),
+    ]
@@ -15,6 +15,7 @@
 
 # python
 import json
+import zlib
 from uuid import uuid4
 
 # django
@@ -41,6 +42,21 @@ class ModelMixin(object):
         except:
             return {}
 
+    def cached_json(self, field_name):
+        """
+        Decoded json of a text field, memoised per instance
+            decoded again once the field is assigned (or refreshed from db),
+            values are shared between accesses: copy before changing them
+        :param field_name: name of the text field
+        :return: dict
+        """
+        text_value = getattr(self, field_name)
+        json_cache = self.__dict__.setdefault('_json_cache', {})
+        cached = json_cache.get(field_name)
+        if cached is None or cached[0] is not text_value:
+            cached = json_cache[field_name] = (text_value, self.str2json(text_value))
+        return cached[1]
+
 
 class Language(models.Model):
     """
@@ -119,10 +135,22 @@ class Platform(ModelMixin, models.Model):
     auth_token_key = models.CharField(
         max_length=200, null=True, blank=True, verbose_name="Auth Token"
     )
+    conn_pool_size = models.PositiveSmallIntegerField(
+        default=10, verbose_name="Connection Pool Size"
+    )
+    conn_keep_alive = models.BooleanField(
+        default=True, verbose_name="Keep-Alive Connections"
+    )
+    api_rate_limit = models.FloatField(
+        default=5.0, verbose_name="API Requests per Second"
+    )
+    api_max_concurrency = models.PositiveSmallIntegerField(
+        default=4, verbose_name="API Max Concurrent Requests"
+    )
 
     @property
     def projects_json(self):
-        return self.str2json(self.projects_json_str)
+        return self.cached_json('projects_json_str')
 
     def __str__(self):
         return "{0} {1}".format(self.engine_name, self.subject)
@@ -220,7 +248,7 @@ class Release(ModelMixin, models.Model):
 
     @property
     def schedule_json(self):
-        return self.str2json(self.schedule_json_str)
+        return self.cached_json('schedule_json_str')
 
     def __str__(self):
         return self.release_name
@@ -262,6 +290,9 @@ class Package(ModelMixin, models.Model):
     stats_diff = models.TextField(null=True, blank=True)
     stats_diff_last_updated = models.DateTimeField(null=True, blank=True)
     platform_last_updated = models.DateTimeField(null=True, blank=True)
+    # adaptive sync with translation platform: interval (minutes) and next due
+    platform_sync_interval = models.IntegerField(null=True, blank=True)
+    platform_next_sync = models.DateTimeField(null=True, blank=True, db_index=True)
     upstream_last_updated = models.DateTimeField(null=True, blank=True)
     downstream_last_updated = models.DateTimeField(null=True, blank=True)
     translation_file_ext = models.CharField(
@@ -273,20 +304,19 @@ class Package(ModelMixin, models.Model):
 
     @property
     def package_details_json(self):
-        return self.str2json(self.package_details_json_str)
+        return self.cached_json('package_details_json_str')
 
     @property
     def package_name_mapping_json(self):
-        return self.str2json(self.package_name_mapping_json_str)
+        return self.cached_json('package_name_mapping_json_str')
 
     @property
     def release_branch_mapping_json(self):
-        return self.str2json(self.release_branch_mapping)
+        return self.cached_json('release_branch_mapping')
 
     @property
     def release_branch_mapping_health(self):
-        release_branch_mapping_dict = \
-            self.str2json(self.release_branch_mapping)
+        release_branch_mapping_dict = self.release_branch_mapping_json
         if not release_branch_mapping_dict:
             return False
         for release, mapping in release_branch_mapping_dict.items():
@@ -298,11 +328,11 @@ class Package(ModelMixin, models.Model):
 
     @property
     def stats_diff_json(self):
-        return self.str2json(self.stats_diff)
+        return self.cached_json('stats_diff')
 
     @property
     def stats_diff_health(self):
-        stats_diff_dict = self.str2json(self.stats_diff)
+        stats_diff_dict = self.stats_diff_json
         if not stats_diff_dict:
             return True
         for release, diff in stats_diff_dict.items():
@@ -312,7 +342,7 @@ class Package(ModelMixin, models.Model):
 
     @property
     def maintainers_json(self):
-        return self.str2json(self.maintainers)
+        return self.cached_json('maintainers')
 
     def __str__(self):
         return self.package_name
@@ -362,7 +392,7 @@ class JobTemplate(ModelMixin, models.Model):
 
     @property
     def job_template_json(self):
-        return self.str2json(self.job_template_json_str)
+        return self.cached_json('job_template_json_str')
 
     def __str__(self):
         return self.job_template_name
@@ -394,15 +424,15 @@ class Job(ModelMixin, models.Model):
 
     @property
     def job_log_json(self):
-        return self.str2json(self.job_log_json_str)
+        return self.cached_json('job_log_json_str')
 
     @property
     def job_params_json(self):
-        return self.str2json(self.job_params_json_str)
+        return self.cached_json('job_params_json_str')
 
     @property
     def job_output_json(self):
-        return self.str2json(self.job_output_json_str)
+        return self.cached_json('job_output_json_str')
 
     @property
     def duration(self):
@@ -428,21 +458,53 @@ class SyncStats(ModelMixin, models.Model):
     source = models.CharField(max_length=500, null=True)
     stats_raw_json_str = models.TextField(null=True, blank=True)
     stats_processed_json_str = models.TextField(null=True, blank=True)
+    stats_fingerprint = models.CharField(max_length=40, null=True, blank=True)
     sync_iter_count = models.IntegerField()
     sync_visibility = models.BooleanField()
 
     @property
     def stats_raw_json(self):
-        return self.str2json(self.stats_raw_json_str)
+        return self.cached_json('stats_raw_json_str')
 
     @property
     def stats_processed_json(self):
-        return self.str2json(self.stats_processed_json_str)
+        return self.cached_json('stats_processed_json_str')
 
     class Meta:
         db_table = TABLE_PREFIX + 'syncstats'
 
 
+class LocaleStats(models.Model):
+    """
+    Locale Stats Model
+        locale-wise processed stats of synced versions, one row per
+        locale, written along with SyncStats, for aggregation in db
+    """
+    locale_stats_id = models.AutoField(primary_key=True)
+    sync_stats = models.ForeignKey(
+        SyncStats, on_delete=models.CASCADE, related_name='locale_stats'
+    )
+    package_name = models.ForeignKey(
+        Package, on_delete=models.PROTECT,
+        to_field='package_name', verbose_name="Package"
+    )
+    project_version = models.CharField(max_length=500, null=True)
+    source = models.CharField(max_length=500, null=True)
+    locale = models.CharField(max_length=50, verbose_name="Locale ID")
+    total = models.IntegerField(default=0)
+    translated = models.IntegerField(default=0)
+    fuzzy = models.IntegerField(default=0)
+    untranslated = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = TABLE_PREFIX + 'localestats'
+        unique_together = ('sync_stats', 'locale')
+        indexes = [
+            models.Index(fields=['package_name', 'project_version', 'source']),
+            models.Index(fields=['source', 'locale']),
+        ]
+
+
 class GraphRule(models.Model):
     """
     Graph Rules Model
@@ -490,13 +552,27 @@ class CacheAPI(ModelMixin, models.Model):
         models.CharField(max_length=400, blank=True), default=list
     )
     request_kwargs = models.CharField(max_length=1000)
-    response_content = models.TextField(max_length=10000)
-    response_content_json_str = models.TextField(null=True, blank=True)
+    response_payload = models.BinaryField(null=True)
+    response_payload_size = models.PositiveIntegerField(default=0)
+    response_etag = models.CharField(max_length=400, null=True, blank=True)
+    response_last_modified = models.CharField(max_length=100, null=True, blank=True)
     expiry = models.DateTimeField()
 
+    @staticmethod
+    def compress(content):
+        return zlib.compress((content or '').encode('utf-8'))
+
+    @staticmethod
+    def decompress(payload):
+        return zlib.decompress(bytes(payload)).decode('utf-8') if payload else ''
+
+    @property
+    def response_content(self):
+        return self.decompress(self.response_payload)
+
     @property
     def response_content_json(self):
-        return self.str2json(self.response_content_json_str)
+        return self.str2json(self.response_content)
 
     class Meta:
         db_table = TABLE_PREFIX + 'cacheapi'
@@ -543,7 +619,7 @@ class Report(ModelMixin, models.Model):
 
     @property
     def report_json(self):
-        return self.str2json(self.report_json_str)
+        return self.cached_json('report_json_str')
 
     def __str__(self):
         return self.report_subject
@@ -0,0 +1,163 @@
+# Copyright 2019 Red Hat, Inc.
+# All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import json
+import threading
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Sum
+from django.utils import timezone
+
+from dashboard.models import CacheAPI
+
+
+__all__ = ['ResponseLRUCache', 'response_cache', 'sweep_api_cache']
+
+
+class ResponseLRUCache(object):
+    """
+    In-process LRU cache of API responses
+        sits in front of CacheAPI table, entries live until
+        their TTL or db expiry, whichever comes first. Responses
+        are kept as text and decoded on every hit, so that callers
+        get json of their own to change.
+    """
+
+    def __init__(self, max_size=None, ttl=None):
+        self.max_size = max_size or getattr(settings, 'API_RESPONSE_LRU_SIZE', 256)
+        self.ttl = ttl or getattr(settings, 'API_RESPONSE_LRU_TTL', 600)
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, base_url, resource):
+        """
+        Get cached response
+        :param base_url: str
+        :param resource: str
+        :return: tuple (content, json_content) or None
+        """
+        content = self._get_content(base_url, resource)
+        if content is None:
+            return None
+        try:
+            return content, json.loads(content)
+        except ValueError:
+            return content, {}
+
+    def _get_content(self, base_url, resource):
+        key = (base_url, resource)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > timezone.now():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry:
+                del self._entries[key]
+            self.misses += 1
+        return None
+
+    def set(self, base_url, resource, content, expiry=None):
+        """
+        Cache response
+        :param base_url: str
+        :param resource: str
+        :param content: str
+        :param expiry: datetime
+        """
+        key = (base_url, resource)
+        lru_expiry = timezone.now() + timedelta(seconds=self.ttl)
+        if expiry and expiry < lru_expiry:
+            lru_expiry = expiry
+        with self._lock:
+            self._entries[key] = (lru_expiry, content)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, base_url=None, resource=None):
+        """
+        Drop an entry, or all of them
+        """
+        with self._lock:
+            if base_url and resource:
+                self._entries.pop((base_url, resource), None)
+            else:
+                self._entries.clear()
+
+    def reset(self):
+        """
+        Drop entries and counters, as in a forked process
+        """
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.hits = self.misses = 0
+
+    def stats(self):
+        """
+        Cache hit/miss counters
+        :return: dict
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(float(self.hits) / lookups, 2) if lookups else 0.0
+            }
+
+
+response_cache = ResponseLRUCache()
+
+
+def sweep_api_cache(grace_hours=None, max_size_mb=None):
+    """
+    Evict CacheAPI rows
+        rows expired beyond grace period go first (within grace period
+        they are still worth revalidating), then the oldest ones until
+        stored payloads fit in max size
+    :param grace_hours: int
+    :param max_size_mb: int
+    :return: number of rows evicted
+    """
+    grace_hours = grace_hours if grace_hours is not None else \
+        getattr(settings, 'API_CACHE_SWEEP_GRACE_HOURS', 24)
+    max_size = (max_size_mb if max_size_mb is not None else
+                getattr(settings, 'API_CACHE_MAX_SIZE_MB', 256)) * 1024 * 1024
+
+    evicted, _ = CacheAPI.objects.filter(
+        expiry__lt=timezone.now() - timedelta(hours=grace_hours)
+    ).delete()
+
+    stored_size = CacheAPI.objects.aggregate(
+        size=Sum('response_payload_size'))['size'] or 0
+    if stored_size > max_size:
+        # newest rows are kept up to max size, rows expiring no later than
+        # the first one not fitting are evicted, in one statement
+        kept_size, cutoff = 0, None
+        for expiry, payload_size in CacheAPI.objects.order_by('-expiry').values_list(
+                'expiry', 'response_payload_size').iterator():
+            kept_size += payload_size
+            if kept_size > max_size:
+                cutoff = expiry
+                break
+        if cutoff:
+            evicted += CacheAPI.objects.filter(expiry__lte=cutoff).delete()[0]
+    return evicted
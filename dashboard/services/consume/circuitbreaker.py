@@ -0,0 +1,162 @@
+# Copyright 2019 Red Hat, Inc.
+# All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import time
+import logging
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.utils import timezone
+
+from dashboard.services.consume.sessions import HTTPSessionRegistry
+
+
+__all__ = ['CircuitBreaker', 'CircuitBreakerRegistry', 'circuit_breakers']
+
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitBreaker(object):
+    """
+    Circuit breaker for a host
+        opens after consecutive failures, short-circuits calls for
+        a cool-down period and then lets one trial call through
+        (half-open), which closes or re-opens it
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(self, host, failure_threshold, cooldown):
+        self.host = host
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self.last_opened = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def _set_state(self, state):
+        if state != self.state:
+            logger.warning("Circuit breaker for %s is %s (%s consecutive failures)" % (
+                self.host, state, self.failures))
+        self.state = state
+
+    def allow(self):
+        """
+        Should a call to the host be made
+        :return: boolean
+        """
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.cooldown:
+                self._set_state(self.HALF_OPEN)
+            if self.state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def is_tripped(self, since=None):
+        """
+        Is the breaker short-circuiting calls now, or has it opened since a time
+        :param since: datetime
+        :return: boolean
+        """
+        with self._lock:
+            if self.state == self.OPEN and time.monotonic() - self.opened_at < self.cooldown:
+                return True
+            return bool(since and self.last_opened and self.last_opened >= since)
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self._trial_in_flight = False
+            self._set_state(self.CLOSED)
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+                self.last_opened = timezone.now()
+                self._set_state(self.OPEN)
+
+    def status(self):
+        with self._lock:
+            return {
+                'state': self.state,
+                'failures': self.failures,
+                'last_opened': str(self.last_opened) if self.last_opened else None,
+            }
+
+
+class CircuitBreakerRegistry(object):
+    """
+    Circuit breakers, one per host
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._breakers = {}
+
+    def breaker(self, url):
+        """
+        Get (or create) circuit breaker for the host of a url
+        :param url: str
+        :return: CircuitBreaker
+        """
+        host = HTTPSessionRegistry.host_key(url)
+        with self._lock:
+            if host not in self._breakers:
+                self._breakers[host] = CircuitBreaker(
+                    host, getattr(settings, 'CIRCUIT_BREAKER_FAILURES', 5),
+                    getattr(settings, 'CIRCUIT_BREAKER_COOLDOWN', 300)
+                )
+            return self._breakers[host]
+
+    def stats(self):
+        with self._lock:
+            breakers = list(self._breakers.items())
+        return OrderedDict((host, breaker.status()) for host, breaker in breakers)
+
+    def tripped(self, since=None):
+        """
+        Status of breakers which are open now, or opened since a time
+            breakers which opened before and recovered or cooled down
+            since are left out, as of no concern to a later sync
+        :param since: datetime, start of a sync or job
+        :return: dict
+        """
+        with self._lock:
+            breakers = list(self._breakers.items())
+        return OrderedDict((host, breaker.status()) for host, breaker in breakers
+                           if breaker.is_tripped(since))
+
+    def reset(self):
+        """
+        Forget breakers, as in a forked process
+        """
+        self._lock = threading.Lock()
+        self._breakers = {}
+
+
+circuit_breakers = CircuitBreakerRegistry()
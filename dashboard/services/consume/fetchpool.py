@@ -0,0 +1,74 @@
+# Copyright 2019 Red Hat, Inc.
+# All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+
+__all__ = ['FetchPool', 'fetch_pool']
+
+
+class FetchPool(object):
+    """
+    Thread pool for API fetches, one per process
+        package syncs running in threads of their own pool submit their
+        fetches here, so that a process runs at most STATS_FETCH_WORKERS
+        fetches at a time, however many packages sync concurrently.
+        Fetch tasks must not wait on other fetch tasks.
+    """
+
+    def __init__(self, max_workers=None):
+        self.max_workers = max_workers or getattr(settings, 'STATS_FETCH_WORKERS', 8)
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._executor = None
+
+    def submit(self, fn, *args, **kwargs):
+        """
+        Schedule fn on the pool
+        :return: concurrent.futures.Future
+        """
+        with self._lock:
+            if self._pid != os.getpid():
+                # forked: pool threads of the parent do not exist here
+                self._pid, self._executor = os.getpid(), None
+            if not self._executor:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix='fetch'
+                )
+            executor = self._executor
+        return executor.submit(fn, *args, **kwargs)
+
+    def reset(self):
+        """
+        Forget the pool without shutting it down, as in a forked process
+        """
+        with self._lock:
+            self._pid, self._executor = os.getpid(), None
+
+    def shutdown(self, wait=True):
+        """
+        Shut the pool down, a new one is started on next submit
+        """
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=wait)
+
+
+fetch_pool = FetchPool()
@@ -0,0 +1,193 @@
+# Copyright 2019 Red Hat, Inc.
+# All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+try:
+    import koji
+except Exception as e:
+    raise Exception("koji could not be imported, details: %s" % e)
+
+from django.conf import settings
+
+from dashboard.constants import BUILD_SYSTEMS
+
+
+__all__ = ['KojiSessionPool', 'koji_sessions']
+
+
+logger = logging.getLogger(__name__)
+
+# errors after which a session is not trusted any more,
+# requests exceptions derive from OSError
+CONNECTION_ERRORS = (OSError, koji.ServerOffline, koji.RetryError)
+
+
+class KojiSessionPool(object):
+    """
+    Reusable koji client sessions, per hub
+        a session is used by one thread at a time: it is checked out
+        of the idle sessions of its hub, and checked in after the call.
+        Sessions idle longer than KOJI_SESSION_HEALTH_CHECK seconds are
+        pinged before reuse, and sessions which failed to connect are
+        dropped, to be replaced by new ones.
+    """
+
+    def __init__(self, max_idle=None, health_check_after=None):
+        self.max_idle = max_idle or getattr(settings, 'KOJI_SESSION_POOL_SIZE', 4)
+        self.health_check_after = health_check_after or getattr(
+            settings, 'KOJI_SESSION_HEALTH_CHECK', 300)
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._idle = {}
+        self._counters = {}
+
+    @staticmethod
+    def _create_session(hub_url):
+        krb_service = ''
+        if BUILD_SYSTEMS[0] in hub_url:
+            krb_service = 'brewhub'
+        elif BUILD_SYSTEMS[1] in hub_url:
+            krb_service = 'kojihub'
+        return koji.ClientSession(
+            hub_url, opts={'krbservice': krb_service, 'no_ssl_verify': True}
+        )
+
+    @staticmethod
+    def _close_session(session):
+        http_session = getattr(session, 'rsession', None)
+        if http_session:
+            http_session.close()
+
+    @staticmethod
+    def _is_healthy(session):
+        try:
+            session.getAPIVersion()
+        except CONNECTION_ERRORS:
+            return False
+        except Exception:
+            # a fault is an answer of the hub
+            pass
+        return True
+
+    def _count(self, hub_url, counter):
+        hub_counters = self._counters.setdefault(
+            hub_url, OrderedDict([('created', 0), ('reused', 0), ('dropped', 0)]))
+        hub_counters[counter] += 1
+
+    def _checkout(self, hub_url):
+        with self._lock:
+            if self._pid != os.getpid():
+                # forked: connections of idle sessions belong to the parent
+                self._pid, self._idle, self._counters = os.getpid(), {}, {}
+            idle_sessions = self._idle.get(hub_url) or []
+            session, last_used = idle_sessions.pop() if idle_sessions else (None, 0.0)
+
+        if session and time.monotonic() - last_used > self.health_check_after \
+                and not self._is_healthy(session):
+            self._drop(hub_url, session)
+            session = None
+        with self._lock:
+            self._count(hub_url, 'reused' if session else 'created')
+        return session or self._create_session(hub_url)
+
+    def _checkin(self, hub_url, session):
+        if session.multicall:
+            # left with queued calls, not reusable
+            self._drop(hub_url, session)
+            return
+        with self._lock:
+            idle_sessions = self._idle.setdefault(hub_url, [])
+            if len(idle_sessions) < self.max_idle:
+                idle_sessions.append((session, time.monotonic()))
+                return
+        self._close_session(session)
+
+    def _drop(self, hub_url, session):
+        with self._lock:
+            self._count(hub_url, 'dropped')
+        try:
+            self._close_session(session)
+        except Exception:
+            pass
+
+    @contextmanager
+    def session(self, hub_url):
+        """
+        Check out a session of a hub for the block
+        :param hub_url: koji hub url
+        :return: koji.ClientSession
+        """
+        session = self._checkout(hub_url)
+        try:
+            yield session
+        except CONNECTION_ERRORS:
+            self._drop(hub_url, session)
+            raise
+        except Exception:
+            self._checkin(hub_url, session)
+            raise
+        else:
+            self._checkin(hub_url, session)
+
+    def call(self, hub_url, method, *args, **kwargs):
+        """
+        Call koji hub method on a pooled session
+            retried once on a new session, if the connection fails
+        """
+        try:
+            with self.session(hub_url) as session:
+                return getattr(session, method)(*args, **kwargs)
+        except CONNECTION_ERRORS as e:
+            logger.warning("Koji session of %s dropped, reconnecting: %s" % (hub_url, str(e)))
+        with self.session(hub_url) as session:
+            return getattr(session, method)(*args, **kwargs)
+
+    def stats(self):
+        """
+        Session statistics per hub
+        :return: dict
+        """
+        with self._lock:
+            pool_stats = OrderedDict()
+            for hub_url, hub_counters in self._counters.items():
+                pool_stats[hub_url] = dict(hub_counters)
+                pool_stats[hub_url]['idle'] = len(self._idle.get(hub_url) or [])
+        return pool_stats
+
+    def reset(self):
+        """
+        Forget sessions without closing them, as in a forked process
+        """
+        with self._lock:
+            self._pid, self._idle, self._counters = os.getpid(), {}, {}
+
+    def close(self):
+        """
+        Close idle sessions and reset counters
+        """
+        with self._lock:
+            idle_sessions = [session for hub_sessions in self._idle.values()
+                             for session, _ in hub_sessions]
+            self._idle, self._counters = {}, {}
+        for session in idle_sessions:
+            self._close_session(session)
+
+
+koji_sessions = KojiSessionPool()
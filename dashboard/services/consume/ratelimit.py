@@ -0,0 +1,193 @@
+# Copyright 2019 Red Hat, Inc.
+# All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import time
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+
+from dashboard.models import Platform
+from dashboard.services.consume.sessions import HTTPSessionRegistry
+
+
+__all__ = ['AdaptiveRateLimiter', 'RateLimiterRegistry', 'rate_limiters']
+
+
+class AdaptiveRateLimiter(object):
+    """
+    Token bucket with adaptive concurrency for a host
+        requests are spaced by the bucket rate, and the number of requests
+        in flight is capped by a limit which is halved on 429/5xx/failures,
+        reduced when latency rises well above its average and increased
+        additively while the host stays healthy
+    """
+
+    LATENCY_FACTOR = 2.0
+    LATENCY_MIN_RISE = 0.1     # seconds, ignore jitter of fast hosts
+    LATENCY_SMOOTHING = 0.2
+
+    def __init__(self, rate, max_concurrency):
+        self.rate = float(rate or 0)
+        self.burst = max(self.rate, 1.0)
+        self.max_concurrency = max(int(max_concurrency or 1), 1)
+        self.concurrency = float(self.max_concurrency)
+        self.latency = None
+        self._tokens = self.burst
+        self._refilled_at = time.monotonic()
+        self._paused_until = 0.0
+        self._in_flight = 0
+        self._cond = threading.Condition()
+
+    def _refill(self, now):
+        if self.rate:
+            self._tokens = min(self.burst, self._tokens + (now - self._refilled_at) * self.rate)
+        self._refilled_at = now
+
+    def acquire(self):
+        """
+        Block until a request may be sent
+        :return: start time, to be passed to release
+        """
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if now < self._paused_until:
+                    self._cond.wait(self._paused_until - now)
+                elif self._in_flight >= int(self.concurrency):
+                    self._cond.wait()
+                elif self.rate and self._tokens < 1:
+                    self._cond.wait((1 - self._tokens) / self.rate)
+                else:
+                    if self.rate:
+                        self._tokens -= 1
+                    self._in_flight += 1
+                    return now
+
+    def release(self, started, status_code=None, failed=False, retry_after=None):
+        """
+        Record outcome of a request and adapt
+        :param started: float, returned by acquire
+        :param status_code: int
+        :param failed: boolean, request errored out
+        :param retry_after: seconds to pause, as asked by host
+        """
+        now = time.monotonic()
+        latency = now - started
+        with self._cond:
+            self._in_flight -= 1
+            if failed or status_code == 429 or (status_code or 0) >= 500:
+                self.concurrency = max(1.0, self.concurrency / 2)
+                if retry_after:
+                    self._paused_until = max(self._paused_until, now + retry_after)
+            elif self.latency and latency > self.LATENCY_FACTOR * self.latency and \
+                    latency - self.latency > self.LATENCY_MIN_RISE:
+                self.concurrency = max(1.0, self.concurrency * 0.75)
+            else:
+                self.concurrency = min(float(self.max_concurrency),
+                                       self.concurrency + 1.0 / self.concurrency)
+            if not failed:
+                self.latency = latency if self.latency is None else \
+                    (1 - self.LATENCY_SMOOTHING) * self.latency + self.LATENCY_SMOOTHING * latency
+            self._cond.notify_all()
+
+    def call(self, func, *args, **kwargs):
+        """
+        Call func within limits, outcome is judged by status_code of the result
+        """
+        started = self.acquire()
+        try:
+            result = func(*args, **kwargs)
+        except Exception:
+            self.release(started, failed=True)
+            raise
+        status_code = getattr(result, 'status_code', None)
+        retry_after = None
+        if status_code == 429:
+            try:
+                retry_after = float(result.headers.get('Retry-After'))
+            except (AttributeError, TypeError, ValueError):
+                retry_after = None
+        self.release(started, status_code=status_code, retry_after=retry_after)
+        return result
+
+    def state(self):
+        with self._cond:
+            return {
+                'rate': self.rate,
+                'concurrency': round(self.concurrency, 2),
+                'max_concurrency': self.max_concurrency,
+                'in_flight': self._in_flight,
+                'latency': round(self.latency, 3) if self.latency else None,
+            }
+
+
+class RateLimiterRegistry(object):
+    """
+    Rate limiters, one per host
+        rate and max concurrency are picked from the matching
+        Platform, settings defaults apply to other hosts
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._limiters = {}
+
+    @staticmethod
+    def _platform_limits(host):
+        """
+        Fetch rate limits of the platform served by a host
+        :param host: str
+        :return: tuple (rate, max_concurrency)
+        """
+        rate = getattr(settings, 'API_RATE_LIMIT', 5.0)
+        max_concurrency = getattr(settings, 'API_MAX_CONCURRENCY', 4)
+        try:
+            platform = Platform.objects.only(
+                'api_rate_limit', 'api_max_concurrency'
+            ).filter(api_url__startswith=host).first()
+        except Exception:
+            # db may not be reachable, go with defaults
+            pass
+        else:
+            if platform:
+                rate = platform.api_rate_limit
+                max_concurrency = platform.api_max_concurrency or max_concurrency
+        return rate, max_concurrency
+
+    def limiter(self, url):
+        """
+        Get (or create) rate limiter for the host of a url
+        :param url: str
+        :return: AdaptiveRateLimiter
+        """
+        host = HTTPSessionRegistry.host_key(url)
+        with self._lock:
+            if host not in self._limiters:
+                self._limiters[host] = AdaptiveRateLimiter(*self._platform_limits(host))
+            return self._limiters[host]
+
+    def stats(self):
+        with self._lock:
+            limiters = list(self._limiters.items())
+        return OrderedDict((host, limiter.state()) for host, limiter in limiters)
+
+    def reset(self):
+        with self._lock:
+            self._limiters = {}
+
+
+rate_limiters = RateLimiterRegistry()
@@ -0,0 +1,50 @@
+# Copyright 2019 Red Hat, Inc.
+# All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import logging
+
+from dashboard.services.consume.cache import response_cache
+from dashboard.services.consume.circuitbreaker import circuit_breakers
+from dashboard.services.consume.ratelimit import rate_limiters
+from dashboard.services.consume.sessions import http_sessions
+from dashboard.services.consume.singleflight import single_flight
+
+
+__all__ = ['consume_stats_summary']
+
+
+def consume_stats_summary(since=None):
+    """
+    Summary of connection pools, response cache, coalesced calls,
+        rate limiters and circuit breakers, to be logged after a sync
+    :param since: datetime, start of the sync
+    :return: list of tuples (log_level, message)
+    """
+    summary = []
+    for host, pool_stats in http_sessions.stats().items():
+        summary.append((logging.INFO, "HTTP pool %s: %s requests over %s connections, reuse ratio %s" % (
+            host, pool_stats['requests'], pool_stats['connections'], pool_stats['reuse_ratio'])))
+    summary.append((logging.INFO, "API response cache: %(hits)s hits, %(misses)s misses, "
+                                  "hit ratio %(hit_ratio)s" % response_cache.stats()))
+    summary.append((logging.INFO, "API single flight: %(calls)s calls, "
+                                  "%(coalesced)s coalesced" % single_flight.stats()))
+    for host, limiter_state in rate_limiters.stats().items():
+        summary.append((logging.INFO, "Rate limiter %s: concurrency %s of %s, latency %s s" % (
+            host, limiter_state['concurrency'], limiter_state['max_concurrency'],
+            limiter_state['latency'])))
+    for host, breaker_status in circuit_breakers.tripped(since).items():
+        summary.append((logging.WARNING, "Circuit breaker %s: %s, last opened at %s" % (
+            host, breaker_status['state'], breaker_status['last_opened'])))
+    return summary
@@ -13,11 +13,15 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
-import json
+import time
+import random
 import requests
+from collections import namedtuple
 from datetime import timedelta
+from functools import lru_cache
 from requests.auth import HTTPBasicAuth
 
+from django.conf import settings
 from django.utils import timezone
 
 # DamnedLies specific imports
@@ -38,86 +42,56 @@ from .config.weblate import resource_config_dict as weblate_config
 
 from dashboard.constants import TRANSPLATFORM_ENGINES
 from dashboard.models import CacheAPI
+from dashboard.services.consume.cache import response_cache
+from dashboard.services.consume.circuitbreaker import circuit_breakers
+from dashboard.services.consume.ratelimit import rate_limiters
+from dashboard.services.consume.sessions import http_sessions
+from dashboard.services.consume.singleflight import single_flight
 
 
 NO_CERT_VALIDATION = True
 
 
-__all__ = ['ServiceConfig', 'RestHandle', 'RestClient']
+__all__ = ['ServiceDescriptor', 'compile_service', 'RestHandle', 'RestClient']
 
 
-class ServiceConfig(object):
-    """
-    REST communication service configuration
-    """
-
-    def _set_initials(self, service, resource, auth=None):
-        """
-        Sets initial params
-        """
-
-        master_config_dict = {
-            TRANSPLATFORM_ENGINES[0]: {
-                '_config_dict': damnedlies_config,
-                '_middle_url': '',
-                '_service': damnedlies_resources.get(resource),
-                'http_auth': None
-            },
-            TRANSPLATFORM_ENGINES[1]: {
-                '_config_dict': transifex_config,
-                '_middle_url': "/api/2",
-                '_service': transifex_resources.get(resource),
-                'http_auth': HTTPBasicAuth(*auth) if auth else None
-            },
-            TRANSPLATFORM_ENGINES[2]: {
-                '_config_dict': zanata_config,
-                '_middle_url': '/rest',
-                '_service': zanata_resources.get(resource),
-                'http_auth': None
-            },
-            TRANSPLATFORM_ENGINES[3]: {
-                '_config_dict': weblate_config,
-                '_middle_url': '/api',
-                '_service': weblate_resources.get(resource),
-                'http_auth': None
-            },
-        }
-        required_config = master_config_dict.get(service).copy()
-        for attrib, value in required_config.items():
-            setattr(self, str(attrib), value)
-
-    def __init__(self, service, resource, auth=None):
-        """
-        entry point
-        """
-        self._set_initials(service, resource, auth)
-        for attrib, value in (self._config_dict[self._service.rest_resource]
-                              [self._service.mount_point][self._service.http_method].items()):
-            setattr(self, str(attrib), value)
-
-    @property
-    def resource_group(self):
-        return self._service.rest_resource
-
-    @property
-    def mount_points(self):
-        return list(self._config_dict[self._service.rest_resource].keys())
-
-    @property
-    def resource(self):
-        return self._middle_url + self._service.mount_point
+# engine: (resource config, middle url, service-to-resource mappings)
+SERVICE_CONFIGS = {
+    TRANSPLATFORM_ENGINES[0]: (damnedlies_config, '', damnedlies_resources),
+    TRANSPLATFORM_ENGINES[1]: (transifex_config, '/api/2', transifex_resources),
+    TRANSPLATFORM_ENGINES[2]: (zanata_config, '/rest', zanata_resources),
+    TRANSPLATFORM_ENGINES[3]: (weblate_config, '/api', weblate_resources),
+}
 
-    @property
-    def mount_point(self):
-        return self._service.mount_point
+ServiceDescriptor = namedtuple('ServiceDescriptor', [
+    'resource_group', 'mount_point', 'mount_points', 'resource', 'http_method',
+    'path_params', 'query_string', 'request_media_type', 'response_media_type'
+])
 
-    @property
-    def http_method(self):
-        return self._service.http_method
 
-    @property
-    def auth(self):
-        return self.http_auth
+@lru_cache(maxsize=None)
+def compile_service(service, resource):
+    """
+    Resolve REST communication service configuration, once per resource
+    :param service: platform engine
+    :param resource: resource name
+    :return: ServiceDescriptor
+    """
+    config_dict, middle_url, resources = SERVICE_CONFIGS[service]
+    service_resource = resources.get(resource)
+    mount_points = config_dict[service_resource.rest_resource]
+    method_config = mount_points[service_resource.mount_point][service_resource.http_method]
+    return ServiceDescriptor(
+        resource_group=service_resource.rest_resource,
+        mount_point=service_resource.mount_point,
+        mount_points=tuple(mount_points.keys()),
+        resource=middle_url + service_resource.mount_point,
+        http_method=service_resource.http_method,
+        path_params=tuple(method_config.get('path_params') or ()),
+        query_string="&".join(method_config.get('query_params') or ()),
+        request_media_type=method_config.get('request_media_type'),
+        response_media_type=method_config.get('response_media_type'),
+    )
 
 
 class RestHandle(object):
@@ -125,6 +99,8 @@ class RestHandle(object):
     handle for REST communication
     """
 
+    RETRY_STATUS_CODES = (429, 502, 503, 504)
+
     def __init__(self, *args, **kwargs):
         """
         RestHandle constructor
@@ -146,38 +122,63 @@ class RestHandle(object):
         return '%s%s%s' % (self.base_url, self.uri, getattr(self, 'ext')) \
             if hasattr(self, 'ext') else '%s%s' % (self.base_url, self.uri)
 
+    @staticmethod
+    def _retry_delay(attempt, rest_response=None):
+        """
+        Jittered exponential backoff, Retry-After of the host wins if sane
+        """
+        backoff_max = getattr(settings, 'API_RETRY_BACKOFF_MAX', 30)
+        retry_after = getattr(rest_response, 'headers', {}).get('Retry-After') \
+            if rest_response is not None else None
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), backoff_max)
+        backoff = getattr(settings, 'API_RETRY_BACKOFF', 1.0) * (2 ** attempt)
+        return random.uniform(0, min(backoff, backoff_max))
+
     def _call_request(self, uri, http_method, **kwargs):
         # TS consumes read APIs only
 
         if http_method != 'GET':
             return
-        try:
-            # filter kwargs
-            kwargs.pop('body')
-            kwargs.pop('connection_type')
-            # send request
-            rest_response = requests.get(uri, **kwargs)
-            return rest_response
-        except requests.ConnectionError:
-            # event of a network problem (e.g. DNS failure, refused connection, etc)
-            return False
-        except requests.HTTPError:
-            # the HTTP request returned an unsuccessful status code
-            # Need to check its an 404, 503, 500, 403 etc.
-
-            # todo
-            # error handling on the basis on status code
-
-            return False
-        except requests.Timeout:
-            # requests Times out
-            return False
-        except requests.TooManyRedirects:
-            # exceeds the configured number of maximum redirections
-            return False
-        except Exception:
-            # requests.exceptions.RequestException.
+        breaker = circuit_breakers.breaker(uri)
+        if not breaker.allow():
+            # host is failing, do not wait on it for cool-down period
             return False
+        # filter kwargs
+        kwargs.pop('body', None)
+        kwargs.pop('connection_type', None)
+        kwargs.setdefault('timeout', getattr(settings, 'API_REQUEST_TIMEOUT', (5, 60)))
+
+        retries = getattr(settings, 'API_REQUEST_RETRIES', 3)
+        for attempt in range(retries + 1):
+            rest_response = None
+            try:
+                # send request, through keep-alive session and rate limiter of the host
+                rest_response = rate_limiters.limiter(uri).call(http_sessions.get, uri, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                # event of a network problem (e.g. DNS failure, refused connection, etc)
+                # or requests times out, GET is idempotent: retry
+                pass
+            except requests.TooManyRedirects:
+                # exceeds the configured number of maximum redirections
+                # host did respond, it is not failing
+                breaker.record_success()
+                return False
+            except Exception:
+                # requests.exceptions.RequestException.
+                breaker.record_failure()
+                return False
+            else:
+                if rest_response.status_code not in self.RETRY_STATUS_CODES:
+                    if rest_response.status_code >= 500:
+                        breaker.record_failure()
+                    else:
+                        breaker.record_success()
+                    return rest_response
+            if attempt < retries:
+                time.sleep(self._retry_delay(attempt, rest_response))
+        breaker.record_failure()
+        return rest_response if rest_response is not None else False
 
     def get_response_dict(self):
         request_args = ('body', 'headers', 'connection_type', 'auth')
@@ -190,6 +191,12 @@ class RestHandle(object):
 
         response = self._call_request(self._get_url(), self.method, **args_dict)
         response_dict = {}
+        if response is not False and response is not None and \
+                response.status_code == 304:
+            # cached response is still valid, there is no body to parse
+            response_dict.update(dict(status_code=response.status_code))
+            response_dict.update(dict(headers=response.headers))
+            return response_dict
         if response and response.ok:
             try:
                 response_dict.update(dict(json_content=response.json()))
@@ -204,31 +211,6 @@ class RestHandle(object):
         return response_dict
 
 
-def cache_api_response():
-    """
-    decorator to check db for API response
-    :return: response dict
-    """
-    def response_decorator(caller):
-        def inner_decorator(obj, base_url, resource, *args, **kwargs):
-            try:
-                fields = ['expiry', 'response_raw']
-                filter_params = {
-                    'base_url': base_url,
-                    'resource': resource,
-                }
-                cache = CacheAPI.objects.only(*fields).filter(**filter_params).first() or []
-            except Exception as e:
-                # log error
-                pass
-            else:
-                if timezone.now() > cache[0]:
-                    return cache[1]
-            return caller(obj, base_url, resource, *args, **kwargs)
-        return inner_decorator
-    return response_decorator
-
-
 class RestClient(object):
 
     """
@@ -246,7 +228,7 @@ class RestClient(object):
     def disable_ssl_cert_validation(self):
         self.disable_ssl_certificate_validation = True
 
-    def _save_response(self, req_base_url, req_resource, resp_content, resp_content_json,
+    def _save_response(self, req_base_url, req_resource, resp_content, resp_headers,
                        *req_args, **req_kwargs):
         """
         Save API responses in db
@@ -259,8 +241,11 @@ class RestClient(object):
         cache_params.update(match_params)
         cache_params['request_args'] = req_args
         cache_params['request_kwargs'] = str(req_kwargs)
-        cache_params['response_content'] = resp_content
-        cache_params['response_content_json_str'] = json.dumps(resp_content_json)
+        # content is stored once, compressed; json is decoded from it on demand
+        cache_params['response_payload'] = CacheAPI.compress(resp_content)
+        cache_params['response_payload_size'] = len(cache_params['response_payload'])
+        cache_params['response_etag'] = (resp_headers or {}).get('ETag')
+        cache_params['response_last_modified'] = (resp_headers or {}).get('Last-Modified')
         cache_params['expiry'] = timezone.now() + timedelta(minutes=self.EXPIRY_MIN)
         try:
             CacheAPI.objects.update_or_create(
@@ -270,15 +255,29 @@ class RestClient(object):
             # log error
             pass
 
+    def _refresh_cached_response(self, cache):
+        """
+        Extend expiry of a cached response, upstream reported it unchanged
+        :param cache: CacheAPI object
+        """
+        try:
+            CacheAPI.objects.filter(cache_api_id=cache.cache_api_id).update(
+                expiry=timezone.now() + timedelta(minutes=self.EXPIRY_MIN)
+            )
+        except Exception as e:
+            # log error
+            pass
+
     def _return_cached_response(self, base_url, resource):
         """
         Check cached response in db
         :param base_url:
         :param resource:
-        :return:
+        :return: CacheAPI object or None
         """
         try:
-            fields = ['expiry', 'response_content', 'response_content_json_str']
+            fields = ['expiry', 'response_payload',
+                      'response_etag', 'response_last_modified']
             filter_params = {
                 'base_url': base_url,
                 'resource': resource,
@@ -288,10 +287,7 @@ class RestClient(object):
             # log error
             pass
         else:
-            if cache:
-                if cache.expiry > timezone.now():
-                    return cache.response_content, cache.response_content_json
-        return False, False
+            return cache
 
     def process_request(self, base_url, resource, *args, **kwargs):
         """
@@ -302,45 +298,80 @@ class RestClient(object):
         :param kwargs: dict
         :return: dict
         """
-        headers = kwargs['headers'] if 'headers' in kwargs else {}
+        # callers may reuse their headers, add to a copy
+        headers = dict(kwargs.get('headers') or {})
         body = kwargs['body'] if 'body' in kwargs else None
         extension = kwargs.get('ext')
         # set auth
-        auth_tuple = None
+        http_auth = None
         if kwargs.get('auth_user') and kwargs.get('auth_token'):
             if self.service == TRANSPLATFORM_ENGINES[1]:
-                auth_tuple = (kwargs['auth_user'], kwargs['auth_token'])
+                http_auth = HTTPBasicAuth(kwargs['auth_user'], kwargs['auth_token'])
             elif self.service == TRANSPLATFORM_ENGINES[2]:
                 headers['X-Auth-User'] = kwargs['auth_user']
                 headers['X-Auth-Token'] = kwargs['auth_token']
         # set headers
-        service_details = ServiceConfig(self.service, resource, auth=auth_tuple)
-        if hasattr(service_details, 'response_media_type') and service_details.response_media_type:
+        service_details = compile_service(self.service, resource)
+        if service_details.response_media_type:
             headers['Accept'] = service_details.response_media_type
-        if hasattr(service_details, 'request_media_type') and service_details.request_media_type:
+        if service_details.request_media_type:
             headers['Content-Type'] = service_details.request_media_type
         # set resource
         resource = (
-            service_details.resource.format(**dict(zip(service_details.path_params or [], args)))
+            service_details.resource.format(**dict(zip(service_details.path_params, args)))
             if args else service_details.resource
         )
         if isinstance(extension, bool):   # extension should be boolean
-            ext = "&".join(service_details.query_params)
-            resource = resource + "?" + ext
+            resource = resource + "?" + service_details.query_string
         elif isinstance(extension, str):
             resource = resource + "?" + extension
-        # Lets check with cache
-        c_content, c_json_content = self._return_cached_response(base_url, resource)
-        if c_content:
-            return {'content': c_content, 'json_content': c_json_content}
+        # Lets check with in-process cache first
+        lru_cached = response_cache.get(base_url, resource)
+        if lru_cached:
+            return {'content': lru_cached[0], 'json_content': lru_cached[1]}
+        if self.SAVE_RESPONSE and service_details.http_method == 'GET' and not body:
+            # identical calls in flight wait for this one, and share the response
+            return single_flight.do(
+                (base_url, resource), self._fetch_response, base_url, resource,
+                service_details, http_auth, body, headers, *args, **kwargs
+            )
+        return self._fetch_response(base_url, resource, service_details,
+                                    http_auth, body, headers, *args, **kwargs)
+
+    def _fetch_response(self, base_url, resource, service_details, http_auth,
+                        request_body, request_headers, *args, **kwargs):
+        """
+        Fetch response from db cache, revalidate or call the service
+        :return: dict
+        """
+        cache = self._return_cached_response(base_url, resource)
+        if cache and cache.response_payload:
+            if cache.expiry > timezone.now():
+                response_content = cache.response_content
+                response_json = cache.str2json(response_content)
+                response_cache.set(base_url, resource, response_content, expiry=cache.expiry)
+                return {'content': response_content, 'json_content': response_json}
+            # revalidate expired response with its validators
+            request_headers = dict(request_headers)
+            if cache.response_etag:
+                request_headers['If-None-Match'] = cache.response_etag
+            if cache.response_last_modified:
+                request_headers['If-Modified-Since'] = cache.response_last_modified
         # initiate service call
         rest_handle = RestHandle(
-            base_url, resource, service_details.http_method, auth=service_details.auth,
-            body=body, headers=headers, connection_type=None, cache=None,
+            base_url, resource, service_details.http_method, auth=http_auth,
+            body=request_body, headers=request_headers, connection_type=None, cache=None,
             disable_ssl_certificate_validation=self.disable_ssl_certificate_validation
         )
         api_response_dict = rest_handle.get_response_dict()
-        if self.SAVE_RESPONSE:
+        if api_response_dict.get('status_code') == 304 and cache:
+            self._refresh_cached_response(cache)
+            response_content = cache.response_content
+            response_json = cache.str2json(response_content)
+            response_cache.set(base_url, resource, response_content)
+            return {'content': response_content, 'json_content': response_json}
+        if self.SAVE_RESPONSE and api_response_dict.get('content') is not None:
             self._save_response(base_url, resource, api_response_dict['content'],
-                                api_response_dict['json_content'], *args, **kwargs)
+                                api_response_dict.get('headers'), *args, **kwargs)
+            response_cache.set(base_url, resource, api_response_dict['content'])
         return api_response_dict
@@ -0,0 +1,151 @@
+# Copyright 2019 Red Hat, Inc.
+# All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import threading
+import requests
+from collections import OrderedDict
+from urllib.parse import urlparse
+from requests.adapters import HTTPAdapter
+
+from django.conf import settings
+
+from dashboard.models import Platform
+
+
+__all__ = ['HTTPSessionRegistry', 'http_sessions']
+
+
+class HTTPSessionRegistry(object):
+    """
+    Keep-alive HTTP sessions, one per host
+        pool size and keep-alive are picked from the matching
+        Platform, settings defaults apply to other hosts
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sessions = {}
+        self._requests_count = {}
+
+    @staticmethod
+    def host_key(url):
+        """
+        Determine host key (scheme://netloc) of a url
+        """
+        parsed_url = urlparse(url)
+        return "{0}://{1}".format(parsed_url.scheme, parsed_url.netloc)
+
+    @staticmethod
+    def _platform_pool_config(host):
+        """
+        Fetch pool config of the platform served by a host
+        :param host: str
+        :return: tuple (pool_size, keep_alive)
+        """
+        pool_size = getattr(settings, 'HTTP_POOL_MAXSIZE', 10)
+        keep_alive = getattr(settings, 'HTTP_KEEP_ALIVE', True)
+        try:
+            platform = Platform.objects.only(
+                'conn_pool_size', 'conn_keep_alive'
+            ).filter(api_url__startswith=host).first()
+        except Exception:
+            # db may not be reachable, go with defaults
+            pass
+        else:
+            if platform:
+                pool_size = platform.conn_pool_size or pool_size
+                keep_alive = platform.conn_keep_alive
+        return pool_size, keep_alive
+
+    def _create_session(self, host):
+        pool_size, keep_alive = self._platform_pool_config(host)
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=getattr(settings, 'HTTP_POOL_CONNECTIONS', 1),
+            pool_maxsize=pool_size
+        )
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        if not keep_alive:
+            session.headers['Connection'] = 'close'
+        return session
+
+    def session(self, url):
+        """
+        Get (or create) session for the host of a url
+        :param url: str
+        :return: requests.Session
+        """
+        host = self.host_key(url)
+        with self._lock:
+            if host not in self._sessions:
+                self._sessions[host] = self._create_session(host)
+                self._requests_count[host] = 0
+            self._requests_count[host] += 1
+            return self._sessions[host]
+
+    def get(self, url, **kwargs):
+        """
+        HTTP GET through the host session
+        """
+        return self.session(url).get(url, **kwargs)
+
+    def stats(self):
+        """
+        Pool statistics per host
+        :return: dict
+        """
+        pool_stats = OrderedDict()
+        with self._lock:
+            sessions = list(self._sessions.items())
+            requests_count = dict(self._requests_count)
+        for host, session in sessions:
+            connections = 0
+            adapters = {id(adapter): adapter for adapter in session.adapters.values()}
+            for adapter in adapters.values():
+                pools = adapter.poolmanager.pools
+                for pool_key in pools.keys():
+                    pool = pools.get(pool_key)
+                    connections += getattr(pool, 'num_connections', 0) if pool else 0
+            total_requests = requests_count.get(host, 0)
+            reused = max(total_requests - connections, 0)
+            pool_stats[host] = {
+                'requests': total_requests,
+                'connections': connections,
+                'reuse_ratio': round(float(reused) / total_requests, 2) if total_requests else 0.0
+            }
+        return pool_stats
+
+    def reset(self):
+        """
+        Forget sessions without closing them, as in a forked
+            process, where their connections belong to the parent
+        """
+        with self._lock:
+            self._sessions = {}
+            self._requests_count = {}
+
+    def close(self):
+        """
+        Close all sessions and reset counters
+        """
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions = {}
+            self._requests_count = {}
+
+
+http_sessions = HTTPSessionRegistry()
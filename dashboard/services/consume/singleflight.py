@@ -0,0 +1,213 @@
+# Copyright 2019 Red Hat, Inc.
+# All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import copy
+import time
+import hashlib
+import logging
+import threading
+
+from django.conf import settings
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+
+__all__ = ['SingleFlight', 'single_flight']
+
+
+logger = logging.getLogger(__name__)
+
+
+def max_call_time():
+    """
+    Seconds an API call may take, all attempts timing out
+        attempts of API_REQUEST_RETRIES, each up to API_REQUEST_TIMEOUT
+        (connect and read), and backoff between them
+    :return: float
+    """
+    request_timeout = getattr(settings, 'API_REQUEST_TIMEOUT', (5, 60))
+    if isinstance(request_timeout, (tuple, list)):
+        request_timeout = sum(request_timeout)
+    retries = getattr(settings, 'API_REQUEST_RETRIES', 3)
+    return (retries + 1) * float(request_timeout) + \
+        retries * getattr(settings, 'API_RETRY_BACKOFF_MAX', 30)
+
+
+class _Call(object):
+    """
+    An in-flight call, shared by its waiters
+    """
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight(object):
+    """
+    Coalesce identical in-flight calls
+        Within a process, callers of a key wait for the one call in
+        flight and get a copy of its result each. Across processes
+        (celery workers), the call is made holding a redis lock for the
+        key, renewed while the call runs, so the func should look up the
+        shared cache first: workers which waited on the lock find the
+        result there. Without redis, only in-process calls are coalesced.
+    """
+
+    LOCK_PREFIX = 'transtats:singleflight:'
+    REDIS_RETRY_AFTER = 60   # seconds, after redis turns out unreachable
+
+    def __init__(self, redis_url=None, lock_timeout=None, lock_wait=None):
+        self.redis_url = redis_url
+        # a call may take long, if all attempts of it time out
+        self.lock_timeout = lock_timeout or getattr(
+            settings, 'SINGLE_FLIGHT_LOCK_TIMEOUT', None) or max_call_time()
+        self.lock_wait = lock_wait or getattr(
+            settings, 'SINGLE_FLIGHT_LOCK_WAIT', None) or max_call_time()
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._redis = None
+        self._redis_down_until = 0.0
+        self.calls = 0
+        self.coalesced = 0
+
+    def _redis_client(self):
+        if redis is None:
+            return None
+        with self._lock:
+            if time.monotonic() < self._redis_down_until:
+                return None
+            if self._redis is None:
+                redis_url = self.redis_url or getattr(settings, 'BROKER_URL', None)
+                if not redis_url or not redis_url.startswith('redis'):
+                    self._redis_down_until = float('inf')
+                    return None
+                self._redis = redis.Redis.from_url(
+                    redis_url, socket_connect_timeout=2, socket_timeout=self.lock_wait + 5
+                )
+            return self._redis
+
+    def _redis_failed(self, e):
+        with self._lock:
+            self._redis_down_until = time.monotonic() + self.REDIS_RETRY_AFTER
+        logger.warning("Single flight continues without redis lock: %s" % str(e))
+
+    def _distributed_lock(self, key):
+        """
+        Acquire redis lock of a key
+        :return: lock or None
+        """
+        client = self._redis_client()
+        if not client:
+            return None
+        lock_name = self.LOCK_PREFIX + hashlib.sha1(repr(key).encode('utf-8')).hexdigest()
+        lock = client.lock(lock_name, timeout=self.lock_timeout,
+                           blocking_timeout=self.lock_wait)
+        try:
+            # a holder slower than lock_wait is not waited for any longer
+            return lock if lock.acquire() else None
+        except redis.RedisError as e:
+            self._redis_failed(e)
+            return None
+
+    def _renew_lock(self, lock, call_done):
+        """
+        Extend the lock every third of its timeout, until the call is done
+        """
+        while not call_done.wait(self.lock_timeout / 3.0):
+            try:
+                lock.extend(self.lock_timeout, replace_ttl=True)
+            except redis.RedisError as e:
+                # lost meanwhile, or redis went away
+                logger.warning("Single flight lock could not be renewed: %s" % str(e))
+                return
+
+    def _call_holding_lock(self, key, func, *args, **kwargs):
+        lock = self._distributed_lock(key)
+        if not lock:
+            return func(*args, **kwargs)
+        call_done = threading.Event()
+        renewer = threading.Thread(target=self._renew_lock, args=(lock, call_done), daemon=True)
+        renewer.start()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            call_done.set()
+            renewer.join()
+            try:
+                lock.release()
+            except redis.RedisError:
+                # expired meanwhile, or redis went away
+                pass
+
+    def do(self, key, func, *args, **kwargs):
+        """
+        Call func once for all concurrent callers of a key
+        :param key: hashable
+        :param func: callable
+        :return: result of func, a copy of it for each coalesced caller
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.calls += 1
+            else:
+                call.waiters += 1
+                self.coalesced += 1
+        if not leader:
+            call.done.wait()
+            if call.error:
+                raise call.error
+            return copy.deepcopy(call.result)
+        try:
+            call.result = self._call_holding_lock(key, func, *args, **kwargs)
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        # the result is copied by waiters, it is not handed out as such
+        return copy.deepcopy(call.result) if call.waiters else call.result
+
+    def reset(self):
+        """
+        Forget calls in flight and the redis client, as in a forked
+            process, where neither the leaders of those calls nor the
+            connection (nor a holder of the lock) made it across
+        """
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._redis = None
+        self._redis_down_until = 0.0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'calls': self.calls,
+                'coalesced': self.coalesced,
+                'in_flight': len(self._calls),
+            }
+
+
+single_flight = SingleFlight()
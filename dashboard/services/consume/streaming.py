@@ -0,0 +1,95 @@
+# Copyright 2019 Red Hat, Inc.
+# All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+from collections import OrderedDict
+
+from dashboard.converters.xml2dict import parse
+
+
+__all__ = ['stream_xml_items']
+
+
+CHUNK_SIZE = 64 * 1024
+
+
+class _ChunkReader(object):
+    """
+    File-like reader over text/bytes chunks, for expat ParseFile
+    """
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._buffer = b''
+
+    def read(self, size=-1):
+        while size < 0 or len(self._buffer) < size:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            self._buffer += chunk.encode('utf-8') if isinstance(chunk, str) else chunk
+        if size < 0:
+            data, self._buffer = self._buffer, b''
+        else:
+            data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+
+def _iter_chunks(xml_source, chunk_size):
+    if isinstance(xml_source, (str, bytes)):
+        for offset in range(0, len(xml_source), chunk_size):
+            yield xml_source[offset:offset + chunk_size]
+    elif hasattr(xml_source, 'iter_content'):
+        # requests response with stream=True
+        for chunk in xml_source.iter_content(chunk_size=chunk_size):
+            yield chunk
+    elif hasattr(xml_source, 'read'):
+        for chunk in iter(lambda: xml_source.read(chunk_size), b''):
+            if not chunk:
+                break
+            yield chunk
+    else:
+        for chunk in xml_source:
+            yield chunk
+
+
+def stream_xml_items(xml_source, item_depth, item_filter=None, chunk_size=CHUNK_SIZE):
+    """
+    Walk XML elements at item_depth incrementally, keep the wanted ones
+        Elements are built one at a time and dropped unless item_filter
+        accepts them, so memory stays bounded by the largest kept item
+        rather than by the whole document.
+    :param xml_source: str, bytes, file-like, response or iterable of chunks
+    :param item_depth: depth of elements to walk, root is 1: int
+    :param item_filter: callable(attrs, item) returns boolean
+    :param chunk_size: int
+    :return: list of items, element attributes merged with '@' prefix
+    """
+    items = []
+
+    def _collect(path, item):
+        attrs = path[-1][1] or {}
+        if item_filter and not item_filter(attrs, item):
+            return True
+        element = OrderedDict(('@' + key, value) for key, value in attrs.items())
+        if isinstance(item, dict):
+            element.update(item)
+        elif item is not None:
+            element['#text'] = item
+        items.append(element)
+        return True
+
+    parse(_ChunkReader(_iter_chunks(xml_source, chunk_size)),
+          item_depth=item_depth, item_callback=_collect)
+    return items
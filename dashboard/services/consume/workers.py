@@ -0,0 +1,40 @@
+# Copyright 2019 Red Hat, Inc.
+# All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+from dashboard.services.consume.cache import response_cache
+from dashboard.services.consume.circuitbreaker import circuit_breakers
+from dashboard.services.consume.fetchpool import fetch_pool
+from dashboard.services.consume.kojisessions import koji_sessions
+from dashboard.services.consume.ratelimit import rate_limiters
+from dashboard.services.consume.sessions import http_sessions
+from dashboard.services.consume.singleflight import single_flight
+
+
+__all__ = ['reset_worker_connections']
+
+
+def reset_worker_connections():
+    """
+    Forget connections, limiter locks, fetch threads, calls in flight,
+        breakers and cached responses inherited from the parent process
+        by fork, to be the initializer of worker processes
+    """
+    http_sessions.reset()
+    koji_sessions.reset()
+    rate_limiters.reset()
+    fetch_pool.reset()
+    single_flight.reset()
+    circuit_breakers.reset()
+    response_cache.reset()
@@ -0,0 +1,461 @@
+# Copyright 2019 Red Hat, Inc.
+# All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+# Local stand-in of translation platforms and koji hub, for offline benchmarks.
+
+import os
+import re
+import json
+import time
+import zlib
+import random
+import hashlib
+import threading
+import requests
+from collections import OrderedDict
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from socketserver import ThreadingMixIn
+from xmlrpc.client import Fault, dumps, loads
+
+from dashboard.constants import TRANSPLATFORM_ENGINES
+from dashboard.services.consume.restclient import SERVICE_CONFIGS
+
+
+__all__ = ['PlatformStandIn']
+
+
+LOCALES = (
+    'ar', 'as', 'bn_IN', 'cs', 'de', 'es', 'fr', 'gu', 'hi', 'hu', 'it', 'ja',
+    'kn', 'ko', 'ml', 'mr', 'nl', 'or', 'pa', 'pl', 'pt', 'pt_BR', 'ru', 'sv',
+    'ta', 'te', 'tr', 'uk', 'zh_CN', 'zh_TW',
+)
+KOJI_PATH = '/kojihub'
+
+
+def _number(*seeds, upper=1000):
+    # stable across runs, so replayed syncs see same stats
+    return zlib.crc32('/'.join(str(seed) for seed in seeds).encode('utf-8')) % upper
+
+
+class _Payloads(object):
+    """
+    Synthetic responses of platform endpoints and koji calls
+    """
+
+    def __init__(self, locales, versions, modules, package_prefix):
+        self.locales = list(locales) if isinstance(locales, (list, tuple)) else \
+            [LOCALES[i] if i < len(LOCALES) else 'x%s' % i for i in range(locales)]
+        self.versions = ['master'] + ['release-%s' % i for i in range(1, versions)]
+        self.packages = ['%s%s' % (package_prefix, i) for i in range(modules)]
+
+    def _locale_stats(self, locale_key, *seeds):
+        stats = []
+        for locale in self.locales:
+            total = 200 + _number(locale, *seeds)
+            translated = _number(locale, 'translated', *seeds, upper=total + 1)
+            stats.append(OrderedDict([
+                (locale_key, locale), ('unit', 'MESSAGE'), ('total', total),
+                ('translated', translated), ('untranslated', total - translated),
+                ('fuzzy', 0),
+            ]))
+        return stats
+
+    # damnedlies
+
+    def dl_modules(self, params):
+        return [{'pk': pk, 'model': 'stats.module', 'fields': {'name': name}}
+                for pk, name in enumerate(self.packages, 1)]
+
+    def dl_releases(self, params):
+        releases = []
+        for pk, version in enumerate(self.versions, 1):
+            status = '(development)' if pk == 1 else '(stable)'
+            releases.append({'pk': pk, 'model': 'stats.release', 'fields': {
+                'name': version, 'description': '%s %s' % (version, status)}})
+        return releases
+
+    def dl_release_stats(self, params):
+        domain = '<domain id="{0}"><translated>{1}</translated>' \
+                 '<fuzzy>{2}</fuzzy><untranslated>{3}</untranslated></domain>'
+        xml_parts = ['<stats><category id="standin">']
+        for name in self.packages:
+            total = 200 + _number(params['locale'], name, params['release_name'])
+            translated = _number(params['locale'], 'translated', name, upper=total + 1)
+            xml_parts.append('<module id="%s">' % name)
+            xml_parts.append(domain.format('po', translated, 0, total - translated))
+            xml_parts.append('</module>')
+        xml_parts.append('</category></stats>')
+        return ''.join(xml_parts)
+
+    # transifex
+
+    def tx_projects(self, params):
+        return [{'slug': name, 'name': name} for name in self.packages]
+
+    def tx_project(self, params):
+        return {'slug': params['project_slug'], 'name': params['project_slug'],
+                'organization': {'slug': 'standin'},
+                'resources': [{'slug': version, 'name': version} for version in self.versions]}
+
+    def tx_stats(self, params):
+        stats = OrderedDict()
+        for locale_stat in self._locale_stats('locale', params['project_slug'],
+                                              params['resource_slug']):
+            stats[locale_stat['locale']] = {
+                'translated_entities': locale_stat['translated'],
+                'untranslated_entities': locale_stat['untranslated'],
+                'completed': '%s%%' % (100 * locale_stat['translated'] // locale_stat['total']),
+            }
+        return stats
+
+    # zanata
+
+    def zanata_projects(self, params):
+        return [{'id': name, 'name': name, 'status': 'ACTIVE'} for name in self.packages]
+
+    def zanata_project(self, params):
+        return {'id': params['projectSlug'], 'name': params['projectSlug'], 'status': 'ACTIVE',
+                'iterations': [{'id': version, 'status': 'ACTIVE'} for version in self.versions]}
+
+    def zanata_stats(self, params):
+        return {'id': params['iterationSlug'], 'stats': self._locale_stats(
+            'locale', params['projectSlug'], params['iterationSlug'])}
+
+    # weblate
+
+    @staticmethod
+    def _page(results):
+        return {'count': len(results), 'next': None, 'previous': None, 'results': results}
+
+    def weblate_projects(self, params):
+        return self._page([{'slug': name, 'name': name} for name in self.packages])
+
+    def weblate_project(self, params):
+        return {'slug': params['project_slug'], 'name': params['project_slug']}
+
+    def weblate_components(self, params):
+        return self._page([{'slug': version, 'name': version} for version in self.versions])
+
+    def weblate_stats(self, params):
+        return self._page(self._locale_stats(
+            'code', params['project_slug'], params.get('component_slug', '')))
+
+    # koji
+
+    def koji_call(self, method, args, kwargs):
+        if method == 'getAPIVersion':
+            return 1
+        if method == 'getActiveRepos':
+            return [{'id': i, 'tag_name': 'f%s-build' % (31 - i)} for i in range(len(self.versions))]
+        if method == 'listTags':
+            return [{'id': i, 'name': 'rhel-8.%s.0-candidate' % i} for i in range(len(self.versions))]
+        if method == 'getLatestBuilds':
+            tag, package = args[0], kwargs.get('package', '')
+            build_id = 1 + _number(tag, package, upper=10 ** 6)
+            return [self._build(build_id, package, tag)]
+        if method == 'getBuild':
+            return self._build(args[0], 'standin', '')
+        if method == 'listRPMs':
+            build_id = kwargs.get('buildID', args[0] if args else 0)
+            return [{'id': build_id, 'build_id': build_id, 'name': 'standin', 'version': '1.0',
+                     'release': '1', 'arch': 'src', 'size': 1024 + _number(build_id),
+                     'payloadhash': hashlib.md5(str(build_id).encode('utf-8')).hexdigest()}]
+        raise Fault(1000, "Invalid method: %s" % method)
+
+    @staticmethod
+    def _build(build_id, package, tag):
+        return {'build_id': build_id, 'id': build_id, 'package_name': package, 'name': package,
+                'version': '1.0', 'release': '1', 'nvr': '%s-1.0-1' % package, 'epoch': None,
+                'tag_name': tag, 'state': 1, 'owner_name': 'standin',
+                'completion_time': '2019-01-01 00:00:00'}
+
+
+# (engine, mount point): payload builder, response media type
+ENDPOINTS = {
+    (TRANSPLATFORM_ENGINES[0], '/module/json'): ('dl_modules', 'application/json'),
+    (TRANSPLATFORM_ENGINES[0], '/releases/json'): ('dl_releases', 'application/json'),
+    (TRANSPLATFORM_ENGINES[0], '/languages/{locale}/{release_name}/xml'):
+        ('dl_release_stats', 'application/xml'),
+    (TRANSPLATFORM_ENGINES[1], '/projects'): ('tx_projects', 'application/json'),
+    (TRANSPLATFORM_ENGINES[1], '/project/{project_slug}/'): ('tx_project', 'application/json'),
+    (TRANSPLATFORM_ENGINES[1], '/project/{project_slug}/resource/{resource_slug}/stats/'):
+        ('tx_stats', 'application/json'),
+    (TRANSPLATFORM_ENGINES[2], '/projects'): ('zanata_projects', 'application/json'),
+    (TRANSPLATFORM_ENGINES[2], '/projects/p/{projectSlug}'): ('zanata_project', 'application/json'),
+    (TRANSPLATFORM_ENGINES[2], '/stats/proj/{projectSlug}/iter/{iterationSlug}'):
+        ('zanata_stats', 'application/json'),
+    (TRANSPLATFORM_ENGINES[3], '/projects/'): ('weblate_projects', 'application/json'),
+    (TRANSPLATFORM_ENGINES[3], '/projects/{project_slug}/'): ('weblate_project', 'application/json'),
+    (TRANSPLATFORM_ENGINES[3], '/projects/{project_slug}/components/'):
+        ('weblate_components', 'application/json'),
+    (TRANSPLATFORM_ENGINES[3], '/projects/{project_slug}/statistics/'):
+        ('weblate_stats', 'application/json'),
+    (TRANSPLATFORM_ENGINES[3], '/components/{project_slug}/{component_slug}/statistics/'):
+        ('weblate_stats', 'application/json'),
+}
+
+
+def _compile_routes():
+    """
+    Regex routes of GET endpoints declared in service configs
+    :return: list of tuples (regex, engine, mount_point)
+    """
+    routes = []
+    for engine, (config_dict, middle_url, _) in SERVICE_CONFIGS.items():
+        for mount_points in config_dict.values():
+            for mount_point, methods in mount_points.items():
+                if 'GET' not in methods:
+                    continue
+                pattern = re.sub(r'[{<](\w+)[}>]', r'(?P<\1>[^/]+)', middle_url + mount_point)
+                routes.append((re.compile('^%s$' % pattern), engine, mount_point))
+    return routes
+
+
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class _Handler(BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+    # headers and body go out in separate writes, on keep-alive connections
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status, content_type, body, headers=None):
+        body = body.encode('utf-8') if isinstance(body, str) else body
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for header, value in (headers or {}).items():
+            self.send_header(header, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _serve(self, request_body=b''):
+        standin = self.server.standin
+        engine = standin.count(self.path)
+        standin.delay()
+        error_status = standin.injected_error()
+        if error_status:
+            return self._reply(error_status, 'text/plain', 'stand-in error',
+                               {'Retry-After': '1'} if error_status == 429 else None)
+        fixture_key = standin.fixture_key(self.command, self.path, request_body)
+        if standin.record_url or standin.record_koji_url:
+            response = standin.record(fixture_key, self.command, self.path,
+                                      request_body, dict(self.headers))
+        else:
+            response = standin.fixture(fixture_key) or \
+                standin.synthesize(engine, self.path, request_body)
+        self._reply(*response)
+
+    def do_GET(self):
+        self._serve()
+
+    def do_POST(self):
+        self._serve(self.rfile.read(int(self.headers.get('Content-Length') or 0)))
+
+
+class PlatformStandIn(object):
+    """
+    Local stand-in of translation platforms and koji hub
+        GET endpoints declared in service configs of all engines are
+        served under the same base url, koji XML-RPC (multicall too) at
+        /kojihub. Responses are synthesized, or replayed from recorded
+        fixtures; in record mode requests are proxied to the real
+        servers and their responses are saved as fixtures.
+    :param latency: mean response delay in seconds
+    :param jitter: deviation of delay, fraction of latency
+    :param error_rate: fraction of requests answered with 429/503
+    :param locales: number of locales in stats, or list of locale codes
+    :param versions: number of versions (components, releases) per project
+    :param modules: number of projects (modules) listed by platforms
+    :param package_prefix: names of listed projects are prefix + index
+    :param fixtures_dir: directory of recorded responses
+    :param record_url: platform server to record responses of
+    :param record_koji_url: koji hub to record responses of
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, jitter=0.2, error_rate=0.0,
+                 locales=10, versions=2, modules=100, package_prefix='standin-',
+                 fixtures_dir=None, record_url=None, record_koji_url=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.fixtures_dir = fixtures_dir
+        self.record_url = record_url.rstrip('/') if record_url else None
+        self.record_koji_url = record_koji_url
+        if (record_url or record_koji_url) and not fixtures_dir:
+            raise ValueError("fixtures_dir is required to record responses")
+        if fixtures_dir and not os.path.isdir(fixtures_dir):
+            os.makedirs(fixtures_dir)
+        self.payloads = _Payloads(locales, versions, modules, package_prefix)
+        self.routes = _compile_routes()
+        self._lock = threading.Lock()
+        self._counters = OrderedDict([('requests', 0), ('errors', 0), ('koji', 0)])
+        self._random = random.Random(0)
+        self._thread = None
+        self.server = _ThreadingHTTPServer((host, port), _Handler)
+        self.server.standin = self
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return "http://%s:%s" % (host, port)
+
+    @property
+    def koji_url(self):
+        return self.url + KOJI_PATH
+
+    def count(self, path):
+        """
+        Count a request, return engine of its route
+        """
+        engine = 'koji' if path.startswith(KOJI_PATH) else self._route(path)[0]
+        with self._lock:
+            self._counters['requests'] += 1
+            if engine:
+                self._counters[engine] = self._counters.get(engine, 0) + 1
+        return engine
+
+    def delay(self):
+        if self.latency:
+            with self._lock:
+                delay = self._random.gauss(self.latency, self.latency * self.jitter)
+            time.sleep(max(delay, 0))
+
+    def injected_error(self):
+        if not self.error_rate:
+            return None
+        with self._lock:
+            if self._random.random() >= self.error_rate:
+                return None
+            self._counters['errors'] += 1
+            return self._random.choice((429, 503))
+
+    def _route(self, path):
+        path = path.split('?', 1)[0]
+        for regex, engine, mount_point in self.routes:
+            match = regex.match(path)
+            if match:
+                return engine, mount_point, match.groupdict()
+        return None, None, {}
+
+    def synthesize(self, engine, path, request_body=b''):
+        """
+        Synthetic response of a request
+        :return: tuple (status, content_type, body)
+        """
+        if engine == 'koji':
+            return 200, 'text/xml', self._koji_response(request_body)
+        engine, mount_point, params = self._route(path)
+        if not engine:
+            return 404, 'text/plain', 'Not Found'
+        builder, content_type = ENDPOINTS.get((engine, mount_point), (None, 'application/json'))
+        if not builder:
+            return 200, content_type, '{}'
+        payload = getattr(self.payloads, builder)(params)
+        return 200, content_type, payload if isinstance(payload, str) else json.dumps(payload)
+
+    def _koji_response(self, request_body):
+        params, method = loads(request_body)
+        try:
+            if method == 'multiCall':
+                result = []
+                for call in params[0]:
+                    try:
+                        result.append([self._koji_call(call['methodName'], call['params'])])
+                    except Fault as e:
+                        result.append({'faultCode': e.faultCode, 'faultString': e.faultString})
+            else:
+                result = self._koji_call(method, params)
+            with self._lock:
+                self._counters['koji_calls'] = self._counters.get('koji_calls', 0) + (
+                    len(params[0]) if method == 'multiCall' else 1)
+            return dumps((result,), methodresponse=True, allow_none=True)
+        except Fault as e:
+            return dumps(e, allow_none=True)
+
+    def _koji_call(self, method, params):
+        args, kwargs = list(params), {}
+        if args and isinstance(args[-1], dict) and args[-1].get('__starstar'):
+            kwargs = dict(args.pop())
+            kwargs.pop('__starstar')
+        return self.payloads.koji_call(method, args, kwargs)
+
+    @staticmethod
+    def fixture_key(method, path, request_body=b''):
+        digest = hashlib.sha1(('%s %s ' % (method, path)).encode('utf-8'))
+        digest.update(request_body or b'')
+        return digest.hexdigest()
+
+    def fixture(self, fixture_key):
+        """
+        Recorded response, if any
+        :return: tuple (status, content_type, body) or None
+        """
+        if not self.fixtures_dir:
+            return None
+        fixture_path = os.path.join(self.fixtures_dir, fixture_key + '.json')
+        if not os.path.isfile(fixture_path):
+            return None
+        with open(fixture_path) as fixture_file:
+            fixture = json.load(fixture_file)
+        return fixture['status'], fixture['content_type'], fixture['body']
+
+    def record(self, fixture_key, method, path, request_body, headers):
+        """
+        Proxy a request to the real server, save response as fixture
+        :return: tuple (status, content_type, body)
+        """
+        forward_headers = {header: value for header, value in headers.items()
+                           if header.lower() in ('accept', 'content-type', 'authorization')}
+        if path.startswith(KOJI_PATH):
+            if not self.record_koji_url:
+                return 404, 'text/plain', 'Not Recording'
+            response = requests.post(self.record_koji_url, data=request_body,
+                                     headers=forward_headers, timeout=60)
+        else:
+            if not self.record_url:
+                return 404, 'text/plain', 'Not Recording'
+            response = requests.get(self.record_url + path, headers=forward_headers, timeout=60)
+        content_type = response.headers.get('Content-Type', 'application/octet-stream')
+        if response.ok:
+            with open(os.path.join(self.fixtures_dir, fixture_key + '.json'), 'w') as fixture_file:
+                json.dump({'request': '%s %s' % (method, path), 'status': response.status_code,
+                           'content_type': content_type, 'body': response.text}, fixture_file)
+        return response.status_code, content_type, response.content
+
+    def stats(self):
+        with self._lock:
+            return OrderedDict(self._counters)
+
+    def start(self):
+        """
+        Serve in a background thread
+        :return: base url
+        """
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self.url
+
+    def serve_forever(self):
+        self.server.serve_forever()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
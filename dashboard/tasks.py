@@ -13,65 +13,143 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
-import os
-import shutil
-import time
-import threading
-import yaml
+import logging
 
+from collections import Counter
 from datetime import timedelta
 
+from celery import chord, shared_task
 from celery.schedules import crontab
 from celery.task import periodic_task
 from celery.utils.log import get_task_logger
 
+from django.conf import settings
 from django.utils import timezone
 
-from dashboard.constants import TS_JOB_TYPES, BRANCH_MAPPING_KEYS
+from dashboard.constants import (
+    TS_JOB_TYPES, SYNC_PRIORITIES
+)
 from dashboard.managers.packages import PackagesManager
-from dashboard.managers.jobs import JobTemplateManager, YMLBasedJobManager
+from dashboard.managers.jobs import JobTemplateManager, DownstreamSyncManager
 from dashboard.managers.graphs import (
     GraphManager, ReportsManager, GeoLocationManager
 )
+from dashboard.services.consume.cache import sweep_api_cache
+from dashboard.services.consume.report import consume_stats_summary
 
 
 logger = get_task_logger(__name__)
 
 
+def _retry_or_give_up(task, exc, failed_result):
+    """
+    Retry a sync subtask with exponential backoff, or give up
+        without raising: chord callback runs only if all subtasks succeed
+    """
+    if task.request.retries < task.max_retries:
+        raise task.retry(exc=exc, countdown=getattr(
+            settings, 'SYNC_SUBTASK_RETRY_DELAY', 60) * 2 ** task.request.retries)
+    logger.error("%s gave up after %s retries: %s" % (task.name, task.max_retries, str(exc)))
+    return failed_result
+
+
 @periodic_task(
-    run_every=(crontab(minute=0, hour='8,20')),
+    run_every=timedelta(minutes=getattr(settings, 'PLATFORM_SYNC_TICK', 15)),
     name="sync_packages_with_platform",
     ignore_result=True
 )
 def task_sync_packages_with_platform():
     """
-    sync all packages with translation platform
+    sync due packages with translation platform
+        packages are due as per how often their stats change; they are
+        synced by subtasks, spread over workers, and reports are rebuilt
+        once all of them complete
     """
 
     package_manager = PackagesManager()
-    reports_manager = ReportsManager()
 
-    def _sync_package(pkg):
-        package_manager.sync_update_package_stats(pkg)
-
-    all_packages = package_manager.get_packages().filter(
-        platform_last_updated__lte=timezone.now() - timedelta(hours=6)
-    ).order_by('platform_url')
-    for package in all_packages:
-        th = threading.Thread(
-            target=_sync_package, args=(package.package_name,)
-        )
-        th.start()
-        th.join()
-        time.sleep(4)
-
-    logger.info("%s Packages sync'd with Translation Platform" % len(all_packages))
+    due_packages = package_manager.claim_packages_due_for_sync(
+        limit=getattr(settings, 'PLATFORM_SYNC_TICK_BATCH', 100))
+    sync_jobs = package_manager.get_platform_sync_jobs(due_packages)
+    if not sync_jobs:
+        return
+    chord(
+        task_sync_platform_stats.s(package_names, release_wise)
+        for _, release_wise, package_names in sync_jobs
+    )(task_rebuild_platform_reports.s())
+
+
+@shared_task(
+    bind=True,
+    name="sync_platform_stats",
+    acks_late=True,
+    max_retries=getattr(settings, 'SYNC_SUBTASK_RETRIES', 3)
+)
+def task_sync_platform_stats(self, package_names, release_wise=False):
+    """
+    sync a package (or DamnedLies packages, release-wise) with translation platform
+    """
+    sync_counts = Counter()
+    sync_started = timezone.now()
+    try:
+        sync_status = PackagesManager().sync_platform_stats(
+            package_names, release_wise, sync_counts)
+    except Exception as e:
+        return _retry_or_give_up(self, e, {
+            'status': {name: False for name in package_names}, 'versions': {}})
+    for log_level, message in consume_stats_summary(since=sync_started):
+        if log_level >= logging.WARNING:
+            logger.log(log_level, message)
+    return {'status': sync_status, 'versions': dict(sync_counts)}
+
+
+@shared_task(name="rebuild_platform_reports", ignore_result=True)
+def task_rebuild_platform_reports(sync_results):
+    """
+    rebuild releases and packages summary, after sync with translation platform
+    """
+    sync_status, sync_counts = {}, Counter()
+    for job_result in sync_results or []:
+        sync_status.update((job_result or {}).get('status', {}))
+        sync_counts.update((job_result or {}).get('versions', {}))
+    logger.info("%s Packages sync'd with Translation Platform, %s updated" % (
+        len(sync_status), len([status for status in sync_status.values() if status])))
+    logger.info("Versions: %s changed, %s unchanged, %s failed" % (
+        sync_counts['changed'], sync_counts['unchanged'], sync_counts['failed']))
+    if not sync_counts['changed']:
+        # summaries are built upon stats, none of which changed
+        return
+
+    reports_manager = ReportsManager()
     if reports_manager.analyse_releases_status():
         logger.info("Releases Summary Updated")
     if reports_manager.analyse_packages_status():
         logger.info("Packages Summary Updated")
 
 
+def _sync_packages_with_build_system(priorities):
+    """
+    sync build tag candidates of releases of given priorities with build system
+        each candidate is synced by a subtask, spread over workers (releases
+        in crunch first), and reports are rebuilt once all of them complete
+    """
+    if not JobTemplateManager().get_job_templates(job_template_type=TS_JOB_TYPES[3]):
+        return
+    package_manager = PackagesManager()
+    candidates, package_names = package_manager.get_build_system_sync_candidates(
+        priorities=priorities
+    )
+    # latest builds of all candidates are checked in bulk, upfront
+    candidates = package_manager.get_outdated_build_candidates(candidates)
+    if not candidates:
+        # stats diff and summaries follow platform stats too, rebuild them anyway
+        task_rebuild_build_system_reports.delay([], package_names)
+        return
+    chord(
+        task_sync_build_system_candidate.s(candidate) for candidate in candidates
+    )(task_rebuild_build_system_reports.s(package_names))
+
+
 @periodic_task(
     run_every=(crontab(minute=0, hour='2')),
     name="sync_packages_with_build_system",
@@ -79,16 +157,57 @@ def task_sync_packages_with_platform():
 )
 def task_sync_packages_with_build_system():
     """
-    sync all packages with build system
+    sync packages with build system
+        releases of low priority (EOL, not tracked) are synced once a week
     """
+    priorities = list(SYNC_PRIORITIES)
+    if timezone.localdate().weekday() != getattr(settings, 'SYNC_LOW_PRIORITY_WEEKDAY', 6):
+        priorities.remove(SYNC_PRIORITIES[2])
+    _sync_packages_with_build_system(priorities)
 
-    package_manager = PackagesManager()
+
+@periodic_task(
+    run_every=(crontab(minute=0, hour='8,14,20')),
+    name="sync_crunch_packages_with_build_system",
+    ignore_result=True
+)
+def task_sync_crunch_packages_with_build_system():
+    """
+    sync packages of releases approaching string freeze or translation
+        deadline with build system, more often than the daily sync
+    """
+    _sync_packages_with_build_system([SYNC_PRIORITIES[0]])
+
+
+@shared_task(
+    bind=True,
+    name="sync_build_system_candidate",
+    acks_late=True,
+    max_retries=getattr(settings, 'SYNC_SUBTASK_RETRIES', 3)
+)
+def task_sync_build_system_candidate(self, candidate):
+    """
+    sync a (package, build system, build tag) candidate with build system
+        candidates come with latest builds checked in bulk already
+    """
+    try:
+        return DownstreamSyncManager().run_job(candidate, check_latest_build=False)
+    except Exception as e:
+        return _retry_or_give_up(self, e, False)
+
+
+@shared_task(name="rebuild_build_system_reports", ignore_result=True)
+def task_rebuild_build_system_reports(sync_results, package_names):
+    """
+    update stats diff of packages, rebuild packages, location and
+        territory summary, after sync with build system
+    """
     graph_manager = GraphManager()
     reports_manager = ReportsManager()
-    job_template_manager = JobTemplateManager()
     location_manager = GeoLocationManager()
 
-    def _update_diff(package):
+    packages = PackagesManager().get_packages(pkgs=package_names) if package_names else []
+    for package in packages:
         try:
             package_stats = graph_manager.get_trans_stats_by_package(
                 package.package_name
@@ -101,80 +220,26 @@ def task_sync_packages_with_build_system():
             # pass for now
             pass
 
-    def _sync_build_system(template, params):
-
-        if package_manager.is_package_build_latest(params):
-            return
-
-        t_params = template.job_template_params
-        if len(t_params) == len(params):
-            job_data = {field.upper(): param
-                        for field, param in zip(t_params, params)}
-            job_data.update({
-                'YML_FILE': yaml.dump(template.job_template_json,
-                                      default_flow_style=False).replace("\'", "")
-            })
-            job_data.update({'SCRATCH': True})
-
-            temp_path = 'false/{0}/'.format('-'.join(params))
-            job_manager = YMLBasedJobManager(
-                **job_data, **{'params': [p.upper() for p in t_params],
-                               'type': TS_JOB_TYPES[3]},
-                **{'active_user_email': 'system@transtats.org'},
-                **{'sandbox_path': temp_path},
-                **{'job_log_file': temp_path + '.log'}
-            )
-
-            try:
-                if os.path.isdir(temp_path):
-                    shutil.rmtree(temp_path)
-                os.mkdir(temp_path)
-                job_manager.execute_job()
-            except Exception as e:
-                # pass for now
-                pass
-            finally:
-                shutil.rmtree(temp_path)
-
-    job_template = None
-    all_packages = package_manager.get_packages().filter(
-        release_branch_mapping__isnull=False
-    )
-    job_templates = job_template_manager.get_job_templates(
-        job_template_type=TS_JOB_TYPES[3]
-    )
-    if job_templates:
-        job_template = job_templates.first()
-
-    if all_packages and job_template:
-        for package in all_packages:
-            candidates = []
-            mapping = package.release_branch_mapping_json or {}
-
-            for release, map_dict in mapping.items():
-                candidates.append((
-                    package.package_name,
-                    map_dict.get(BRANCH_MAPPING_KEYS[1]),
-                    map_dict.get(BRANCH_MAPPING_KEYS[2])
-                ))
-
-            for candidate in candidates:
-                th = threading.Thread(
-                    target=_sync_build_system,
-                    args=(job_template, candidate,)
-                )
-                th.start()
-                th.join()
-                time.sleep(6)
-
-            _update_diff(package)
-
-    logger.info("%s Packages sync'd with Build System" % len(all_packages))
+    logger.info("%s Packages sync'd with Build System, %s of %s candidates" % (
+        len(package_names), len([status for status in sync_results or [] if status]),
+        len(sync_results or [])))
     if reports_manager.analyse_packages_status():
         logger.info("Packages Summary Updated")
-    time.sleep(2)
     if reports_manager.refresh_stats_required_by_territory():
         logger.info("Location Summary Updated")
-    time.sleep(2)
     if location_manager.save_territory_build_system_stats():
         logger.info("Territory Summary Updated")
+
+
+@periodic_task(
+    run_every=(crontab(minute=30)),
+    name="sweep_api_cache",
+    ignore_result=True
+)
+def task_sweep_api_cache():
+    """
+    evict expired and excess cached API responses
+    """
+    evicted = sweep_api_cache()
+    if evicted:
+        logger.info("%s cached API responses evicted" % evicted)
@@ -15,6 +15,7 @@
 
 import os
 import json
+import copy
 import yaml
 from collections import OrderedDict
 from django import template
@@ -115,7 +116,7 @@ def tag_branch_mapping(package):
     else:
         branch_mapping = {}
         if package_details.release_branch_mapping_json:
-            branch_mapping = package_details.release_branch_mapping_json.copy()
+            branch_mapping = copy.deepcopy(package_details.release_branch_mapping_json)
             for k, v in package_details.release_branch_mapping_json.items():
                 branch_mapping[k]['product'] = \
                     release_manager.get_product_by_release(k).product_slug
@@ -377,7 +378,7 @@ def tag_sync_from_coverage(stats, package, release, tag):
     else:
         branch_mapping = {}
         if package_details.release_branch_mapping_json:
-            branch_mapping = package_details.release_branch_mapping_json.copy()
+            branch_mapping = copy.deepcopy(package_details.release_branch_mapping_json)
             branch_mapping = branch_mapping.get(release)
             branch_mapping['product'] = \
                 release_manager.get_product_by_release(release).product_slug
@@ -0,0 +1,144 @@
+# Copyright 2019 Red Hat, Inc.
+# All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import json
+from datetime import timedelta
+from io import StringIO
+from uuid import uuid4
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TransactionTestCase
+from django.utils import timezone
+from fixture import DjangoFixture
+from fixture.style import NamedDataStyle
+from fixture.django_testcase import FixtureTestCase
+
+from dashboard.constants import RELSTREAM_SLUGS
+from dashboard.managers.inventory import SyncStatsManager
+from dashboard.models import (
+    CacheAPI, Language, LocaleStats, Package, Platform, Product, SyncStats
+)
+from dashboard.services.standin import PlatformStandIn
+from dashboard.tests.testdata.db_fixtures import (
+    LanguageData, PlatformData, ProductData, PackageData
+)
+
+db_fixture = DjangoFixture(style=NamedDataStyle())
+
+
+class BenchmarkSyncTest(TransactionTestCase):
+
+    def setUp(self):
+        Product.objects.create(product_name='Fedora', product_slug=RELSTREAM_SLUGS[1],
+                               product_url='https://fedoraproject.org', product_status=True)
+        for locale_id, lang_name in (('ja_JP', 'Japanese'), ('ru_RU', 'Russian')):
+            Language.objects.create(locale_id=locale_id, lang_name=lang_name, lang_status=True)
+        self.standin = PlatformStandIn(modules=2, versions=1, locales=['ja_JP', 'ru_RU'])
+        self.standin.start()
+
+    def tearDown(self):
+        self.standin.stop()
+
+    def _benchmark(self, **options):
+        stdout = StringIO()
+        call_command('benchmarksync', url=self.standin.url, engine='weblate', packages=2,
+                     passes=1, stdout=stdout, **options)
+        return stdout.getvalue()
+
+    def test_registered_platform_untouched(self):
+        """
+        Test benchmarksync leaves a registered platform as it was
+        """
+        platform = Platform.objects.create(
+            engine_name='weblate', subject='registered', api_url=self.standin.url.rstrip('/'),
+            platform_slug='WLTREG', server_status=True, api_rate_limit=2.0, api_max_concurrency=3
+        )
+        cache = CacheAPI.objects.create(
+            base_url=platform.api_url, resource='/api/projects/', request_kwargs='{}',
+            response_payload=CacheAPI.compress('{}'), expiry=timezone.now() + timedelta(hours=1)
+        )
+        with self.assertRaises(CommandError):
+            self._benchmark()
+        self.assertFalse(Package.objects.exists())
+
+        output = self._benchmark(use_registered=True)
+        self.assertIn("versions 2 changed", output)
+        platform.refresh_from_db()
+        self.assertEqual((platform.api_rate_limit, platform.api_max_concurrency), (2.0, 3))
+        self.assertTrue(CacheAPI.objects.filter(cache_api_id=cache.cache_api_id).exists())
+        self.assertFalse(Package.objects.exists())
+        self.assertFalse(SyncStats.objects.exists())
+
+    def test_benchmark_platform_removed(self):
+        """
+        Test benchmarksync removes the platform it registered
+        """
+        output = self._benchmark()
+        self.assertIn("versions 2 changed", output)
+        self.assertFalse(Platform.objects.exists())
+        self.assertFalse(CacheAPI.objects.exists())
+        self.assertFalse(Package.objects.exists())
+
+
+class BackfillProcessedStatsTest(FixtureTestCase):
+
+    fixture = db_fixture
+    datasets = [LanguageData, PlatformData, ProductData, PackageData]
+
+    raw_stats = {'id': 'master', 'stats': [
+        {'locale': 'ja', 'total': 100, 'translated': 60, 'untranslated': 40, 'fuzzy': 5},
+        {'locale': 'ru', 'total': 100, 'translated': 90, 'untranslated': 10, 'fuzzy': 0},
+    ]}
+
+    def _sync_stats(self, package_name, stats_processed_json_str=None):
+        return SyncStats.objects.create(
+            package_name_id=package_name, job_uuid=uuid4(), project_version='master',
+            source='zanata', stats_raw_json_str=json.dumps(self.raw_stats),
+            stats_processed_json_str=stats_processed_json_str, sync_iter_count=1,
+            sync_visibility=True)
+
+    def test_backfill_processed_stats(self):
+        """
+        Test versions without processed stats get processed and locale stats
+        """
+        anaconda, ibus = PackageData.package_anaconda.package_name, PackageData.package_ibus.package_name
+        candlepin = PackageData.package_candlepin.package_name
+        for package_name in (anaconda, ibus):
+            self._sync_stats(package_name, None if package_name == anaconda else '{}')
+        processed_stats = {'ja_JP': {'Total': 1, 'Translated': 1, 'Untranslated': 0, 'Remaining': 0.0}}
+        self.assertTrue(SyncStatsManager().save_version_stats(
+            Package.objects.get(package_name=candlepin), 'master', self.raw_stats, 'zanata',
+            p_stats=processed_stats))
+
+        stdout = StringIO()
+        call_command('backfillprocessedstats', batch_size=1, stdout=stdout)
+        self.assertIn("Processed stats of 2 versions saved", stdout.getvalue())
+        for package_name in (anaconda, ibus):
+            sync_stats = SyncStats.objects.get(package_name=package_name)
+            self.assertDictEqual(sync_stats.stats_processed_json['ja_JP'], {
+                'Total': 100, 'Translated': 60, 'Untranslated': 40, 'Remaining': 40.0})
+            locale_stats = {stats.locale: stats for stats in
+                            LocaleStats.objects.filter(sync_stats=sync_stats)}
+            self.assertSetEqual(set(locale_stats), set(sync_stats.stats_processed_json))
+            self.assertEqual((locale_stats['ja_JP'].total, locale_stats['ja_JP'].translated,
+                              locale_stats['ja_JP'].fuzzy, locale_stats['ja_JP'].untranslated),
+                             (100, 60, 5, 40))
+            self.assertEqual(locale_stats['ru_RU'].translated, 90)
+        # versions having processed and locale stats are left as they are
+        sync_stats = SyncStats.objects.get(package_name=candlepin)
+        self.assertDictEqual(sync_stats.stats_processed_json, processed_stats)
+        self.assertListEqual(list(LocaleStats.objects.filter(
+            sync_stats=sync_stats).values_list('locale', 'total')), [('ja_JP', 1)])
@@ -0,0 +1,585 @@
+# Copyright 2019 Red Hat, Inc.
+# All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import os
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from mock import Mock, patch
+
+from dashboard.managers.resources import APIResources
+from dashboard.models import CacheAPI
+from dashboard.services.consume.cache import ResponseLRUCache, response_cache, sweep_api_cache
+from dashboard.services.consume.circuitbreaker import CircuitBreaker, CircuitBreakerRegistry
+from dashboard.services.consume.fetchpool import FetchPool
+from dashboard.services.consume.kojisessions import KojiSessionPool
+from dashboard.services.consume.ratelimit import AdaptiveRateLimiter
+from dashboard.services.consume.restclient import RestClient, RestHandle, compile_service
+from dashboard.services.consume.singleflight import SingleFlight, _Call, max_call_time, redis
+from dashboard.services.consume.workers import reset_worker_connections
+from dashboard.services.standin import PlatformStandIn
+
+
+class FetchPoolTest(SimpleTestCase):
+
+    def test_fetch_budget(self):
+        """
+        Test fetches of concurrent batches share one budget
+        """
+        lock = threading.Lock()
+        running = {'now': 0, 'max': 0}
+
+        def _fetch(resources, platform, url, *args, **kwargs):
+            with lock:
+                running['now'] += 1
+                running['max'] = max(running['max'], running['now'])
+            time.sleep(0.02)
+            with lock:
+                running['now'] -= 1
+            return {'id': args[1]}
+
+        api_resources = APIResources()
+        stats_requests = [('weblate', 'https://standin', ('project', str(version)), {})
+                          for version in range(4)]
+        with patch('dashboard.managers.resources.fetch_pool', FetchPool(max_workers=3)), \
+                patch.object(APIResources, 'fetch_translation_statistics', _fetch):
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                results = list(executor.map(
+                    lambda _: list(api_resources.fetch_translation_statistics_batch(stats_requests)),
+                    range(4)))
+        self.assertEqual(running['max'], 3)
+        for fetched in results:
+            self.assertListEqual(sorted(stats_json['id'] for _, stats_json in fetched),
+                                 [str(version) for version in range(4)])
+
+
+class AdaptiveRateLimiterTest(SimpleTestCase):
+
+    def test_token_bucket(self):
+        """
+        Test requests beyond the burst are spaced by the rate
+        """
+        limiter = AdaptiveRateLimiter(rate=10, max_concurrency=4)
+        start_time = time.monotonic()
+        for _ in range(15):
+            limiter.call(lambda: Mock(status_code=200))
+        # a burst of 10, then 5 more at 10 per second
+        self.assertGreaterEqual(time.monotonic() - start_time, 0.45)
+        self.assertEqual(limiter.state()['in_flight'], 0)
+
+    def test_concurrency_backoff(self):
+        """
+        Test concurrency is halved on errors and recovers additively
+        """
+        limiter = AdaptiveRateLimiter(rate=0, max_concurrency=8)
+        limiter.release(limiter.acquire(), status_code=503)
+        self.assertEqual(limiter.state()['concurrency'], 4)
+        with self.assertRaises(ValueError):
+            limiter.call(Mock(side_effect=ValueError))
+        self.assertEqual(limiter.state()['concurrency'], 2)
+        limiter.release(limiter.acquire(), status_code=200)
+        self.assertEqual(limiter.state()['concurrency'], 2.5)
+        for _ in range(100):
+            limiter.release(limiter.acquire(), status_code=200)
+        self.assertEqual(limiter.state()['concurrency'], 8)
+
+    def test_concurrency_cap(self):
+        """
+        Test requests in flight are capped by concurrency
+        """
+        limiter = AdaptiveRateLimiter(rate=0, max_concurrency=2)
+        lock = threading.Lock()
+        running = {'now': 0, 'max': 0}
+
+        def _request():
+            with lock:
+                running['now'] += 1
+                running['max'] = max(running['max'], running['now'])
+            time.sleep(0.01)
+            with lock:
+                running['now'] -= 1
+            return Mock(status_code=200)
+
+        with ThreadPoolExecutor(max_workers=6) as executor:
+            list(executor.map(lambda _: limiter.call(_request), range(12)))
+        self.assertEqual(running['max'], 2)
+
+    def test_retry_after(self):
+        """
+        Test Retry-After of a 429 pauses the host
+        """
+        limiter = AdaptiveRateLimiter(rate=0, max_concurrency=4)
+        response = limiter.call(lambda: Mock(status_code=429, headers={'Retry-After': '0.3'}))
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(limiter.state()['concurrency'], 2)
+        start_time = time.monotonic()
+        limiter.call(lambda: Mock(status_code=200))
+        self.assertGreaterEqual(time.monotonic() - start_time, 0.25)
+
+
+class CircuitBreakerTest(SimpleTestCase):
+
+    def test_open_half_open_close(self):
+        """
+        Test breaker opens on failures, lets a trial through and closes
+        """
+        breaker = CircuitBreaker('standin.local', failure_threshold=2, cooldown=0.1)
+        breaker.record_failure()
+        self.assertTrue(breaker.allow())
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(breaker.allow())
+        time.sleep(0.1)
+        # one trial call after cool-down
+        self.assertTrue(breaker.allow())
+        self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertFalse(breaker.allow())
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(breaker.allow())
+        time.sleep(0.1)
+        self.assertTrue(breaker.allow())
+        breaker.record_success()
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+        self.assertEqual(breaker.status()['failures'], 0)
+        self.assertTrue(breaker.allow())
+
+    @override_settings(CIRCUIT_BREAKER_FAILURES=1, CIRCUIT_BREAKER_COOLDOWN=0.1)
+    def test_tripped(self):
+        """
+        Test only breakers open now, or opened since a time are reported
+        """
+        breakers = CircuitBreakerRegistry()
+        breakers.breaker('https://old.standin.local/api').record_failure()
+        breakers.breaker('https://ok.standin.local/api').record_success()
+        self.assertListEqual(list(breakers.tripped()), ['https://old.standin.local'])
+        time.sleep(0.1)
+        job_started = timezone.now()
+        self.assertListEqual(list(breakers.tripped(since=job_started)), [])
+        breakers.breaker('https://new.standin.local/api').record_failure()
+        time.sleep(0.1)
+        # cooled down, but opened while the job ran
+        self.assertListEqual(list(breakers.tripped(since=job_started)), ['https://new.standin.local'])
+
+
+@override_settings(API_REQUEST_RETRIES=2, API_RETRY_BACKOFF=0.01, API_RATE_LIMIT=0,
+                   CIRCUIT_BREAKER_FAILURES=2, CIRCUIT_BREAKER_COOLDOWN=300)
+class RestHandleTest(TestCase):
+
+    def _responses(self, *status_codes):
+        responses = iter([Mock(status_code=status_code, headers={}) for status_code in status_codes])
+        requested = []
+
+        def _get(session, url, **kwargs):
+            requested.append(url)
+            return next(responses)
+        return _get, requested
+
+    def test_retries(self):
+        """
+        Test retryable responses are retried, and failures open the breaker
+        """
+        rest_handle = RestHandle('https://retry.standin.local', '/api/projects/', 'GET')
+        _get, requested = self._responses(503, 429, 200)
+        with patch('requests.Session.get', new=_get):
+            response = rest_handle._call_request(rest_handle._get_url(), 'GET')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(requested), 3)
+
+        _get, requested = self._responses(*[503] * 6)
+        with patch('requests.Session.get', new=_get):
+            for _ in range(2):
+                response = rest_handle._call_request(rest_handle._get_url(), 'GET')
+                self.assertEqual(response.status_code, 503)
+            self.assertEqual(len(requested), 6)
+            # breaker is open, host is not called
+            self.assertFalse(rest_handle._call_request(rest_handle._get_url(), 'GET'))
+        self.assertEqual(len(requested), 6)
+
+    def test_retry_delay(self):
+        """
+        Test Retry-After of the host is followed, up to max backoff
+        """
+        self.assertEqual(RestHandle._retry_delay(0, Mock(headers={'Retry-After': '2'})), 2)
+        with self.settings(API_RETRY_BACKOFF_MAX=1):
+            self.assertEqual(RestHandle._retry_delay(0, Mock(headers={'Retry-After': '120'})), 1)
+            self.assertLessEqual(RestHandle._retry_delay(5), 1)
+
+
+class _RedisStandIn(object):
+    """
+    Locks of a redis server, shared by SingleFlight objects as by workers
+    """
+
+    def __init__(self):
+        self.cond = threading.Condition()
+        self.locks = {}
+
+    def lock(self, name, timeout=None, blocking_timeout=None):
+        return _RedisLockStandIn(self, name, timeout, blocking_timeout)
+
+
+class _RedisLockStandIn(object):
+
+    def __init__(self, server, name, timeout, blocking_timeout):
+        self.server, self.name = server, name
+        self.timeout, self.blocking_timeout = timeout, blocking_timeout
+        self.token = object()
+
+    def _owner(self):
+        owner, expires_at = self.server.locks.get(self.name, (None, 0))
+        return owner if expires_at > time.monotonic() else None
+
+    def acquire(self):
+        give_up_at = time.monotonic() + self.blocking_timeout
+        with self.server.cond:
+            while self._owner() is not None:
+                if time.monotonic() >= give_up_at:
+                    return False
+                self.server.cond.wait(0.01)
+            self.server.locks[self.name] = (self.token, time.monotonic() + self.timeout)
+            return True
+
+    def extend(self, additional_time, replace_ttl=False):
+        with self.server.cond:
+            if self._owner() is not self.token:
+                raise redis.exceptions.LockNotOwnedError("lock expired")
+            self.server.locks[self.name] = (self.token, time.monotonic() + additional_time)
+            return True
+
+    def release(self):
+        with self.server.cond:
+            if self._owner() is not self.token:
+                raise redis.exceptions.LockNotOwnedError("lock expired")
+            del self.server.locks[self.name]
+            self.server.cond.notify_all()
+
+
+class SingleFlightTest(SimpleTestCase):
+
+    def test_coalesced_calls(self):
+        """
+        Test concurrent callers of a key share one call, not its result
+        """
+        single_flight = SingleFlight(redis_url='memory://')
+        calls = []
+
+        def _fetch():
+            calls.append(1)
+            time.sleep(0.1)
+            return {'content': '{}', 'json_content': {'stats': [{'locale': 'ja'}]}}
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(lambda _: single_flight.do('key', _fetch), range(4)))
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(single_flight.stats(), {'calls': 1, 'coalesced': 3, 'in_flight': 0})
+        results[0]['json_content']['stats'][0]['locale'] = 'ja_JP'
+        for result in results[1:]:
+            self.assertEqual(result['json_content']['stats'][0]['locale'], 'ja')
+
+    def test_coalesced_errors(self):
+        """
+        Test coalesced callers get the error of the call
+        """
+        single_flight = SingleFlight(redis_url='memory://')
+
+        def _fail():
+            time.sleep(0.05)
+            raise ValueError("platform is down")
+
+        def _call(_):
+            try:
+                single_flight.do('key', _fail)
+            except ValueError as e:
+                return str(e)
+
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            self.assertListEqual(list(executor.map(_call, range(3))), ["platform is down"] * 3)
+        self.assertEqual(single_flight.stats()['in_flight'], 0)
+
+    def test_forked_worker_reset(self):
+        """
+        Test forked workers start without calls, breakers and responses of the parent
+        """
+        single_flight = SingleFlight(redis_url='memory://')
+        breakers, lru_cache = CircuitBreakerRegistry(), ResponseLRUCache()
+        # as left at fork by a parent thread, which does not make it across
+        single_flight._calls['key'] = _Call()
+        single_flight._lock.acquire()
+        breakers.breaker('https://standin/api').record_failure()
+        lru_cache.set('https://standin', '/api/projects/', '[]')
+
+        with patch('dashboard.services.consume.workers.single_flight', single_flight), \
+                patch('dashboard.services.consume.workers.circuit_breakers', breakers), \
+                patch('dashboard.services.consume.workers.response_cache', lru_cache):
+            reset_worker_connections()
+        results = []
+        caller = threading.Thread(
+            target=lambda: results.append(single_flight.do('key', lambda: 'fetched')), daemon=True
+        )
+        caller.start()
+        caller.join(timeout=2)
+        self.assertListEqual(results, ['fetched'])
+        self.assertEqual(single_flight.stats()['in_flight'], 0)
+        self.assertDictEqual(breakers.stats(), {})
+        self.assertIsNone(lru_cache.get('https://standin', '/api/projects/'))
+
+    @unittest.skipIf(redis is None, "redis is not installed")
+    def test_calls_holding_lock(self):
+        """
+        Test a call slower than lock timeout keeps the lock of other workers
+        """
+        redis_server = _RedisStandIn()
+        shared_cache, fetched = {}, []
+
+        def _fetch():
+            # as RestClient, look up the shared cache first
+            if 'stats' in shared_cache:
+                return shared_cache['stats']
+            fetched.append(1)
+            time.sleep(0.5)
+            shared_cache['stats'] = {'id': 'master'}
+            return shared_cache['stats']
+
+        workers = [SingleFlight(lock_timeout=0.15, lock_wait=2) for _ in range(2)]
+
+        def _call(single_flight):
+            with patch.object(single_flight, '_redis_client', return_value=redis_server):
+                return single_flight.do('key', _fetch)
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            first = executor.submit(_call, workers[0])
+            time.sleep(0.05)
+            second = executor.submit(_call, workers[1])
+            self.assertEqual(first.result(), {'id': 'master'})
+            self.assertEqual(second.result(), {'id': 'master'})
+        self.assertEqual(len(fetched), 1)
+        self.assertDictEqual(redis_server.locks, {})
+
+    @override_settings(API_REQUEST_TIMEOUT=(5, 60), API_REQUEST_RETRIES=3, API_RETRY_BACKOFF_MAX=30,
+                       SINGLE_FLIGHT_LOCK_TIMEOUT=None, SINGLE_FLIGHT_LOCK_WAIT=None)
+    def test_lock_timeout(self):
+        """
+        Test lock timeout outlasts all attempts of a call
+        """
+        self.assertEqual(max_call_time(), 4 * 65 + 3 * 30)
+        self.assertEqual(SingleFlight().lock_timeout, max_call_time())
+        self.assertEqual(SingleFlight(lock_timeout=10).lock_timeout, 10)
+
+
+class KojiSessionPoolTest(SimpleTestCase):
+
+    hub_url = 'https://koji.standin.local/kojihub'
+
+    def setUp(self):
+        self.sessions = []
+        create_session = patch.object(KojiSessionPool, '_create_session', side_effect=self._create_session)
+        create_session.start()
+        self.addCleanup(create_session.stop)
+
+    def _create_session(self, hub_url):
+        session = Mock(multicall=False)
+        self.sessions.append(session)
+        return session
+
+    def test_session_reused(self):
+        """
+        Test a session is reused by calls one after another
+        """
+        pool = KojiSessionPool()
+        for _ in range(3):
+            pool.call(self.hub_url, 'getLatestBuilds', 'f29', package='ibus')
+        self.assertEqual(len(self.sessions), 1)
+        self.assertEqual(self.sessions[0].getLatestBuilds.call_count, 3)
+        self.assertDictEqual(pool.stats()[self.hub_url],
+                             {'created': 1, 'reused': 2, 'dropped': 0, 'idle': 1})
+
+    def test_session_dropped(self):
+        """
+        Test a session is dropped after a connection error, and the call retried
+        """
+        pool = KojiSessionPool()
+        pool.call(self.hub_url, 'getAPIVersion')
+        self.sessions[0].getLatestBuilds.side_effect = ConnectionError('connection reset')
+        pool.call(self.hub_url, 'getLatestBuilds', 'f29')
+        self.assertEqual(len(self.sessions), 2)
+        self.sessions[0].rsession.close.assert_called_once_with()
+        self.sessions[1].getLatestBuilds.assert_called_once_with('f29')
+        self.assertDictEqual(pool.stats()[self.hub_url],
+                             {'created': 2, 'reused': 1, 'dropped': 1, 'idle': 1})
+        # an idle session failing health check is replaced
+        with patch('dashboard.services.consume.kojisessions.time.monotonic',
+                   return_value=time.monotonic() + pool.health_check_after + 1):
+            self.sessions[1].getAPIVersion.side_effect = OSError('hub gone')
+            pool.call(self.hub_url, 'getLatestBuilds', 'f29')
+        self.assertEqual(len(self.sessions), 3)
+        self.assertEqual(pool.stats()[self.hub_url]['dropped'], 2)
+
+    def test_session_reset_after_fork(self):
+        """
+        Test sessions of the parent process are not used after fork
+        """
+        pool = KojiSessionPool()
+        pool.call(self.hub_url, 'getAPIVersion')
+        with patch('dashboard.services.consume.kojisessions.os.getpid', return_value=os.getpid() + 1):
+            pool.call(self.hub_url, 'getAPIVersion')
+        self.assertEqual(len(self.sessions), 2)
+        # not closed, connection belongs to the parent
+        self.sessions[0].rsession.close.assert_not_called()
+        self.assertDictEqual(pool.stats()[self.hub_url],
+                             {'created': 1, 'reused': 0, 'dropped': 0, 'idle': 1})
+        with patch('dashboard.services.consume.workers.koji_sessions', pool):
+            reset_worker_connections()
+        self.assertDictEqual(pool.stats(), {})
+        pool.call(self.hub_url, 'getAPIVersion')
+        self.assertEqual(len(self.sessions), 3)
+
+
+class ResponseLRUCacheTest(SimpleTestCase):
+
+    def test_responses_not_shared(self):
+        """
+        Test callers get json of their own from cached responses
+        """
+        lru_cache = ResponseLRUCache(max_size=2)
+        lru_cache.set('https://standin', '/api/projects/', '{"results": [{"slug": "ibus"}]}')
+        content, json_content = lru_cache.get('https://standin', '/api/projects/')
+        json_content['results'][0]['slug'] = 'changed'
+        json_content['next'] = None
+        self.assertDictEqual(lru_cache.get('https://standin', '/api/projects/')[1],
+                             {'results': [{'slug': 'ibus'}]})
+        lru_cache.set('https://standin', '/api/languages/', '[]')
+        lru_cache.set('https://standin', '/api/components/', '[]')
+        self.assertIsNone(lru_cache.get('https://standin', '/api/projects/'))
+        self.assertEqual(lru_cache.stats()['hits'], 2)
+
+
+class CacheAPITest(TestCase):
+
+    base_url = 'https://weblate.standin.local'
+
+    def _cache_response(self, resource, content='{}', expiry_hours=1, payload_size=None):
+        payload = CacheAPI.compress(content)
+        return CacheAPI.objects.create(
+            base_url=self.base_url, resource=resource, request_kwargs='{}',
+            response_payload=payload, response_payload_size=payload_size or len(payload),
+            expiry=timezone.now() + timedelta(hours=expiry_hours)
+        )
+
+    def test_compressed_payload(self):
+        """
+        Test responses are stored compressed
+        """
+        content = '{"results": [%s]}' % ", ".join(['{"slug": "ibus", "translated": 10}'] * 100)
+        cache = self._cache_response('/api/projects/', content)
+        cache = CacheAPI.objects.get(cache_api_id=cache.cache_api_id)
+        self.assertLess(cache.response_payload_size, len(content) / 10)
+        self.assertEqual(cache.response_content, content)
+        self.assertEqual(len(cache.response_content_json['results']), 100)
+        self.assertEqual(CacheAPI.decompress(None), '')
+
+    def test_sweep_api_cache(self):
+        """
+        Test sweep_api_cache evicts expired, then oldest rows
+        """
+        self._cache_response('/api/expired/', expiry_hours=-48)
+        self._cache_response('/api/revalidate/', expiry_hours=-1)
+        self.assertEqual(sweep_api_cache(grace_hours=24), 1)
+        self.assertTrue(CacheAPI.objects.filter(resource='/api/revalidate/').exists())
+
+        for hours in range(2, 7):
+            self._cache_response('/api/%s/' % hours, expiry_hours=hours, payload_size=300 * 1024)
+        # 1 MB holds the three newest of them
+        self.assertEqual(sweep_api_cache(grace_hours=24, max_size_mb=1), 3)
+        self.assertListEqual(
+            sorted(CacheAPI.objects.values_list('resource', flat=True)),
+            ['/api/4/', '/api/5/', '/api/6/'])
+        self.assertEqual(sweep_api_cache(grace_hours=24, max_size_mb=1), 0)
+
+
+class RestClientTest(TestCase):
+
+    base_url = 'https://weblate.standin.local'
+
+    def setUp(self):
+        response_cache.invalidate()
+
+    def test_revalidate_cached_response(self):
+        """
+        Test expired response is revalidated, and kept on 304
+        """
+        resource = compile_service('weblate', 'list_projects').resource
+        cache = CacheAPI.objects.create(
+            base_url=self.base_url, resource=resource, request_kwargs='{}',
+            response_payload=CacheAPI.compress('{"results": []}'), response_etag='"v1"',
+            expiry=timezone.now() - timedelta(minutes=5)
+        )
+        sent_headers = []
+
+        def _get(session, url, **kwargs):
+            sent_headers.append(dict(kwargs.get('headers') or {}))
+            return Mock(status_code=304, headers={})
+
+        caller_headers = {'X-Request': 'transtats'}
+        with patch('requests.Session.get', new=_get):
+            response = RestClient('weblate').process_request(
+                self.base_url, 'list_projects', headers=caller_headers)
+        self.assertEqual(response['json_content'], {'results': []})
+        self.assertEqual(sent_headers[0].get('If-None-Match'), '"v1"')
+        self.assertEqual(sent_headers[0].get('X-Request'), 'transtats')
+        # validators do not leak into headers of the caller
+        self.assertDictEqual(caller_headers, {'X-Request': 'transtats'})
+        cache.refresh_from_db()
+        self.assertGreater(cache.expiry, timezone.now())
+
+
+class DamnedLiesReleaseStatsTest(TestCase):
+
+    def setUp(self):
+        response_cache.invalidate()
+        self.standin = PlatformStandIn(modules=80, versions=1, locales=['ja'])
+        self.standin.start()
+
+    def tearDown(self):
+        self.standin.stop()
+        response_cache.invalidate()
+
+    def test_release_document_cached(self):
+        """
+        Test release document is cached by request kwargs without modules
+        """
+        api_resources, api_url = APIResources(), self.standin.url.rstrip('/')
+        module_names = ['standin-%s' % i for i in range(80)]
+        modules_stats = api_resources.fetch_translation_statistics(
+            'damnedlies', api_url, 'ja', 'master', package_names=module_names)
+        self.assertListEqual(sorted(modules_stats), sorted(module_names))
+        cached = CacheAPI.objects.get(base_url=api_url)
+        self.assertNotIn(module_names[0], cached.request_kwargs)
+        # other modules of the release, a module alone, are parsed out of the cached document
+        modules_stats = api_resources.fetch_translation_statistics(
+            'damnedlies', api_url, 'ja', 'master', package_names=module_names[:2])
+        self.assertListEqual(sorted(modules_stats), sorted(module_names[:2]))
+        response_cache.invalidate()
+        module_stats = api_resources.fetch_translation_statistics(
+            'damnedlies', api_url, 'ja', 'master', package_name=module_names[2])
+        self.assertEqual(module_stats['locale'], 'ja')
+        self.assertIn('total', module_stats)
+        self.assertEqual(CacheAPI.objects.filter(base_url=api_url).count(), 1)
+        self.assertEqual(self.standin.stats()['requests'], 1)
@@ -0,0 +1,153 @@
+# Copyright 2019 Red Hat, Inc.
+# All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import hashlib
+import os
+import shutil
+import tempfile
+
+import requests
+from django.test import TestCase, override_settings
+from mock import Mock, patch
+
+from dashboard.engine.action_mapper import Download
+from dashboard.services.consume.sessions import http_sessions
+
+
+def _rpm_content(payload):
+    """
+    RPM lead, an empty signature header and payload
+    """
+    return b'\0' * Download.RPM_LEAD_SIZE + Download.RPM_HEADER_MAGIC + b'\0' * 12 + payload
+
+
+def _response(status_code, *chunks, headers=None):
+    """
+    Streamed response, a chunk may be an exception to raise midway
+    """
+    def _iter_content(chunk_size=None):
+        for chunk in chunks:
+            if isinstance(chunk, Exception):
+                raise chunk
+            yield chunk
+
+    response = Mock(status_code=status_code, headers=headers or {})
+    response.iter_content.side_effect = _iter_content
+    response.__enter__ = Mock(return_value=response)
+    response.__exit__ = Mock(return_value=False)
+    return response
+
+
+@override_settings(API_REQUEST_RETRIES=1)
+class DownloadTest(TestCase):
+
+    file_link = 'https://kojipkgs.standin.local/packages/ibus/ibus.src.rpm'
+    payload = b'ibus source package payload'
+
+    def setUp(self):
+        self.sandbox_path = tempfile.mkdtemp() + os.sep
+        self.download = Download(sandbox_path=self.sandbox_path)
+        self.file_path = self.sandbox_path + 'ibus.src.rpm'
+        self.content = _rpm_content(self.payload)
+        self.checksum = hashlib.md5(self.payload).hexdigest()
+        sleep_patcher = patch('dashboard.engine.action_mapper.time.sleep')
+        self.sleep = sleep_patcher.start()
+        self.addCleanup(sleep_patcher.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.sandbox_path)
+
+    def test_download_resumed(self):
+        """
+        Test a broken transfer is resumed from the .part file
+        """
+        sent_headers = []
+        responses = [
+            _response(200, self.content[:100],
+                      requests.exceptions.ChunkedEncodingError('connection broken')),
+            _response(206, self.content[100:]),
+        ]
+
+        def _get(url, headers=None, **kwargs):
+            sent_headers.append(dict(headers))
+            return responses.pop(0)
+
+        with patch.object(http_sessions, 'get', side_effect=_get):
+            file_path, transfer = self.download._download_file(
+                self.file_link, checksum=self.checksum, expected_size=len(self.content))
+        self.assertEqual(file_path, self.file_path)
+        self.assertListEqual(sent_headers, [{}, {'Range': 'bytes=100-'}])
+        self.assertEqual(transfer['resumes'], 1)
+        self.assertTrue(transfer['verified'])
+        self.assertNotIn('error', transfer)
+        with open(file_path, 'rb') as rpm_file:
+            self.assertEqual(rpm_file.read(), self.content)
+        self.assertFalse(os.path.exists(file_path + '.part'))
+
+    def test_download_complete_part(self):
+        """
+        Test a complete .part file is moved in place on 416
+        """
+        with open(self.file_path + '.part', 'wb') as part_file:
+            part_file.write(self.content)
+        with patch.object(http_sessions, 'get', return_value=_response(416)) as get:
+            file_path, transfer = self.download._download_file(
+                self.file_link, checksum=self.checksum)
+        self.assertEqual(file_path, self.file_path)
+        self.assertEqual(get.call_args[1]['headers'], {'Range': 'bytes=%s-' % len(self.content)})
+        self.assertEqual(transfer['bytes'], 0)
+
+    def test_download_bad_hash(self):
+        """
+        Test a download not matching payload hash is rejected
+        """
+        corrupt_content = _rpm_content(b'tampered payload')
+        with patch.object(http_sessions, 'get',
+                          side_effect=lambda *args, **kwargs: _response(200, corrupt_content)) as get:
+            file_path, transfer = self.download._download_file(
+                self.file_link, checksum=self.checksum)
+        self.assertEqual(file_path, '')
+        self.assertEqual(transfer['error'], 'checksum verification failed')
+        # each attempt starts over
+        self.assertEqual(get.call_count, 2)
+        self.assertListEqual([call[1]['headers'] for call in get.call_args_list], [{}, {}])
+        self.assertFalse(os.path.exists(self.file_path))
+        self.assertFalse(os.path.exists(self.file_path + '.part'))
+
+    def test_download_retry_after(self):
+        """
+        Test a server error is retried after the delay asked by the host
+        """
+        responses = [_response(503, headers={'Retry-After': '7'}), _response(200, self.content)]
+        with patch.object(http_sessions, 'get',
+                          side_effect=lambda *args, **kwargs: responses.pop(0)) as get:
+            file_path, transfer = self.download._download_file(
+                self.file_link, checksum=self.checksum)
+        self.assertEqual(file_path, self.file_path)
+        self.assertEqual(get.call_count, 2)
+        self.sleep.assert_called_once_with(7.0)
+        self.assertNotIn('error', transfer)
+
+    def test_download_client_error(self):
+        """
+        Test a client error is not retried
+        """
+        with patch.object(http_sessions, 'get', return_value=_response(403)) as get:
+            file_path, transfer = self.download._download_file(
+                self.file_link, checksum=self.checksum)
+        self.assertEqual(file_path, '')
+        self.assertEqual(transfer['error'], 'HTTP 403')
+        self.assertEqual(get.call_count, 1)
+        self.assertFalse(self.sleep.called)
@@ -13,15 +13,25 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import json
+from collections import Counter, OrderedDict
+from datetime import date, timedelta
+
 from mock import patch
 from fixture import DjangoFixture
 from fixture.style import NamedDataStyle
 from fixture.django_testcase import FixtureTestCase
-from dashboard.constants import TS_JOB_TYPES
-from dashboard.managers.inventory import InventoryManager
+from django.utils import timezone
+
+from dashboard.constants import RELSTREAM_SLUGS, TS_JOB_TYPES, SYNC_PRIORITIES, WORKLOAD_HEADERS
+from dashboard.managers.inventory import InventoryManager, ReleaseBranchManager, locale_resolver
+from dashboard.managers.graphs import ReportsManager
 from dashboard.managers.packages import PackagesManager
 from dashboard.managers.jobs import JobTemplateManager
-from dashboard.models import Product
+from dashboard.models import (
+    CacheBuildDetails, Language, LanguageSet, LocaleStats, Package, Product, Release, SyncStats
+)
+from dashboard.services.standin import PlatformStandIn
 from dashboard.tests.testdata.db_fixtures import (
     LanguageData, LanguageSetData, PlatformData, ProductData,
     ReleaseData, PackageData, JobTemplateData
@@ -75,6 +85,20 @@ class InventoryManagerTest(FixtureTestCase):
         alias_locale = self.inventory_manager.get_alias_locale('de_DE')
         self.assertEqual(alias_locale, 'de_DE')
 
+    def test_locale_resolver(self):
+        """
+        Test locale_resolver
+        """
+        self.assertEqual(locale_resolver.resolve('fr'), 'fr_FR')
+        self.assertEqual(locale_resolver.resolve('ja-JP'), 'ja_JP')
+        self.assertEqual(locale_resolver.resolve('ko_kr'), 'ko_KR')
+        self.assertIsNone(locale_resolver.resolve('de_DE'))
+        Language.objects.filter(locale_id='fr_FR').update(locale_alias='fr-FR-x')
+        self.assertEqual(locale_resolver.resolve('fr'), 'fr_FR')
+        Language.objects.get(locale_id='fr_FR').save()
+        self.assertIsNone(locale_resolver.resolve('fr'))
+        self.assertEqual(locale_resolver.resolve('fr_FR_x'), 'fr_FR')
+
     def test_get_locales_set(self):
         """
         Test get_locales_set
@@ -203,12 +227,30 @@ class InventoryManagerTest(FixtureTestCase):
         self.assertIsInstance(tags, dict)
         self.assertDictEqual(tags, {'fedora': ['f28', 'f29', 'rawhide']})
 
+    def test_get_release_sync_priorities(self):
+        """
+        Test get_release_sync_priorities
+        """
+        release_manager = ReleaseBranchManager()
+        today = date(2017, 10, 30)
+        self.assertDictEqual(release_manager.get_release_sync_priorities(today=today),
+                             {'fedora-27': SYNC_PRIORITIES[1]})
+        Release.objects.filter(release_slug='fedora-27').update(schedule_json_str=json.dumps(
+            {'Software String Freeze': '20171101', 'Software Translation Deadline': '20171108'}))
+        self.assertDictEqual(release_manager.get_release_sync_priorities(today=today),
+                             {'fedora-27': SYNC_PRIORITIES[0]})
+        self.assertDictEqual(release_manager.get_release_sync_priorities(today=date(2017, 12, 1)),
+                             {'fedora-27': SYNC_PRIORITIES[1]})
+        Release.objects.filter(release_slug='fedora-27').update(track_trans_flag=False)
+        self.assertDictEqual(release_manager.get_release_sync_priorities(today=today),
+                             {'fedora-27': SYNC_PRIORITIES[2]})
+
 
 class PackagesManagerTest(FixtureTestCase):
 
     packages_manager = PackagesManager()
     fixture = db_fixture
-    datasets = [PackageData]
+    datasets = [LanguageData, ProductData, PackageData]
 
     def test_get_packages(self):
         """
@@ -234,7 +276,79 @@ class PackagesManagerTest(FixtureTestCase):
         self.assertTrue(self.packages_manager.is_package_exist(PackageData.package_anaconda.package_name))
         self.assertFalse(self.packages_manager.is_package_exist('otherpackage'))
 
-    @patch('requests.get', new=mock_requests_get_add_package)
+    def test_cached_json(self):
+        """
+        Test cached_json of json properties
+        """
+        package = Package.objects.get(package_name=PackageData.package_anaconda.package_name)
+        package.release_branch_mapping = json.dumps({'fedora-29': {'platform_version': 'master'}})
+        branch_mapping = package.release_branch_mapping_json
+        self.assertIs(package.release_branch_mapping_json, branch_mapping)
+        self.assertTrue(package.release_branch_mapping_health)
+        package.release_branch_mapping = json.dumps({'fedora-30': {'platform_version': ''}})
+        self.assertEqual(list(package.release_branch_mapping_json), ['fedora-30'])
+        self.assertFalse(package.release_branch_mapping_health)
+        package.release_branch_mapping = None
+        self.assertEqual(package.release_branch_mapping_json, {})
+
+    def test_claim_packages_due_for_sync(self):
+        """
+        Test claim_packages_due_for_sync
+        """
+        anaconda, ibus = PackageData.package_anaconda.package_name, PackageData.package_ibus.package_name
+        candlepin = PackageData.package_candlepin.package_name
+        subscription_manager = PackageData.package_subscription_manager.package_name
+        now = timezone.now()
+        # package: (branch mapping, next sync)
+        packages_due = {
+            ibus: ({'fedora-27': {'platform_version': 'master'},
+                    'fedora-28': {'platform_version': 'master'}}, now - timedelta(minutes=30)),
+            # release slug as a value is not a release of the package
+            candlepin: ({'fedora-30': {'platform_version': 'fedora-27'}}, now - timedelta(hours=1)),
+            # a release out of release priorities is of normal priority
+            subscription_manager: ({'fedora-28': {'platform_version': 'master'},
+                                    'fedora-29': {'platform_version': 'master'}},
+                                   now - timedelta(minutes=10)),
+            anaconda: ({'fedora-28': {'platform_version': 'master'}}, None),
+        }
+        for package_name, (branch_mapping, next_sync) in packages_due.items():
+            Package.objects.filter(package_name=package_name).update(
+                release_branch_mapping=json.dumps(branch_mapping), platform_next_sync=next_sync)
+        release_priorities = {'fedora-27': SYNC_PRIORITIES[0], 'fedora-28': SYNC_PRIORITIES[2]}
+        self.assertListEqual([self.packages_manager.get_package_sync_priority(
+            packages_due[package_name][0], release_priorities)
+            for package_name in (ibus, candlepin, subscription_manager, anaconda)],
+            [SYNC_PRIORITIES[0], SYNC_PRIORITIES[1], SYNC_PRIORITIES[1], SYNC_PRIORITIES[2]])
+        with patch.object(self.packages_manager.release_manager, 'get_release_sync_priorities',
+                          return_value=release_priorities):
+            claimed = self.packages_manager.claim_packages_due_for_sync(limit=1)
+            self.assertListEqual([package.package_name for package in claimed], [ibus])
+            # most overdue first, low priority last
+            claimed = self.packages_manager.claim_packages_due_for_sync(limit=1)
+            self.assertListEqual([package.package_name for package in claimed], [candlepin])
+            claimed = self.packages_manager.claim_packages_due_for_sync(limit=1)
+            self.assertListEqual([package.package_name for package in claimed], [subscription_manager])
+            claimed = self.packages_manager.claim_packages_due_for_sync()
+            self.assertListEqual([package.package_name for package in claimed], [anaconda])
+            # claimed packages are not due until their sync is over
+            self.assertFalse(self.packages_manager.claim_packages_due_for_sync())
+
+    def test_sync_platform_stats_release_priorities(self):
+        """
+        Test sync_platform_stats schedules next syncs upon release priorities of the batch
+        """
+        package_names = [PackageData.package_anaconda.package_name, PackageData.package_ibus.package_name]
+        release_priorities = {'fedora-27': SYNC_PRIORITIES[0]}
+        with patch.object(self.packages_manager.release_manager, 'get_release_sync_priorities',
+                          return_value=release_priorities) as get_release_sync_priorities, \
+                patch.object(PackagesManager, 'schedule_platform_sync') as schedule_platform_sync:
+            self.packages_manager.sync_platform_stats(package_names)
+        get_release_sync_priorities.assert_called_once_with()
+        self.assertEqual(schedule_platform_sync.call_count, 2)
+        for schedule_call in schedule_platform_sync.call_args_list:
+            self.assertIs(schedule_call[0][2], release_priorities)
+
+    @patch('requests.Session.get', new=mock_requests_get_add_package)
     def test_add_package(self):
         """
         Test add_package
@@ -248,7 +362,7 @@ class PackagesManagerTest(FixtureTestCase):
         package_added = self.packages_manager.add_package(**kwargs)
         self.assertFalse(package_added)
 
-    @patch('requests.get', new=mock_requests_get_validate_package)
+    @patch('requests.Session.get', new=mock_requests_get_validate_package)
     def test_validate_package(self):
         """
         Test validate_package
@@ -262,6 +376,193 @@ class PackagesManagerTest(FixtureTestCase):
                                                                    transplatform_slug=transplatform)
         self.assertFalse(package_validated)
 
+    def test_save_synced_version_stats(self):
+        """
+        Test _save_synced_version_stats
+        """
+        package = Package.objects.get(package_name=PackageData.package_anaconda.package_name)
+        stats_json = {'id': 'master', 'stats': [
+            {'locale': 'ja', 'total': 100, 'translated': 60, 'untranslated': 40}]}
+        sync_counts = Counter()
+        for _ in range(2):
+            fingerprints = self.packages_manager.syncstats_manager.get_stats_fingerprints(
+                [package.package_name], package.platform_slug.engine_name)
+            self.assertTrue(self.packages_manager._save_synced_version_stats(
+                package, 'master', stats_json, fingerprints.get((package.package_name, 'master')),
+                sync_counts=sync_counts))
+        self.assertEqual(sync_counts, Counter(changed=1, unchanged=1))
+        sync_stats = SyncStats.objects.get(package_name=package.package_name, project_version='master')
+        self.assertEqual(sync_stats.sync_iter_count, 1)
+        stats_json['stats'][0]['translated'] = 70
+        self.assertTrue(self.packages_manager._save_synced_version_stats(
+            package, 'master', stats_json, sync_stats.stats_fingerprint, sync_counts=sync_counts))
+        self.assertEqual(sync_counts['changed'], 2)
+        self.assertFalse(self.packages_manager._save_synced_version_stats(
+            package, 'master', {}, sync_counts=sync_counts))
+        self.assertEqual(sync_counts['failed'], 1)
+
+    def test_get_outdated_build_candidates(self):
+        """
+        Test get_outdated_build_candidates
+        """
+        standin = PlatformStandIn()
+        standin.start()
+        try:
+            Product.objects.filter(product_slug=ProductData.product_fedora.product_slug).update(
+                product_build_system='koji', product_server=standin.koji_url)
+            anaconda, ibus = PackageData.package_anaconda.package_name, \
+                PackageData.package_ibus.package_name
+            candidates = [(anaconda, 'koji', 'f29'), (ibus, 'koji', 'f29'),
+                          (anaconda, 'brew', 'tag1')]
+            self.assertListEqual(
+                self.packages_manager.get_outdated_build_candidates(candidates), candidates)
+            latest_build = self.packages_manager.api_resources.build_info(
+                standin.koji_url, 'f29', anaconda)[0]
+            CacheBuildDetails.objects.create(
+                package_name_id=anaconda, build_system='koji', build_tag='f29',
+                build_details_json_str=json.dumps(latest_build))
+            self.assertListEqual(
+                self.packages_manager.get_outdated_build_candidates(candidates), candidates[1:])
+            # latest builds of all koji candidates are fetched in one multicall
+            self.assertEqual(standin.stats().get('koji'), 3)
+            self.assertTrue(self.packages_manager.is_package_build_latest(candidates[0]))
+        finally:
+            standin.stop()
+
+
+class ReportsManagerTest(FixtureTestCase):
+
+    reports_manager = ReportsManager()
+    fixture = db_fixture
+    datasets = [LanguageData, LanguageSetData, PlatformData, ProductData, ReleaseData, PackageData]
+
+    # package: (release branch mapping, {(source, version): processed stats})
+    release_stats = {
+        'anaconda': (
+            OrderedDict([('fedora-27', {'platform_version': 'f27', 'buildsys_tag': 'f27'}),
+                         ('fedora-28', {'platform_version': 'master', 'buildsys_tag': 'f28'})]),
+            {('zanata', 'f27'): {'ja_JP': (100, 60, 40), 'ru_RU': (100, 90, 10), 'ko_KR': (100, 50, 50)},
+             ('zanata', 'master'): {'ja_JP': (10, 0, 10), 'de_DE': (10, 5, 5)},
+             ('koji', 'koji - f27-updates'): {'ja_JP': (100, 80, 20)},
+             ('koji', 'koji - f28'): {'ja_JP': (40, 40, 0)}}
+        ),
+        'candlepin': (
+            OrderedDict([('fedora-27', {'platform_version': 'master', 'buildsys_tag': 'f27'})]),
+            {('zanata', 'master'): {'ja_JP': (50, 50, 0), 'fr_FR': (50, 25, 25)}}
+        ),
+        # stats of locales out of language set only
+        'ibus': (
+            OrderedDict([('fedora-27', {'platform_version': 'master', 'buildsys_tag': 'rawhide'}),
+                         ('fedora-28', {'platform_version': 'master', 'buildsys_tag': 'rawhide'})]),
+            {('zanata', 'master'): {'ko_KR': (20, 0, 20)},
+             ('koji', 'koji - rawhide'): {'ja_JP': (10, 5, 5)}}
+        ),
+        # no stats synced
+        'subscription-manager': (
+            OrderedDict([('fedora-27', {'platform_version': 'master', 'buildsys_tag': 'f27'})]), {}
+        ),
+    }
+
+    def setUp(self):
+        language_set = LanguageSet.objects.create(
+            lang_set_name='F28 Set', lang_set_slug='f28-set', lang_set_color='Blue',
+            locale_ids=['de_DE'])
+        Release.objects.create(
+            release_name='Fedora 28', release_slug='fedora-28', product_slug_id=RELSTREAM_SLUGS[1],
+            language_set_slug=language_set, created_on=timezone.now(), sync_calendar=False)
+        syncstats_manager = self.reports_manager.package_manager.syncstats_manager
+        for package, (branch_mapping, version_stats) in self.release_stats.items():
+            package = Package.objects.get(package_name=package)
+            package.release_branch_mapping = json.dumps(branch_mapping)
+            package.save()
+            for (source, version), stats in version_stats.items():
+                p_stats = {locale: dict(zip(WORKLOAD_HEADERS, locale_stats))
+                           for locale, locale_stats in stats.items()}
+                self.assertTrue(syncstats_manager.save_version_stats(
+                    package, version, {}, source, p_stats=p_stats))
+
+    def _processed_stats(self, release, locales, source='zanata'):
+        """
+        Sum up processed stats of synced versions, packages are mapped to for a release
+        """
+        processed_stats = {}
+        for sync_stats in SyncStats.objects.filter(source=source):
+            mapping = sync_stats.package_name.release_branch_mapping_json.get(release, {})
+            if mapping.get('platform_version') != sync_stats.project_version:
+                continue
+            package_stats = processed_stats.setdefault(sync_stats.package_name_id, Counter())
+            for locale, stats in sync_stats.stats_processed_json.items():
+                if locale in locales:
+                    package_stats.update({k: v for k, v in stats.items() if k != 'Remaining'})
+        return {package: ReportsManager._workload_stats(
+            stats['Total'], stats['Translated'], stats['Untranslated'])
+            for package, stats in processed_stats.items()}
+
+    def test_get_workload_estimate(self):
+        """
+        Test get_workload_estimate
+        """
+        headers, workload = self.reports_manager.get_workload_estimate('fedora-27')
+        self.assertEqual(headers, WORKLOAD_HEADERS)
+        self.assertDictEqual(dict(workload), self._processed_stats(
+            'fedora-27', ['ja_JP', 'fr_FR', 'ru_RU']))
+        self.assertDictEqual(workload['anaconda'], {
+            'Total': 200, 'Translated': 150, 'Untranslated': 50, 'Remaining': 25.0})
+        # synced package without stats of release locales, not synced package left out
+        self.assertEqual(workload['ibus']['Total'], 0)
+        self.assertNotIn('subscription-manager', workload)
+        for locale in ('ja_JP', 'ko_KR'):
+            headers, workload = self.reports_manager.get_workload_estimate('fedora-27', locale=locale)
+            self.assertDictEqual(dict(workload), self._processed_stats('fedora-27', [locale]))
+        self.assertEqual(workload['ibus']['Remaining'], 100.0)
+
+    def test_get_workload_combined_detailed(self):
+        """
+        Test get_workload_combined_detailed
+        """
+        workload = self.reports_manager.get_workload_combined_detailed('fedora-27')
+        self.assertListEqual(sorted(workload), ['French', 'Japanese', 'Russian'])
+        for locale, lang in (('ja_JP', 'Japanese'), ('fr_FR', 'French'), ('ru_RU', 'Russian')):
+            self.assertDictEqual(dict(workload[lang]), self._processed_stats('fedora-27', [locale]))
+        # locales of language set are not languages in db
+        self.assertDictEqual(self.reports_manager.get_workload_combined_detailed('fedora-28'), {})
+
+    def test_analyse_releases_status(self):
+        """
+        Test analyse_releases_status
+        """
+        releases_status = self.reports_manager.analyse_releases_status()
+        fedora_27 = releases_status['Fedora 27']
+        self.assertEqual(fedora_27['packages_need_attention'], 2)
+        self.assertEqual(fedora_27['total_untranslated_msgs'], 75)
+        # inactive French is left out, Korean is out of language set
+        expected_languages = {}
+        for locale, lang in (('ja_JP', 'Japanese'), ('ru_RU', 'Russian')):
+            lang_stats = Counter()
+            for stats in self._processed_stats('fedora-27', [locale]).values():
+                lang_stats.update(stats)
+            expected_languages[lang] = (
+                lang_stats['Untranslated'], lang_stats['Translated'], lang_stats['Total'])
+        self.assertDictEqual(fedora_27['languages'], expected_languages)
+        self.assertEqual(fedora_27['languages']['Japanese'], (40, 110, 150))
+        self.assertDictEqual(releases_status['Fedora 28']['languages'], {})
+
+    def test_get_build_system_stats_by_release(self):
+        """
+        Test get_build_system_stats_by_release
+        """
+        package_manager = self.reports_manager.package_manager
+        stats_by_release = package_manager.get_build_system_stats_by_release()
+        # build of a tag, more than one release is mapped to, is of the first release
+        self.assertDictEqual(stats_by_release, {
+            'fedora-27': {'ja_JP': {'Total': 110, 'Translated': 85, 'Untranslated': 25, 'Remaining': 22.73}},
+            'fedora-28': {'ja_JP': {'Total': 40, 'Translated': 40, 'Untranslated': 0, 'Remaining': 0.0}}
+        })
+        self.assertDictEqual(package_manager.get_build_system_stats_by_release('fedora-28'),
+                             stats_by_release['fedora-28'])
+        self.assertFalse(LocaleStats.objects.filter(source='koji').exclude(
+            locale='ja_JP').exists())
+
 
 class JobTemplateManagerTest(FixtureTestCase):
 
@@ -0,0 +1,57 @@
+# Copyright 2019 Red Hat, Inc.
+# All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+from django.test import SimpleTestCase
+from mock import patch
+
+from dashboard import tasks
+from dashboard.constants import SYNC_PRIORITIES
+from dashboard.managers.jobs import JobTemplateManager
+from dashboard.managers.packages import PackagesManager
+
+
+class SyncPackagesWithBuildSystemTest(SimpleTestCase):
+
+    candidates = [('anaconda', 'koji', 'f29'), ('ibus', 'koji', 'f29')]
+    package_names = ['anaconda', 'ibus', 'candlepin']
+
+    def _sync(self, outdated_candidates):
+        with patch.object(JobTemplateManager, 'get_job_templates', return_value=[object()]), \
+                patch.object(PackagesManager, 'get_build_system_sync_candidates',
+                             return_value=(self.candidates, self.package_names)), \
+                patch.object(PackagesManager, 'get_outdated_build_candidates',
+                             return_value=outdated_candidates), \
+                patch.object(tasks, 'chord') as chord, \
+                patch.object(tasks.task_rebuild_build_system_reports, 'delay') as rebuild_reports, \
+                patch.object(tasks.task_rebuild_build_system_reports, 's') as rebuild_reports_callback:
+            tasks._sync_packages_with_build_system(list(SYNC_PRIORITIES))
+        return chord, rebuild_reports, rebuild_reports_callback
+
+    def test_reports_of_all_packages(self):
+        """
+        Test reports are rebuilt for all mapped packages, not only the synced ones
+        """
+        chord, rebuild_reports, rebuild_reports_callback = self._sync(self.candidates[:1])
+        chord.assert_called_once()
+        rebuild_reports_callback.assert_called_once_with(self.package_names)
+        rebuild_reports.assert_not_called()
+
+    def test_reports_without_new_builds(self):
+        """
+        Test reports are rebuilt even if no candidate has a newer build
+        """
+        chord, rebuild_reports, rebuild_reports_callback = self._sync([])
+        chord.assert_not_called()
+        rebuild_reports.assert_called_once_with([], self.package_names)
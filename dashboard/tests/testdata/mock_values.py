@@ -18,9 +18,10 @@
 from dashboard.tests.testdata.test_data import mock_response_add_package, mock_response_validate_package
 
 
-def mock_requests_get_add_package(uri, **kwargs):
+def mock_requests_get_add_package(session, uri, **kwargs):
     """
-    Mock function to patch requests.get for test_add_package
+    Mock function to patch requests.Session.get for test_add_package
+    :param session: requests session
     :param uri: uri of api end point
     :return: mock response object
     """
@@ -28,9 +29,10 @@ def mock_requests_get_add_package(uri, **kwargs):
     return response
 
 
-def mock_requests_get_validate_package(uri, **kwargs):
+def mock_requests_get_validate_package(session, uri, **kwargs):
     """
-    Mock function to patch requests.get for test_validate_package
+    Mock function to patch requests.Session.get for test_validate_package
+    :param session: requests session
     :param uri: uri of api end point
     :return: mock response object
     """
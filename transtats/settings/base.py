@@ -218,3 +218,103 @@ CACHES = {
         'LOCATION': os.path.join(os.path.dirname(BASE_DIR), 'false', 'ts-cache'),
     }
 }
+
+# HTTP connection pooling for platform and build system APIs
+# Platform specific pool size and keep-alive take precedence.
+HTTP_POOL_CONNECTIONS = 4
+HTTP_POOL_MAXSIZE = 10
+HTTP_KEEP_ALIVE = True
+
+# Concurrent fetch of translation statistics
+# Budget of a process, shared by packages syncing concurrently.
+STATS_FETCH_WORKERS = 8
+
+# Adaptive rate limiting of API calls, per host
+# Platform specific rate and max concurrency take precedence.
+API_RATE_LIMIT = 5.0   # requests per second, 0 for no limit
+API_MAX_CONCURRENCY = 4
+
+# In-process cache of API responses (in front of CacheAPI table)
+API_RESPONSE_LRU_SIZE = 256
+API_RESPONSE_LRU_TTL = 600   # seconds
+
+# CacheAPI eviction: expired rows are kept for revalidation during grace period
+API_CACHE_SWEEP_GRACE_HOURS = 24
+API_CACHE_MAX_SIZE_MB = 256
+
+# API request timeouts (connect, read) in seconds, retries of failed GETs
+# with jittered exponential backoff, and per host circuit breaker
+API_REQUEST_TIMEOUT = (5, 60)
+API_REQUEST_RETRIES = 3
+API_RETRY_BACKOFF = 1.0
+API_RETRY_BACKOFF_MAX = 30
+CIRCUIT_BREAKER_FAILURES = 5
+CIRCUIT_BREAKER_COOLDOWN = 300
+
+# Single flight of identical API calls: in-process, and across workers
+# through a redis lock on BROKER_URL (seconds). None for the time an API
+# call may take with API_REQUEST_TIMEOUT, retries and backoff.
+SINGLE_FLIGHT_LOCK_TIMEOUT = None
+SINGLE_FLIGHT_LOCK_WAIT = None
+
+# Artifact (SRPM, POT) downloads are streamed to disk in chunks of (bytes)
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Periodic sync with translation platforms: worker pool size, and threads
+# or processes. Packages of a platform in flight are capped by its
+# api_max_concurrency.
+PLATFORM_SYNC_CONCURRENCY = 8
+PLATFORM_SYNC_PROCESSES = False
+
+# Celery: periodic syncs fan out subtasks, which are joined by chords,
+# hence results backend. Subtasks are acknowledged after they run (a lost
+# worker's subtasks are redelivered) and retried with exponential backoff.
+CELERY_RESULT_BACKEND = BROKER_URL
+CELERY_TASK_RESULT_EXPIRES = 12 * 60 * 60
+CELERYD_PREFETCH_MULTIPLIER = 1
+SYNC_SUBTASK_RETRIES = 3
+SYNC_SUBTASK_RETRY_DELAY = 60   # seconds, doubled on every retry
+
+# Adaptive sync with translation platforms: due packages are synced every
+# tick (at most a batch of them). Sync interval of a package is halved when
+# its stats change, and stretched by backoff otherwise, within bounds.
+# Intervals are in minutes.
+PLATFORM_SYNC_TICK = 15
+PLATFORM_SYNC_TICK_BATCH = 100
+PLATFORM_SYNC_INTERVAL_DEFAULT = 12 * 60
+PLATFORM_SYNC_INTERVAL_MIN = 2 * 60
+PLATFORM_SYNC_INTERVAL_MAX = 7 * 24 * 60
+PLATFORM_SYNC_BACKOFF = 1.5
+
+# Release milestone aware sync: packages of releases within crunch days of
+# a crunch milestone are synced first, and their sync interval is scaled
+# down; packages of EOL or not tracked releases only are scaled up, and
+# synced with build system once a week (on weekday, 0 is Monday).
+SYNC_BY_RELEASE_MILESTONES = True
+SYNC_CRUNCH_MILESTONES = ('String Freeze', 'Translation Deadline')
+SYNC_CRUNCH_DAYS = 14
+SYNC_CRUNCH_INTERVAL_FACTOR = 0.25
+SYNC_EOL_PHASES = ('Unsupported', 'End of Life', 'EOL')
+SYNC_LOW_PRIORITY_INTERVAL_FACTOR = 4
+SYNC_LOW_PRIORITY_WEEKDAY = 6
+
+# Sync with build system: downstream jobs run in a pool of processes, each
+# in a sandbox of its own. A job waits (seconds) for free disk space of
+# sandboxes to be at least (MB).
+DOWNSTREAM_SYNC_CONCURRENCY = 4
+DOWNSTREAM_SYNC_SANDBOX = os.path.join(os.path.dirname(BASE_DIR), 'false', 'sandbox')
+DOWNSTREAM_SYNC_MIN_FREE_MB = 2048
+DOWNSTREAM_SYNC_DISK_WAIT = 600
+
+# Latest builds of build system sync candidates
+# are checked in koji multicalls of this many calls.
+KOJI_MULTICALL_BATCH = 100
+
+# Koji client sessions are reused, per hub. Sessions idle
+# longer than health check seconds are pinged before reuse.
+KOJI_SESSION_POOL_SIZE = 4
+KOJI_SESSION_HEALTH_CHECK = 300
+
+# Locale resolver of stats filtering is rebuilt, when languages
+# change in another process, within these many seconds.
+LOCALE_RESOLVER_CHECK = 60